@@ -0,0 +1,3 @@
+"""
+Benchmarks of entrainment_metrics, run with python -m benchmarks.run_benchmarks
+"""
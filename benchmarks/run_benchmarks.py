@@ -0,0 +1,321 @@
+"""
+Time the main functions of entrainment_metrics on synthetic sessions of
+several sizes and compare the times with the stored baselines.
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --filter metric --sizes small
+    python -m benchmarks.run_benchmarks --save-baseline
+
+Exits with status 1 if any benchmark is slower than tolerance times its baseline.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.io import wavfile
+
+from entrainment_metrics import get_interpausal_units, tama
+from entrainment_metrics.continuous import TimeSeries, calculate_metric
+from entrainment_metrics.tama.utils import separate_frames
+
+from .synthetic import (synthetic_interpausal_units, write_wav_file,
+                        write_words_file)
+
+BASELINES_FNAME: Path = Path(__file__).parent / "baselines.json"
+
+FEATURE: str = "F0_MEAN"
+
+# Seconds of session of each size, by benchmark group
+SESSION_DURATIONS: Dict[str, Dict[str, float]] = {
+    "words": {"small": 600, "medium": 3600, "large": 14400},
+    "frames": {"small": 600, "medium": 3600, "large": 14400},
+    "extraction": {"small": 20, "medium": 60, "large": 180},
+    "time_series": {"small": 600, "medium": 3600, "large": 14400},
+    "metrics": {"small": 300, "medium": 1200, "large": 3600},
+}
+
+# Module imported by a new interpreter at each size, from the lightest use to the heaviest
+IMPORTED_MODULES: Dict[str, str] = {
+    "small": "entrainment_metrics",
+    "medium": "entrainment_metrics.tama",
+    "large": "entrainment_metrics.continuous",
+}
+
+# Length of the TAMA time series of each size
+TIME_SERIES_LENGTHS: Dict[str, int] = {"small": 100, "medium": 1000, "large": 10000}
+
+
+class Benchmark:
+    """
+    A function to time and the setup that builds its arguments for a size.
+    The setup is not timed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        setup: Callable[[str, Path], Tuple[Any, ...]],
+        function: Callable[..., Any],
+        repeat: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.setup = setup
+        self.function = function
+        self.repeat = repeat if repeat is not None else 5
+
+    def run(
+        self,
+        size: str,
+        tmp_path: Path,
+    ) -> float:
+        """
+        Return the minimum wall time, in seconds, of repeat calls.
+        """
+        args = self.setup(size, tmp_path)
+        times: List[float] = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            self.function(*args)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+
+def setup_import(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    return (IMPORTED_MODULES[size],)
+
+
+def import_module(module: str) -> None:
+    """
+    Import the module in a new interpreter, as a short-lived worker or CLI call does.
+    """
+    subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+
+
+def setup_words(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    words_fname = tmp_path / f"words_{size}.words"
+    write_words_file(words_fname, SESSION_DURATIONS["words"][size], seed=0)
+    return (words_fname,)
+
+
+def setup_frames(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    duration = SESSION_DURATIONS["frames"][size]
+    ipus = synthetic_interpausal_units(duration, FEATURE, seed=0)
+    # Only the length of the audio is used, the samples are not read
+    samplerate = 16000
+    return ipus, np.broadcast_to(np.int16(0), (int(duration * samplerate),)), samplerate
+
+
+def setup_extraction(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    duration = SESSION_DURATIONS["extraction"][size]
+    wav_fname = tmp_path / f"extraction_{size}.wav"
+    words_fname = tmp_path / f"extraction_{size}.words"
+    write_wav_file(wav_fname, duration, seed=0)
+    write_words_file(words_fname, duration, seed=0)
+    samplerate, data = wavfile.read(wav_fname)
+    frames = separate_frames(get_interpausal_units(words_fname), data, samplerate)
+    return frames, wav_fname
+
+
+def calculate_time_series(
+    frames: List[tama.Frame],
+    wav_fname: Path,
+) -> List[float]:
+    return tama.calculate_time_series(FEATURE, frames, wav_fname, extractor="praat")
+
+
+def setup_sample_correlation(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    rng = np.random.default_rng(0)
+    length = TIME_SERIES_LENGTHS[size]
+    time_series_a = rng.normal(size=length)
+    time_series_b = time_series_a + rng.normal(size=length)
+    # Some missing frames, as silences give
+    time_series_a[rng.choice(length, length // 10, replace=False)] = np.nan
+    return time_series_a.tolist(), time_series_b.tolist(), 10
+
+
+def setup_time_series(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    duration = SESSION_DURATIONS["time_series"][size]
+    return (synthetic_interpausal_units(duration, FEATURE, seed=0),)
+
+
+def build_time_series(ipus) -> TimeSeries:
+    return TimeSeries(FEATURE, ipus, "knn")
+
+
+def setup_predict(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    duration = SESSION_DURATIONS["time_series"][size]
+    time_series = build_time_series(synthetic_interpausal_units(duration, FEATURE, 0))
+    return time_series, np.arange(0, duration, 0.01)
+
+
+def setup_metric(size: str, tmp_path: Path) -> Tuple[Any, ...]:
+    duration = SESSION_DURATIONS["metrics"][size]
+    return (
+        build_time_series(synthetic_interpausal_units(duration, FEATURE, seed=0)),
+        build_time_series(synthetic_interpausal_units(duration, FEATURE, seed=1)),
+    )
+
+
+def metric_benchmark(
+    metric: str,
+    integration_method: Optional[str] = None,
+) -> Callable[[TimeSeries, TimeSeries], float]:
+    def run_metric(time_series_a: TimeSeries, time_series_b: TimeSeries) -> float:
+        return calculate_metric(
+            metric, time_series_a, time_series_b, integration_method=integration_method
+        )
+
+    return run_metric
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("import", setup_import, import_module),
+    Benchmark("get_interpausal_units", setup_words, get_interpausal_units),
+    Benchmark("separate_frames", setup_frames, separate_frames),
+    Benchmark("tama.calculate_time_series", setup_extraction, calculate_time_series, 1),
+    Benchmark(
+        "tama.calculate_sample_correlation",
+        setup_sample_correlation,
+        tama.calculate_sample_correlation,
+    ),
+    Benchmark("TimeSeries", setup_time_series, build_time_series),
+    Benchmark(
+        "TimeSeries.predict",
+        setup_predict,
+        lambda time_series, times: time_series.predict(times),
+    ),
+    Benchmark("metric.proximity", setup_metric, metric_benchmark("proximity")),
+    Benchmark("metric.convergence", setup_metric, metric_benchmark("convergence")),
+    Benchmark(
+        "metric.synchrony.montecarlo",
+        setup_metric,
+        metric_benchmark("synchrony", "montecarlo"),
+    ),
+    Benchmark(
+        "metric.synchrony.trapz", setup_metric, metric_benchmark("synchrony", "trapz")
+    ),
+]
+
+
+def run_benchmarks(
+    sizes: List[str],
+    name_filter: Optional[str] = None,
+) -> Dict[str, float]:
+    """
+    Return the time of each benchmark for each size, by '{name}[{size}]'.
+    """
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for benchmark in BENCHMARKS:
+            if name_filter is not None and name_filter not in benchmark.name:
+                continue
+            for size in sizes:
+                key = f"{benchmark.name}[{size}]"
+                results[key] = benchmark.run(size, Path(tmp_dir))
+                print(f"{key:<50} {results[key]:10.4f}s", flush=True)
+    return results
+
+
+def compare_with_baselines(
+    results: Dict[str, float],
+    baselines: Dict[str, float],
+    tolerance: float,
+) -> List[str]:
+    """
+    Return the benchmarks slower than tolerance times their baseline.
+    """
+    regressions: List[str] = []
+    for key, seconds in results.items():
+        if key not in baselines:
+            continue
+        ratio = seconds / baselines[key]
+        if ratio > tolerance:
+            regressions.append(
+                f"{key}: {seconds:.4f}s, {ratio:.2f}x the baseline of {baselines[key]:.4f}s"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        description="Time entrainment_metrics on synthetic sessions"
+    )
+    arg_parser.add_argument(
+        "-s",
+        "--sizes",
+        type=str,
+        nargs="+",
+        default=["small", "medium", "large"],
+        choices=["small", "medium", "large"],
+        help="Sizes of the sessions to time",
+    )
+    arg_parser.add_argument(
+        "-f", "--filter", type=str, help="Only run the benchmarks with this in the name"
+    )
+    arg_parser.add_argument(
+        "-b",
+        "--baselines",
+        type=Path,
+        default=BASELINES_FNAME,
+        help="JSON file with the baseline times",
+    )
+    arg_parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the times as the new baselines instead of comparing",
+    )
+    arg_parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="Times slower than the baseline considered a regression",
+    )
+    arg_parser.add_argument(
+        "-o", "--output", type=Path, help="JSON file to write the times to"
+    )
+    args = arg_parser.parse_args(argv)
+
+    # The TimeSeries warn about predicting outside of their support
+    warnings.simplefilter("ignore")
+    results = run_benchmarks(args.sizes, args.filter)
+
+    if args.output is not None:
+        with open(args.output, encoding="utf-8", mode="w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    baselines: Dict[str, Any] = {"machine": {}, "times": {}}
+    if args.baselines.exists():
+        with open(args.baselines, encoding="utf-8", mode="r") as baselines_file:
+            baselines = json.load(baselines_file)
+
+    if args.save_baseline:
+        baselines["machine"] = {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "processor": platform.processor() or platform.machine(),
+        }
+        baselines["times"].update(results)
+        with open(args.baselines, encoding="utf-8", mode="w") as baselines_file:
+            json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+            baselines_file.write("\n")
+        return 0
+
+    regressions = compare_with_baselines(results, baselines["times"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
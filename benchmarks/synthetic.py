@@ -0,0 +1,102 @@
+"""
+Generators of synthetic sessions, as long as needed, for the benchmarks
+"""
+
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+from scipy.io import wavfile
+
+from entrainment_metrics import InterPausalUnit
+
+SAMPLERATE: int = 16000
+
+
+def synthetic_interpausal_units_bounds(
+    duration: float,
+    seed: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the starts and ends of IPUs of 0.3 to 3 seconds separated by
+    silences of 0.1 to 1.5 seconds, covering duration seconds.
+    """
+    rng = np.random.default_rng(seed)
+    # Enough intervals for the mean IPU plus silence length of 2.4 seconds
+    amount_of_intervals = int(duration / 0.4) + 1
+    ipus_lengths = rng.uniform(0.3, 3.0, amount_of_intervals)
+    silences_lengths = rng.uniform(0.1, 1.5, amount_of_intervals)
+
+    starts = np.cumsum(silences_lengths) + np.concatenate(
+        [[0.0], np.cumsum(ipus_lengths)[:-1]]
+    )
+    ends = starts + ipus_lengths
+    inside = ends < duration
+    return np.round(starts[inside], 6), np.round(ends[inside], 6)
+
+
+def write_words_file(
+    words_fname: Path,
+    duration: float,
+    seed: Optional[int] = None,
+) -> None:
+    """
+    Write a .words file of duration seconds, with a word every 0.25 seconds
+    inside each IPU of synthetic_interpausal_units_bounds and "#" in the silences.
+    """
+    starts, ends = synthetic_interpausal_units_bounds(duration, seed)
+    lines: List[str] = []
+    previous_end = 0.0
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        lines.append(f"{previous_end:.6f} {start:.6f} #")
+        words_bounds = np.append(np.arange(start, end, 0.25), end)
+        for word_start, word_end in zip(words_bounds[:-1], words_bounds[1:]):
+            lines.append(f"{word_start:.6f} {word_end:.6f} word")
+        previous_end = end
+    lines.append(f"{previous_end:.6f} {duration:.6f} #")
+
+    with open(words_fname, encoding="utf-8", mode="w") as words_file:
+        words_file.write("\n".join(lines) + "\n")
+
+
+def write_wav_file(
+    wav_fname: Path,
+    duration: float,
+    seed: Optional[int] = None,
+) -> None:
+    """
+    Write a mono 16 kHz .wav file of duration seconds with a harmonic tone
+    with a slowly varying pitch inside each IPU of
+    synthetic_interpausal_units_bounds and low noise in the silences.
+    """
+    rng = np.random.default_rng(seed)
+    times = np.arange(int(duration * SAMPLERATE)) / SAMPLERATE
+    pitch = 150 + 40 * np.sin(2 * np.pi * times / 3.7)
+    phase = 2 * np.pi * np.cumsum(pitch) / SAMPLERATE
+    voice = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 6))
+
+    is_voiced = np.zeros(times.shape[0], dtype=bool)
+    starts, ends = synthetic_interpausal_units_bounds(duration, seed)
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        is_voiced[int(start * SAMPLERATE) : int(end * SAMPLERATE)] = True
+
+    signal = 0.3 * voice * is_voiced + 0.01 * rng.standard_normal(times.shape[0])
+    wavfile.write(wav_fname, SAMPLERATE, (signal * 32767 / 2).astype(np.int16))
+
+
+def synthetic_interpausal_units(
+    duration: float,
+    feature: str,
+    seed: Optional[int] = None,
+) -> List[InterPausalUnit]:
+    """
+    Return the IPUs of synthetic_interpausal_units_bounds with a random
+    walk as the value of the feature.
+    """
+    rng = np.random.default_rng(seed)
+    starts, ends = synthetic_interpausal_units_bounds(duration, seed)
+    values = 150 + np.cumsum(rng.normal(0, 5, starts.shape[0]))
+    return [
+        InterPausalUnit(start, end, {feature: value})
+        for start, end, value in zip(starts.tolist(), ends.tolist(), values.tolist())
+    ]
@@ -1,3 +1,13 @@
+from .corpus import CorpusIndex, load_corpus, load_corpus_index
+from .extraction import (calculate_features_from_llds,
+                         calculate_features_from_praat_tracks,
+                         calculate_praat_features)
+from .instrumentation import Profiler
 from .interpausal_unit import InterPausalUnit
-from .utils import (get_interpausal_units, plot_ipus, print_audio_description,
-                    print_ipus_information)
+from .ipu_table import (InterPausalUnitTable, interpausal_units_table,
+                        load_interpausal_units_table)
+from .precision import get_dtype, set_dtype, use_dtype
+from .shared import (SharedArray, SharedAudio, SharedInterPausalUnitTable,
+                     share_array, share_audio, share_table)
+from .utils import (get_interpausal_units, get_interpausal_units_bounds,
+                    plot_ipus, print_audio_description, print_ipus_information)
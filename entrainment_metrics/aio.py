@@ -0,0 +1,342 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+import numpy as np
+
+from entrainment_metrics.continuous import TimeSeries, calculate_metric
+from entrainment_metrics.interpausal_unit import InterPausalUnit
+from entrainment_metrics.ipu_table import InterPausalUnitTable
+from entrainment_metrics.precision import get_dtype, use_dtype
+from entrainment_metrics.shared import SharedAudio, SharedInterPausalUnitTable
+
+# Computations run at once when max_concurrency is not given
+DEFAULT_MAX_CONCURRENCY: int = os.cpu_count() or 1
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Returns value as something hashable, to be part of a key: lists and
+    tuples as tuples and dicts as sorted tuples of items.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, value.tobytes())
+    return value
+
+
+def audio_key(audio_file: Union[Path, SharedAudio]) -> Hashable:
+    """
+    Returns what identifies the audio of audio_file: its absolute path, or
+    the shared memory block of a SharedAudio.
+    """
+    if isinstance(audio_file, SharedAudio):
+        return ("shared", audio_file.signal.name)
+    return os.fspath(Path(audio_file).resolve())
+
+
+def interpausal_units_key(
+    interpausal_units: Union[
+        List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable
+    ],
+) -> Hashable:
+    """
+    Returns what identifies the IPUs given: the shared memory block of a
+    SharedInterPausalUnitTable, or the object itself otherwise (while a
+    computation is running it keeps the object alive, so its id is not reused).
+    """
+    if isinstance(interpausal_units, SharedInterPausalUnitTable):
+        return ("shared", interpausal_units.values.name)
+    return id(interpausal_units)
+
+
+def call_with_dtype(dtype: np.dtype, function: Callable, *args, **kwargs) -> Any:
+    """
+    Call function with dtype as the precision policy. Executors do not
+    get it from the task that submits the call.
+    """
+    with use_dtype(dtype):
+        return function(*args, **kwargs)
+
+
+def calculate_interpausal_unit_features(
+    start: float,
+    end: float,
+    audio_file: Union[Path, SharedAudio],
+    **kwargs,
+) -> Dict[str, float]:
+    """
+    Returns the features InterPausalUnit.calculate_features extracts for
+    an IPU from start to end.
+    """
+    interpausal_unit = InterPausalUnit(start, end)
+    interpausal_unit.calculate_features(audio_file, **kwargs)
+    return interpausal_unit.features_values
+
+
+class AsyncRunner:
+    """
+    Runs the blocking work of the library from asyncio code, without
+    stalling the event loop:
+
+        async with AsyncRunner(max_concurrency=4) as runner:
+            features = await runner.calculate_features(ipu, audio_file, extractor="praat")
+            time_series = await runner.time_series("F0_MAX", ipus, method="knn")
+            value = await runner.calculate_metric("synchrony", time_series, other)
+
+    The work runs in an executor, at most max_concurrency computations at
+    once. The rest wait their turn, which slows down whoever awaits them
+    (backpressure). With max_pending, calls made when that many
+    computations are already waiting raise asyncio.QueueFull instead, so a
+    service can reject requests rather than queue them without bound.
+
+    Concurrent calls for the same computation (e.g. the same audio, IPU
+    bounds and extractor) share it: it runs once and every caller gets
+    its result. Results are not kept after the computation ends.
+
+    The computations run with the precision policy (see use_dtype) of the
+    task that awaits them and, in executors of threads, with its whole
+    context, so an active Profiler records them too.
+
+
+    Attributes
+    ----------
+    executor: Executor
+        Where the computations run. Default is a ThreadPoolExecutor with
+        max_concurrency threads, shut down when the runner is closed. An
+        executor given (e.g. a ProcessPoolExecutor) is not shut down.
+
+    max_concurrency: int
+        The computations that run at once. Default is the amount of CPUs.
+
+    max_pending: Optional[int]
+        The computations that can wait to run. Default is no limit.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        if max_concurrency is None:
+            max_concurrency = DEFAULT_MAX_CONCURRENCY
+        if max_concurrency < 1:
+            raise ValueError("Not a valid max_concurrency given")
+        if max_pending is not None and max_pending < 0:
+            raise ValueError("Not a valid max_pending given")
+
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._owns_executor = executor is None
+        self.executor = (
+            executor
+            if executor is not None
+            else ThreadPoolExecutor(max_workers=max_concurrency)
+        )
+
+        # Created in the event loop when first needed
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Computations running in the executor
+        self._running = 0
+        # Computations running or waiting, by key
+        self._in_flight: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __repr__(self):
+        return f"AsyncRunner(max_concurrency={self.max_concurrency}, max_pending={self.max_pending}, in_flight={len(self._in_flight)})"
+
+    async def __aenter__(self) -> "AsyncRunner":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def pending(self) -> int:
+        """
+        Returns the amount of computations waiting to run.
+        """
+        return len(self._in_flight) - self._running
+
+    def in_flight(self) -> int:
+        """
+        Returns the amount of computations running or waiting to run.
+        """
+        return len(self._in_flight)
+
+    async def aclose(self) -> None:
+        """
+        Wait for the computations in flight and shut down the executor if
+        the runner created it.
+        """
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    async def run(
+        self,
+        key: Optional[Hashable],
+        function: Callable,
+        *args,
+        **kwargs,
+    ) -> Any:
+        """
+        Returns function(*args, **kwargs), called in the executor with the
+        precision policy of the calling task, and its context (e.g. the
+        active Profiler) unless the executor runs processes.
+
+        Calls with the same key while the first one is running share its
+        result. None runs the function without sharing it. For executors
+        of processes, function and its arguments must be picklable.
+        """
+        if key is not None and key in self._in_flight:
+            return await asyncio.shield(self._in_flight[key])
+
+        if (
+            self.max_pending is not None
+            and len(self._in_flight) >= self.max_concurrency + self.max_pending
+        ):
+            raise asyncio.QueueFull()
+
+        call = partial(call_with_dtype, get_dtype(), function, *args, **kwargs)
+        if not isinstance(self.executor, ProcessPoolExecutor):
+            # As asyncio.to_thread, run_in_executor does not copy the context
+            call = partial(contextvars.copy_context().run, call)
+        task = asyncio.ensure_future(self._run_in_executor(call))
+        # Calls without a key are tracked too, aclose waits for them
+        in_flight_key = key if key is not None else ("unshared", id(task))
+        self._in_flight[in_flight_key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(in_flight_key, None))
+        return await asyncio.shield(task)
+
+    async def _run_in_executor(self, call: Callable[[], Any]) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            self._running += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, call
+                )
+            finally:
+                self._running -= 1
+
+    async def calculate_features(
+        self,
+        interpausal_unit: InterPausalUnit,
+        audio_file: Union[Path, SharedAudio],
+        pitch_gender: Optional[str] = None,
+        extractor: Optional[str] = None,
+        features: Optional[List[str]] = None,
+        feature_set: Optional[str] = None,
+    ) -> Dict[str, float]:
+        """
+        InterPausalUnit.calculate_features without blocking
+
+        The features are extracted in the executor and stored in the IPU
+        when done. Concurrent calls for the same audio, IPU bounds and
+        parameters (even with different InterPausalUnit objects) extract
+        them once.
+
+
+        Parameters
+        ----------
+        interpausal_unit: InterPausalUnit
+            The IPU to calculate the features of.
+        audio_file: Union[Path, SharedAudio]
+            A path to a wav file, or the wav file decoded in shared memory (see share_audio).
+        pitch_gender, extractor, features, feature_set
+            As in InterPausalUnit.calculate_features.
+        Returns
+        -------
+        Dict[str, float]
+            The features of the IPU, as InterPausalUnit.calculate_features.
+        """
+        kwargs = {
+            "pitch_gender": pitch_gender,
+            "extractor": extractor,
+            "features": features,
+            "feature_set": feature_set,
+        }
+        features_values = await self.run(
+            (
+                "calculate_features",
+                audio_key(audio_file),
+                interpausal_unit.start,
+                interpausal_unit.end,
+                freeze(kwargs),
+            ),
+            calculate_interpausal_unit_features,
+            interpausal_unit.start,
+            interpausal_unit.end,
+            audio_file,
+            **kwargs,
+        )
+        interpausal_unit.features_values.update(features_values)
+        return interpausal_unit.features_values
+
+    async def time_series(
+        self,
+        feature: str,
+        interpausal_units: Union[
+            List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable
+        ],
+        method: str,
+        **kwargs,
+    ) -> TimeSeries:
+        """
+        Returns TimeSeries(feature, interpausal_units, method, **kwargs),
+        fitted without blocking. Concurrent calls with the same IPUs (the
+        same object, or the same SharedInterPausalUnitTable) and
+        parameters fit it once.
+        """
+        return await self.run(
+            (
+                "time_series",
+                feature,
+                interpausal_units_key(interpausal_units),
+                method,
+                freeze(kwargs),
+            ),
+            TimeSeries,
+            feature,
+            interpausal_units,
+            method,
+            **kwargs,
+        )
+
+    async def calculate_metric(
+        self,
+        metric: str,
+        time_series_a: TimeSeries,
+        time_series_b: TimeSeries,
+        **kwargs,
+    ) -> float:
+        """
+        Returns calculate_metric(metric, time_series_a, time_series_b, **kwargs)
+        without blocking. Concurrent calls with the same TimeSeries objects
+        and parameters calculate it once.
+        """
+        return await self.run(
+            (
+                "calculate_metric",
+                metric,
+                id(time_series_a),
+                id(time_series_b),
+                freeze(kwargs),
+            ),
+            calculate_metric,
+            metric,
+            time_series_a,
+            time_series_b,
+            **kwargs,
+        )
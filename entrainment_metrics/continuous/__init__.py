@@ -1,3 +1,12 @@
+from .backends import REGRESSION_BACKENDS, register_regression_backend
+from .batch import calculate_metrics_batch
 from .continuous_time_series import TimeSeries
-from .metrics import calculate_common_support, calculate_metric
+from .metrics import (calculate_common_support, calculate_metric,
+                      calculate_synchrony_profile)
+from .multi_feature_time_series import MultiFeatureTimeSeries
+from .online_time_series import OnlineMetrics, OnlineTimeSeries
+from .plotting import clear_curves, predict_curve, save_time_series_plots
+from .serialization import load_time_series, save_time_series
+from .surrogates import SurrogateTestResult, surrogate_test
 from .utils import plot_time_series
+from .windowed_metrics import calculate_windowed_metric
@@ -0,0 +1,262 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def sorted_unique_points(
+    X: np.ndarray,
+    y: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the points in time of X (shape (n, 1)) sorted and without
+    repetitions, and the mean of the values of y at each of them.
+    """
+    xs, inverse = np.unique(
+        np.asarray(X, dtype=np.float64).ravel(), return_inverse=True
+    )
+    values = np.bincount(inverse, weights=y) / np.bincount(inverse)
+    return xs, values
+
+
+class LinearInterpolationRegressor:
+    """
+    Joins the values of consecutive points in time with straight lines,
+    and keeps the value of the first (last) point before (after) them.
+
+    Fitting sorts the points, O(n log n), and each prediction is a binary
+    search, O(log n).
+    """
+
+    def __init__(self) -> None:
+        self.xs: Optional[np.ndarray] = None
+        self.values: Optional[np.ndarray] = None
+
+    def get_params(self) -> Dict[str, Any]:
+        return {}
+
+    def fit(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+    ) -> "LinearInterpolationRegressor":
+        self.xs, self.values = sorted_unique_points(X, y)
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.xs is None or self.values is None:
+            raise ValueError("The model is not fitted, call fit first")
+        return np.interp(np.asarray(X).ravel(), self.xs, self.values)
+
+
+class MovingAverageRegressor:
+    """
+    Predicts the mean of the values of the points in time inside a window
+    centered in the point to predict, or the value of the nearest point if
+    there is none inside it.
+
+    Fitting sorts the points and sums their values, O(n log n), and each
+    prediction is two binary searches, O(log n).
+    """
+
+    def __init__(self, window: Optional[float] = None) -> None:
+        #: The length in seconds of the window. Default is 10.
+        self.window = window if window is not None else 10.0
+        if self.window <= 0:
+            raise ValueError("window must be positive")
+
+        self.xs: Optional[np.ndarray] = None
+        self.values: Optional[np.ndarray] = None
+        self.sums: Optional[np.ndarray] = None
+        self.counts: Optional[np.ndarray] = None
+
+    def get_params(self) -> Dict[str, Any]:
+        return {"window": self.window}
+
+    def fit(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+    ) -> "MovingAverageRegressor":
+        xs = np.asarray(X, dtype=np.float64).ravel()
+        order = np.argsort(xs, kind="stable")
+        self.xs = xs[order]
+        values = np.asarray(y, dtype=np.float64)[order]
+        self.values = values
+        self.sums = np.concatenate([[0.0], np.cumsum(values)])
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.xs is None or self.values is None or self.sums is None:
+            raise ValueError("The model is not fitted, call fit first")
+        X = np.asarray(X, dtype=np.float64).ravel()
+        firsts = np.searchsorted(self.xs, X - self.window / 2, side="left")
+        lasts = np.searchsorted(self.xs, X + self.window / 2, side="right")
+        amounts = lasts - firsts
+
+        # Nearest point, for the windows without points
+        nearest = np.clip(np.searchsorted(self.xs, X), 1, len(self.xs) - 1)
+        if len(self.xs) == 1:
+            nearest = np.zeros(X.shape[0], dtype=np.int64)
+        else:
+            nearest -= X - self.xs[nearest - 1] < self.xs[nearest] - X
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = (self.sums[lasts] - self.sums[firsts]) / amounts
+        return np.where(amounts > 0, means, self.values[nearest])
+
+
+class KernelRegressor:
+    """
+    Nadaraya-Watson regression with a gaussian kernel: predicts the mean of
+    the values weighted by exp(-d^2 / (2 bandwidth^2)), where d is the
+    distance in time to the point to predict. Points further than 4
+    bandwidths are ignored, and the value of the nearest point is predicted
+    if every point is further.
+
+    Fitting sorts the points, O(n log n), and each prediction is a binary
+    search plus the points inside the 8 bandwidths window.
+    """
+
+    # Amount of points predicted at once, bounds the memory used
+    CHUNK_SIZE: int = 4096
+
+    def __init__(self, bandwidth: Optional[float] = None) -> None:
+        #: The standard deviation in seconds of the gaussian kernel. Default is 5.
+        self.bandwidth = bandwidth if bandwidth is not None else 5.0
+        if self.bandwidth <= 0:
+            raise ValueError("bandwidth must be positive")
+
+        self.xs: Optional[np.ndarray] = None
+        self.values: Optional[np.ndarray] = None
+        self.nearest_regressor: Optional[MovingAverageRegressor] = None
+
+    def get_params(self) -> Dict[str, Any]:
+        return {"bandwidth": self.bandwidth}
+
+    def fit(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+    ) -> "KernelRegressor":
+        xs = np.asarray(X, dtype=np.float64).ravel()
+        order = np.argsort(xs, kind="stable")
+        self.xs = xs[order]
+        self.values = np.asarray(y, dtype=np.float64)[order]
+        # A window shorter than any distance predicts the nearest value
+        self.nearest_regressor = MovingAverageRegressor(window=1e-12).fit(X, y)
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.xs is None or self.values is None or self.nearest_regressor is None:
+            raise ValueError("The model is not fitted, call fit first")
+        X = np.asarray(X, dtype=np.float64).ravel()
+        res = np.empty(X.shape[0])
+        for chunk_start in range(0, X.shape[0], self.CHUNK_SIZE):
+            chunk = X[chunk_start : chunk_start + self.CHUNK_SIZE]
+            firsts = np.searchsorted(self.xs, chunk - 4 * self.bandwidth, "left")
+            lasts = np.searchsorted(self.xs, chunk + 4 * self.bandwidth, "right")
+
+            # Every point inside the window of each point to predict, padded
+            width = max(int((lasts - firsts).max(initial=0)), 1)
+            positions = firsts[:, np.newaxis] + np.arange(width)
+            inside = positions < lasts[:, np.newaxis]
+            positions = np.minimum(positions, len(self.xs) - 1)
+
+            distances = (self.xs[positions] - chunk[:, np.newaxis]) / self.bandwidth
+            weights = np.exp(-0.5 * np.square(distances)) * inside
+            weights_sums = weights.sum(axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                chunk_res = (weights * self.values[positions]).sum(
+                    axis=1
+                ) / weights_sums
+            res[chunk_start : chunk_start + chunk.shape[0]] = np.where(
+                weights_sums > 0, chunk_res, self.nearest_regressor.predict(chunk)
+            )
+        return res
+
+
+class SmoothingSplineRegressor:
+    """
+    A cubic smoothing spline fitted to the values, with the smoothing chosen
+    by generalized cross-validation unless lam is given (see
+    scipy.interpolate.make_smoothing_spline). The values of repeated points
+    in time are averaged. Outside the points, the value of the first (last)
+    one is kept.
+
+    Each prediction finds the spline piece with a binary search, O(log n).
+    Choosing lam by cross-validation is the slowest part of fitting, give
+    it to fit long TimeSeries faster.
+    """
+
+    def __init__(self, lam: Optional[float] = None) -> None:
+        #: The smoothing parameter, the bigger the smoother. Default is chosen by cross-validation.
+        self.lam = lam
+        self.spline: Optional[Callable[[np.ndarray], np.ndarray]] = None
+        self.xs: Optional[np.ndarray] = None
+
+    def get_params(self) -> Dict[str, Any]:
+        return {"lam": self.lam}
+
+    def fit(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+    ) -> "SmoothingSplineRegressor":
+        from scipy.interpolate import make_smoothing_spline
+
+        xs, values = sorted_unique_points(X, y)
+        if len(xs) < 5:
+            raise ValueError("spline needs at least 5 different points in time")
+        self.xs = xs
+        self.spline = make_smoothing_spline(xs, values, lam=self.lam)
+        return self
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.xs is None or self.spline is None:
+            raise ValueError("The model is not fitted, call fit first")
+        X = np.clip(np.asarray(X, dtype=np.float64).ravel(), self.xs[0], self.xs[-1])
+        return self.spline(X)
+
+
+def create_knn_regressor(**params):
+    from sklearn.neighbors import KNeighborsRegressor
+
+    return KNeighborsRegressor(**params)
+
+
+#: The factory of the model of each method of TimeSeries, called with the
+#: model parameters. Models must have fit(X, y), predict(X) and get_params().
+REGRESSION_BACKENDS: Dict[str, Callable[..., Any]] = {
+    "knn": create_knn_regressor,
+    "linear": LinearInterpolationRegressor,
+    "moving_average": MovingAverageRegressor,
+    "kernel": KernelRegressor,
+    "spline": SmoothingSplineRegressor,
+}
+
+
+def register_regression_backend(
+    method: str,
+    factory: Callable[..., Any],
+) -> None:
+    """
+    Make a model available as a TimeSeries method
+
+    factory is called with the keyword arguments given to TimeSeries (and
+    the ones returned by get_params of a saved TimeSeries) and must
+    return a model with fit(X, y), predict(X) and get_params(), where X
+    has shape (n, 1) with the points in time.
+    """
+    REGRESSION_BACKENDS[method] = factory
+
+
+def create_regression_backend(
+    method: str,
+    **params,
+) -> Any:
+    """
+    Return a new model of the method given, built with params.
+    """
+    if method not in REGRESSION_BACKENDS:
+        raise ValueError(f"Not a valid method: {method}")
+    return REGRESSION_BACKENDS[method](**params)
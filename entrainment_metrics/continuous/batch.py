@@ -0,0 +1,177 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from entrainment_metrics.continuous.continuous_time_series import TimeSeries
+from entrainment_metrics.precision import get_dtype, use_dtype
+
+from .metrics import (DEFAULT_SYNCHRONY_DELTAS, calculate_common_support,
+                      calculate_metric_from_values)
+
+AVAILABLE_METRICS: List[str] = ["proximity", "convergence", "pearson", "synchrony"]
+
+# Amount of pairs whose predictions are stacked at once, bounds the memory used
+PAIRS_CHUNK_SIZE: int = 256
+
+
+def group_pairs_by_grid(
+    pairs: Sequence[Tuple[TimeSeries, TimeSeries]],
+    start: Optional[float],
+    end: Optional[float],
+    granularity: float,
+) -> Dict[Tuple[float, float, float], List[int]]:
+    """
+    Group the indices of the pairs evaluated over the same points in time.
+
+    Each pair is evaluated between start and end, or over its common
+    support if they are not given, with the given granularity.
+    """
+    groups: Dict[Tuple[float, float, float], List[int]] = {}
+    for i, (time_series_a, time_series_b) in enumerate(pairs):
+        pair_start, pair_end = start, end
+        if pair_start is None or pair_end is None:
+            common_start, common_end = calculate_common_support(
+                time_series_a, time_series_b
+            )
+            if pair_start is None:
+                pair_start = common_start
+            if pair_end is None:
+                pair_end = common_end
+        groups.setdefault((pair_start, pair_end, granularity), []).append(i)
+    return groups
+
+
+def calculate_metrics_over_grid(
+    pairs: Sequence[Tuple[TimeSeries, TimeSeries]],
+    metrics: List[str],
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: List[float],
+    integration_method: Optional[str],
+    dtype: np.dtype,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate the metrics for pairs of TimeSeries evaluated over the same points in time.
+
+    Every TimeSeries is predicted once, even if it takes part in many pairs,
+    and the metrics are calculated for all the pairs at once. dtype is the
+    precision policy, given since processes do not share it.
+    """
+    with use_dtype(dtype):
+        predictions: Dict[int, np.ndarray] = {}
+        results: Dict[str, List[np.ndarray]] = {metric: [] for metric in metrics}
+        for chunk_start in range(0, len(pairs), PAIRS_CHUNK_SIZE):
+            chunk = pairs[chunk_start : chunk_start + PAIRS_CHUNK_SIZE]
+            for time_series in (ts for pair in chunk for ts in pair):
+                if id(time_series) not in predictions:
+                    predictions[id(time_series)] = time_series.predict_interval(
+                        start, end, granularity
+                    )
+
+            time_series_values_a = np.stack([predictions[id(a)] for a, _ in chunk])
+            time_series_values_b = np.stack([predictions[id(b)] for _, b in chunk])
+
+            for metric in metrics:
+                res = calculate_metric_from_values(
+                    metric,
+                    time_series_values_a,
+                    time_series_values_b,
+                    start,
+                    end,
+                    granularity,
+                    synchrony_deltas,
+                    integration_method,
+                )
+                results[metric].append(np.atleast_1d(res))
+
+        return {metric: np.concatenate(values) for metric, values in results.items()}
+
+
+def calculate_metrics_batch(
+    pairs: Sequence[Tuple[TimeSeries, TimeSeries]],
+    metrics: Optional[List[str]] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    granularity: Optional[float] = None,
+    synchrony_deltas: Optional[List[float]] = None,
+    integration_method: Optional[str] = None,
+    n_jobs: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate entrainment metrics for many pairs of times series at once
+
+    Equivalent to calling calculate_metric for each pair and each metric,
+    but the pairs are grouped by the points in time over which they are
+    evaluated: inside a group each TimeSeries is predicted once and the
+    metrics are calculated for all the pairs with vectorized operations.
+
+
+    Parameters
+    ----------
+    pairs: Sequence[Tuple[TimeSeries, TimeSeries]]
+        The pairs (time_series_a, time_series_b) to calculate the metrics from.
+    metrics: Optional[List[str]]
+        The metrics to be calculated ("synchrony", "proximity", or "convergence"). Default is all of them.
+    start: Optional[float]
+        A starting point in time to calculate the metrics. Default is the start of the common support of each pair.
+    end: Optional[float]
+       An ending point in time to calculate the metrics. Default is the end of the common support of each pair.
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+    synchrony_deltas: Optional[List[float]]
+        The lags in seconds used to calculate synchrony.
+    integration_method: Optional[str] = None
+        The integration method to use for synchrony. Methods available: "montecarlo" and "trapz"
+    n_jobs: Optional[int]
+        The amount of processes among which the groups of pairs are distributed. Default is 1, no extra processes.
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        For each metric, the array with its value for each pair, in the order of pairs.
+    """
+    if metrics is None:
+        metrics = ["proximity", "convergence", "synchrony"]
+
+    metrics = [metric.lower() for metric in metrics]
+    if any(metric not in AVAILABLE_METRICS for metric in metrics):
+        raise ValueError("Not a valid metric")
+
+    if granularity is None:
+        granularity = 0.01
+
+    if synchrony_deltas is None:
+        synchrony_deltas = DEFAULT_SYNCHRONY_DELTAS
+
+    if n_jobs is None:
+        n_jobs = 1
+
+    groups = group_pairs_by_grid(pairs, start, end, granularity)
+    tasks = [
+        (
+            [pairs[i] for i in indices],
+            metrics,
+            group_start,
+            group_end,
+            group_granularity,
+            synchrony_deltas,
+            integration_method,
+            get_dtype(),
+        )
+        for (group_start, group_end, group_granularity), indices in groups.items()
+    ]
+
+    if n_jobs > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            groups_results = list(
+                executor.map(calculate_metrics_over_grid, *zip(*tasks))
+            )
+    else:
+        groups_results = [calculate_metrics_over_grid(*task) for task in tasks]
+
+    results = {metric: np.empty(len(pairs), dtype=get_dtype()) for metric in metrics}
+    for indices, group_results in zip(groups.values(), groups_results):
+        for metric in metrics:
+            results[metric][indices] = group_results[metric]
+    return results
@@ -0,0 +1,359 @@
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from entrainment_metrics.continuous.continuous_time_series import TimeSeries
+from entrainment_metrics.precision import get_dtype
+
+
+def grid_size(
+    start: float,
+    end: float,
+    granularity: float,
+) -> int:
+    """
+    Return the amount of points of np.arange(start, end + granularity, granularity).
+    """
+    return max(int(np.ceil((end + granularity - start) / granularity)), 0)
+
+
+def grid_points(
+    start: float,
+    granularity: float,
+    first: int,
+    last: int,
+) -> np.ndarray:
+    """
+    Return the points first to last (excluded) of
+    np.arange(start, end + granularity, granularity), computed as numpy
+    does so that they are the same.
+    """
+    step = (start + granularity) - start
+    return start + np.arange(first, last) * step
+
+
+def grid_chunks(
+    size: int,
+    chunk_size: int,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Yield the first and last (excluded) index of each chunk of the grid.
+    """
+    for first in range(0, size, chunk_size):
+        yield first, min(first + chunk_size, size)
+
+
+class GridPredictions:
+    """
+    The predictions of a TimeSeries over the grid from start to end with
+    the given granularity (as predict_interval), keeping in memory only
+    the ones between the indices requested to keep.
+    """
+
+    def __init__(
+        self,
+        time_series: TimeSeries,
+        start: float,
+        end: float,
+        granularity: float,
+        chunk_size: int,
+    ) -> None:
+        self.time_series = time_series
+        self.start = start
+        self.end = end
+        self.granularity = granularity
+        self.chunk_size = chunk_size
+        self.size = grid_size(start, end, granularity)
+
+        # Predictions of the points first to last (excluded) of the grid
+        self.first = 0
+        self.last = 0
+        self.values = np.empty(0, dtype=get_dtype())
+
+    def advance(
+        self,
+        first: int,
+        last: int,
+    ) -> None:
+        """
+        Keep the predictions from first to last (excluded), predicting
+        at most chunk_size points at once.
+        """
+        last = min(last, self.size)
+        new_values = [self.values[max(first - self.first, 0) :]]
+        for chunk_first, chunk_last in grid_chunks(last - self.last, self.chunk_size):
+            points = grid_points(
+                self.start,
+                self.granularity,
+                self.last + chunk_first,
+                self.last + chunk_last,
+            )
+            # Last value to predict could be greater than the end
+            new_values.append(self.time_series.predict(np.minimum(points, self.end)))
+        self.values = np.concatenate(new_values)
+        self.first = max(first, self.first)
+        self.last = max(last, self.last)
+
+    def __getitem__(self, indices: slice) -> np.ndarray:
+        return self.values[indices.start - self.first : indices.stop - self.first]
+
+
+def calculate_chunked_proximity(
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    start: float,
+    end: float,
+    granularity: float,
+    chunk_size: int,
+) -> float:
+    predictions_a = GridPredictions(time_series_a, start, end, granularity, chunk_size)
+    predictions_b = GridPredictions(time_series_b, start, end, granularity, chunk_size)
+
+    sum_a = 0.0
+    sum_b = 0.0
+    for first, last in grid_chunks(predictions_a.size, chunk_size):
+        predictions_a.advance(first, last)
+        predictions_b.advance(first, last)
+        sum_a += np.sum(predictions_a[first:last])
+        sum_b += np.sum(predictions_b[first:last])
+
+    return -np.abs(sum_a / predictions_a.size - sum_b / predictions_b.size)
+
+
+def calculate_chunked_convergence(
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    start: float,
+    end: float,
+    granularity: float,
+    chunk_size: int,
+) -> float:
+    predictions_a = GridPredictions(time_series_a, start, end, granularity, chunk_size)
+    predictions_b = GridPredictions(time_series_b, start, end, granularity, chunk_size)
+    size = predictions_a.size
+
+    # Pearson correlation is invariant to shifts, values are shifted near
+    # their mean (the one of the first chunk for d_t) to keep precision
+    # when the sums of squares and products are accumulated
+    d_t_shift: Optional[float] = None
+    time_shift = (start + end) / 2
+    sum_d_t = sum_square_d_t = sum_time = sum_square_time = sum_products = 0.0
+    for first, last in grid_chunks(size, chunk_size):
+        predictions_a.advance(first, last)
+        predictions_b.advance(first, last)
+        d_t = np.abs(predictions_a[first:last] - predictions_b[first:last]) * -1
+        if d_t_shift is None:
+            d_t_shift = float(np.mean(d_t))
+        d_t = d_t - d_t_shift
+        times = grid_points(start, granularity, first, last) - time_shift
+
+        sum_d_t += np.sum(d_t)
+        sum_square_d_t += np.sum(np.square(d_t))
+        sum_time += np.sum(times)
+        sum_square_time += np.sum(np.square(times))
+        sum_products += np.dot(d_t, times)
+
+    covariance = np.float64(sum_products - sum_d_t * sum_time / size)
+    d_t_deviation = np.sqrt(sum_square_d_t - sum_d_t**2 / size)
+    time_deviation = np.sqrt(sum_square_time - sum_time**2 / size)
+
+    return np.clip(covariance / d_t_deviation / time_deviation, -1.0, 1.0)  # type: ignore
+
+
+def trapz_weights(
+    start: float,
+    granularity: float,
+    size: int,
+    first: int,
+    last: int,
+) -> np.ndarray:
+    """
+    Return the weights of the values first to last (excluded) in the
+    trapezoidal rule over np.arange(start, ..., granularity) of the given size.
+    """
+    step = (start + granularity) - start
+    indices = np.arange(first, last)
+    previous = start + np.maximum(indices - 1, 0) * step
+    following = start + np.minimum(indices + 1, size - 1) * step
+    return (following - previous) / 2
+
+
+def weighted_sum(
+    values: np.ndarray,
+    weights: Optional[np.ndarray],
+) -> float:
+    return np.sum(values) if weights is None else np.dot(weights, values)
+
+
+class LagSums:
+    """
+    The sums needed to correlate the values of a (shifted by a_shift)
+    with the ones of b (shifted by b_shift) for one synchrony delta,
+    accumulated over chunks.
+
+    The pairs correlated are a[k + a_offset] and b[k + b_offset] for k
+    from 0 to size. Montecarlo integration weights every pair by one, and
+    trapz integration weights them by the trapezoidal rule over the points
+    in time a_start (b_start) + k * granularity.
+    """
+
+    def __init__(
+        self,
+        synchrony_delta: float,
+        start: float,
+        granularity: float,
+        amount_of_points: int,
+        integration_method: str,
+    ) -> None:
+        values_to_crop = int(abs(synchrony_delta) / granularity)
+        self.size = amount_of_points - values_to_crop
+        self.a_offset = values_to_crop if synchrony_delta > 0 else 0
+        self.b_offset = values_to_crop if synchrony_delta < 0 else 0
+        self.granularity = granularity
+        self.integration_method = integration_method
+        # Points in time the trapezoidal rule integrates over
+        self.a_start = start + synchrony_delta if synchrony_delta >= 0 else start
+        self.b_start = start if synchrony_delta >= 0 else start + abs(synchrony_delta)
+
+        self.sum_products = 0.0
+        self.sum_a = self.sum_square_a = self.weights_a = 0.0
+        self.sum_b = self.sum_square_b = self.weights_b = 0.0
+        # Sum of the values of a weighted as the ones of b, for the numerator
+        self.sum_a_b_weights = 0.0
+
+    def pair_indices(
+        self,
+        first: int,
+        last: int,
+    ) -> Tuple[int, int]:
+        """
+        Return the first and last (excluded) k whose value of a is between
+        the grid indices first and last (excluded).
+        """
+        return max(first - self.a_offset, 0), max(
+            min(last - self.a_offset, self.size), 0
+        )
+
+    def add(
+        self,
+        predictions_a: GridPredictions,
+        predictions_b: GridPredictions,
+        a_shift: float,
+        b_shift: float,
+        first: int,
+        last: int,
+    ) -> None:
+        """
+        Add the pairs whose value of a is between the grid indices first
+        and last (excluded).
+        """
+        pairs_first, pairs_last = self.pair_indices(first, last)
+        if pairs_first >= pairs_last:
+            return
+
+        values_a = (
+            predictions_a[pairs_first + self.a_offset : pairs_last + self.a_offset]
+            - a_shift
+        )
+        values_b = (
+            predictions_b[pairs_first + self.b_offset : pairs_last + self.b_offset]
+            - b_shift
+        )
+
+        weights_a: Optional[np.ndarray]
+        weights_b: Optional[np.ndarray]
+        if self.integration_method == "trapz":
+            weights_a = trapz_weights(
+                self.a_start, self.granularity, self.size, pairs_first, pairs_last
+            )
+            weights_b = trapz_weights(
+                self.b_start, self.granularity, self.size, pairs_first, pairs_last
+            )
+        else:
+            weights_a = weights_b = None
+
+        self.sum_products += weighted_sum(values_a * values_b, weights_b)
+        self.sum_a += weighted_sum(values_a, weights_a)
+        self.sum_square_a += weighted_sum(np.square(values_a), weights_a)
+        self.sum_a_b_weights += weighted_sum(values_a, weights_b)
+        self.sum_b += weighted_sum(values_b, weights_b)
+        self.sum_square_b += weighted_sum(np.square(values_b), weights_b)
+        if weights_a is None or weights_b is None:
+            self.weights_a += pairs_last - pairs_first
+            self.weights_b += pairs_last - pairs_first
+        else:
+            self.weights_a += np.sum(weights_a)
+            self.weights_b += np.sum(weights_b)
+
+    def correlation(
+        self,
+        mean_a: float,
+        mean_b: float,
+    ) -> float:
+        """
+        Return the correlation given the means of every (shifted) value of
+        a and b.
+        """
+        numerator = (
+            self.sum_products
+            - mean_a * self.sum_b
+            - mean_b * self.sum_a_b_weights
+            + mean_a * mean_b * self.weights_b
+        )
+        integral_a = (
+            self.sum_square_a - 2 * mean_a * self.sum_a + mean_a**2 * self.weights_a
+        )
+        integral_b = (
+            self.sum_square_b - 2 * mean_b * self.sum_b + mean_b**2 * self.weights_b
+        )
+        return np.divide(np.float64(numerator), np.sqrt(integral_a * integral_b))
+
+
+def calculate_chunked_synchrony_profile(
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: List[float],
+    integration_method: str,
+    chunk_size: int,
+) -> np.ndarray:
+    predictions_a = GridPredictions(time_series_a, start, end, granularity, chunk_size)
+    predictions_b = GridPredictions(time_series_b, start, end, granularity, chunk_size)
+    size = predictions_a.size
+
+    lags_sums: List[LagSums] = []
+    for synchrony_delta in synchrony_deltas:
+        # Validate synchrony_delta
+        if abs(synchrony_delta) > end - start:
+            raise ValueError(f"Synchrony delta bigger than interval {start} to {end}")
+        lags_sums.append(
+            LagSums(synchrony_delta, start, granularity, size, integration_method)
+        )
+
+    # Values of b paired with the ones of a in a chunk are at most
+    # max_offset points before or after them
+    max_offset = max([max(lag.a_offset, lag.b_offset) for lag in lags_sums] + [0])
+
+    # The correlation is invariant to shifts, values are shifted near their
+    # mean (the one of the first chunk) to keep precision when the sums of
+    # squares and products are accumulated
+    a_shift: Optional[float] = None
+    b_shift: Optional[float] = None
+    sum_a = sum_b = 0.0
+    for first, last in grid_chunks(size, chunk_size):
+        predictions_a.advance(max(first - max_offset, 0), last + max_offset)
+        predictions_b.advance(max(first - max_offset, 0), last + max_offset)
+        if a_shift is None or b_shift is None:
+            a_shift = float(np.mean(predictions_a[first:last]))
+            b_shift = float(np.mean(predictions_b[first:last]))
+
+        sum_a += np.sum(predictions_a[first:last] - a_shift)
+        sum_b += np.sum(predictions_b[first:last] - b_shift)
+        for lag_sums in lags_sums:
+            lag_sums.add(predictions_a, predictions_b, a_shift, b_shift, first, last)
+
+    return np.array(
+        [lag_sums.correlation(sum_a / size, sum_b / size) for lag_sums in lags_sums]
+    )
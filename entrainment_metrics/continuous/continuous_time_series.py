@@ -1,13 +1,15 @@
 import warnings
 from copy import deepcopy
 from math import isnan
-from typing import List, Optional
+from typing import Any, List, Optional, Union
 
-import matplotlib.pyplot as plt
 import numpy as np
-from sklearn.neighbors import KNeighborsRegressor
 
-from entrainment_metrics import InterPausalUnit
+from entrainment_metrics import InterPausalUnit, InterPausalUnitTable
+from entrainment_metrics.continuous.backends import create_regression_backend
+from entrainment_metrics.instrumentation import stage
+from entrainment_metrics.precision import get_dtype
+from entrainment_metrics.shared import SharedInterPausalUnitTable
 
 
 class TimeSeries:
@@ -20,14 +22,18 @@ class TimeSeries:
     feature: str
         The feature to get the value from each InterPausalUnit
 
-    interpausal_units: List[InterPausalUnit]
-        An ordered list of InterPausalUnit's
+    interpausal_units: Union[List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable]
+        An ordered list of InterPausalUnit's, or a table with them (e.g.
+        one shared with worker processes, see share_table)
 
     method: str
-        The method to be used to predict
+        The method to be used to predict: "knn" (KNeighborsRegressor),
+        "linear", "moving_average", "kernel", "spline" or any other
+        registered with register_regression_backend. kwargs are passed
+        to the model of the method.
 
     k: Optional[int]
-        The amount of neighbors to use in KNeighborsRegressor
+        The amount of neighbors to use in KNeighborsRegressor, only for "knn"
 
     MAX_DEVIATIONS: Optional[int]
         The amount of deviation to define an outlier
@@ -37,47 +43,90 @@ class TimeSeries:
     def __init__(
         self,
         feature: str,
-        interpausal_units: List[InterPausalUnit],
+        interpausal_units: Union[
+            List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable
+        ],
         method: str,
         k: Optional[int] = None,
         MAX_DEVIATIONS: Optional[int] = None,
         **kwargs,
     ) -> None:
-        #: The InterPausalUnits of the TimeSeries.
-        self.ipus: List[InterPausalUnit] = self._clean_ipus(interpausal_units, feature)
+        if isinstance(
+            interpausal_units, (InterPausalUnitTable, SharedInterPausalUnitTable)
+        ):
+            interpausal_units = interpausal_units.interpausal_units([feature])
+
+        with stage("TimeSeries.fit", ipus=len(interpausal_units)):
+            #: The InterPausalUnits of the TimeSeries.
+            self.ipus: List[InterPausalUnit] = self._clean_ipus(
+                interpausal_units, feature
+            )
 
-        #: The feature to get the value from each InterPausalUnit.
-        self.feature: str = feature
+            #: The feature to get the value from each InterPausalUnit.
+            self.feature: str = feature
 
-        #: The feature values of each ipu.
-        self.ipus_feature_values: np.ndarray = (
-            self._get_interpausal_units_feature_values()
-        )
+            #: The feature values of each ipu.
+            self.ipus_feature_values: np.ndarray = (
+                self._get_interpausal_units_feature_values()
+            )
 
-        self.outliers = None
+            #: The amount of InterPausalUnits discarded as outliers.
+            self.outliers: int = 0
 
-        # Removes IPUs with an outlier feature value and their values in ipus_feature_values
-        self._prepare_data(MAX_DEVIATIONS)
+            # Removes IPUs with an outlier feature value and their values in ipus_feature_values
+            self._prepare_data(MAX_DEVIATIONS)
 
-        if method == "knn":
-            if k is None:
-                k = 7
+            kwargs = dict(kwargs)
+            if method == "knn":
+                if k is None:
+                    k = 7
 
-            if len(interpausal_units) < k:
-                raise ValueError(
-                    "k cannot be bigger than the amount of interpausal units, default k is 7"
-                )
+                if len(interpausal_units) < k:
+                    raise ValueError(
+                        "k cannot be bigger than the amount of interpausal units, default k is 7"
+                    )
 
-            self.model = KNeighborsRegressor(n_neighbors=k, **kwargs)
+                kwargs["n_neighbors"] = k
+
+            #: The method used to predict, a key of REGRESSION_BACKENDS.
+            self.method: str = method
+
+            # Raises ValueError if there is no backend for the method
+            self.model = create_regression_backend(method, **kwargs)
 
             # Define X without outliers IPUs
             X = self._get_middle_points_in_time()
             X = X.reshape(-1, 1)
 
             self.model.fit(X, self.ipus_feature_values)
-        else:
-            # Here is some space to build your own model!
-            raise ValueError("Model to be implemented")
+
+    @classmethod
+    def _from_clean_ipus(
+        cls,
+        feature: str,
+        interpausal_units: List[InterPausalUnit],
+        ipus_feature_values: np.ndarray,
+        outliers: int,
+        method: str,
+        model: Any,
+    ) -> "TimeSeries":
+        """
+        Returns a TimeSeries of InterPausalUnits already cleaned (sorted,
+        with a value for the feature and without outliers), fitting the
+        model given to them without cleaning them again.
+        """
+        time_series = cls.__new__(cls)
+        time_series.ipus = interpausal_units
+        time_series.feature = feature
+        time_series.ipus_feature_values = ipus_feature_values
+        time_series.outliers = outliers
+        time_series.method = method
+        time_series.model = model
+        time_series.model.fit(
+            time_series._get_middle_points_in_time().reshape(-1, 1),
+            ipus_feature_values,
+        )
+        return time_series
 
     def __repr__(self):
         return f"TimeSeries(start={self.start()}, end={self.end()}, feature={self.feature}, interpausal_units={self.ipus})"
@@ -186,7 +235,8 @@ class TimeSeries:
         Returns
         -------
         np.ndarray
-            The predicted value/s for the point/s in time given.
+            The predicted value/s for the point/s in time given, with the
+            dtype of the precision policy (see set_dtype).
         """
         # Convert float to expected predict type
         if isinstance(X, float):
@@ -202,20 +252,23 @@ class TimeSeries:
                 """
             )
 
-        for x in X:
-            if x > self.end():
-                warnings.warn(
-                    f"""Out of bounds {x}: A value in X is greater than TimeSeries end.
+        with stage("TimeSeries.predict"):
+            # Only the points out of bounds warn, no need to check each one
+            out_of_bounds = (X[:, 0] > self.end()) | (X[:, 0] < self.start())
+            for x in X[out_of_bounds]:
+                if x > self.end():
+                    warnings.warn(
+                        f"""Out of bounds {x}: A value in X is greater than TimeSeries end.
                     Remember the end of a TimeSeries is the middle point of the last non-outlier IPU.
                 """
-                )
-            if x < self.start():
-                warnings.warn(
-                    f"""Out of bounds {x}: A value in X is smaller than TimeSeries start.
+                    )
+                if x < self.start():
+                    warnings.warn(
+                        f"""Out of bounds {x}: A value in X is smaller than TimeSeries start.
                     Remember the start of a TimeSeries is the middle point of the first non-outlier IPU.
                 """
-                )
-        return self.model.predict(X)
+                    )
+            return self.model.predict(X).astype(get_dtype(), copy=False)
 
     def predict_interval(
         self,
@@ -268,12 +321,17 @@ class TimeSeries:
         plot_ipus: Optional[bool] = None,
         show: Optional[bool] = None,
         save_fname: Optional[str] = None,
+        cache: Optional[bool] = None,
         **kwargs,
     ):
         """
         Plot the predictions between the given
         start and end, and with the given granularity.
 
+        With cache, the predictions are kept, so plotting again the same
+        interval does not predict again. To save many plots to files without
+        pyplot, check continuous.plotting.save_time_series_plots.
+
         Parameters
         ----------
         start: Optional[float]
@@ -288,49 +346,19 @@ class TimeSeries:
             Whether to show the plot. Default is True.
         save_fname: Optional[str]
             The fname to pass to plt.savefig(). If provided the plot will be saved.
+        cache: Optional[bool]
+            Whether to keep the predictions, see continuous.plotting.predict_curve. Default is False.
         """
-        if start is None:
-            start = self.start()
+        import matplotlib.pyplot as plt
 
-        if end is None:
-            end = self.end()
-
-        if granularity is None:
-            granularity = 0.01
-
-        if plot_ipus is None:
-            plot_ipus = True
+        from .plotting import draw_time_series
 
         if show is None:
             show = True
 
-        xs = np.arange(start, end + granularity, granularity)
-        values_to_predict_in_s = deepcopy(xs)
-        # Last value to predict could be greater than the end
-        if values_to_predict_in_s[-1] > self.end():
-            values_to_predict_in_s[-1] = self.end()
-
-        ys = self.predict(values_to_predict_in_s)
-        plt.plot(xs, ys, **kwargs)
-
-        if plot_ipus:
-            ipus_values = [
-                ipu.feature_value(self.feature)
-                for ipu in self.ipus
-                if ipu.start >= start and ipu.end <= end
-            ]
-            ipus_starts = [
-                ipu.start for ipu in self.ipus if ipu.start >= start and ipu.end <= end
-            ]
-            ipus_ends = [
-                ipu.end for ipu in self.ipus if ipu.start >= start and ipu.end <= end
-            ]
-            plt.hlines(
-                y=ipus_values, xmin=ipus_starts, xmax=ipus_ends, linewidth=4.4, **kwargs
-            )
-
-        plt.xlabel("Time (seconds)")
-        plt.ylabel(self.feature)
+        draw_time_series(
+            plt.gca(), self, start, end, granularity, plot_ipus, cache, **kwargs
+        )
 
         if save_fname is not None:
             plt.savefig(save_fname)
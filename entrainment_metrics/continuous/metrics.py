@@ -1,9 +1,14 @@
-from copy import deepcopy
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 
-from entrainment_metrics.continuous import TimeSeries
+from entrainment_metrics.continuous.chunked_metrics import (
+    calculate_chunked_convergence, calculate_chunked_proximity,
+    calculate_chunked_synchrony_profile)
+from entrainment_metrics.continuous.continuous_time_series import TimeSeries
+from entrainment_metrics.instrumentation import stage
+
+DEFAULT_SYNCHRONY_DELTAS: List[float] = [-15.0, -10.0, -5.0, 0.0, 5.0, 10.0, 15.0]
 
 
 def calculate_common_support(
@@ -77,10 +82,25 @@ def calculate_proximity(
     time_series_values_a = time_series_a.predict_interval(start, end, granularity)
     time_series_values_b = time_series_b.predict_interval(start, end, granularity)
 
-    mean_a = np.mean(time_series_values_a)
-    mean_b = np.mean(time_series_values_b)
+    return calculate_proximity_from_values(time_series_values_a, time_series_values_b)
+
+
+def calculate_proximity_from_values(
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+) -> float:
+    """
+    Calculate the proximity from the values of two times series
+    predicted over the same points in time.
+
+    The values can also be stacked in arrays with many rows (one for
+    each pair of time series), in which case the metric is calculated
+    along the last axis, returning one value per row.
+    """
+    mean_a = np.mean(time_series_values_a, axis=-1)
+    mean_b = np.mean(time_series_values_b, axis=-1)
 
-    return -abs(mean_a - mean_b)  # type: ignore
+    return -np.abs(mean_a - mean_b)  # type: ignore
 
 
 def calculate_convergence(
@@ -118,8 +138,73 @@ def calculate_convergence(
     time_series_values_a = time_series_a.predict_interval(start, end, granularity)
     time_series_values_b = time_series_b.predict_interval(start, end, granularity)
 
+    return calculate_convergence_from_values(
+        time_series_values_a, time_series_values_b, values_to_predict_in_s
+    )
+
+
+def calculate_convergence_from_values(
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    values_to_predict_in_s: np.ndarray,
+) -> float:
+    """
+    Calculate the convergence from the values of two times series
+    predicted over the points in time values_to_predict_in_s.
+
+    The values can also be stacked in arrays with many rows (one for
+    each pair of time series), in which case the metric is calculated
+    along the last axis, returning one value per row.
+    """
     d_t = np.abs(time_series_values_a - time_series_values_b) * -1
-    return np.corrcoef(d_t, values_to_predict_in_s)[0, 1]
+
+    # Pearson correlation between d_t and the points in time
+    d_t_distances_to_mean = d_t - np.mean(d_t, axis=-1, keepdims=True)
+    # Centered, points in time keep their precision in the dtype of the values
+    time_distances_to_mean = (
+        values_to_predict_in_s - np.mean(values_to_predict_in_s)
+    ).astype(d_t.dtype, copy=False)
+
+    covariance = np.sum(
+        np.multiply(d_t_distances_to_mean, time_distances_to_mean), axis=-1
+    )
+    d_t_deviation = np.sqrt(np.sum(np.square(d_t_distances_to_mean), axis=-1))
+    time_deviation = np.sqrt(np.sum(np.square(time_distances_to_mean)))
+
+    return np.clip(covariance / d_t_deviation / time_deviation, -1.0, 1.0)  # type: ignore
+
+
+def select_synchrony_index(correlations: np.ndarray) -> Optional[int]:
+    """
+    Return the index of the correlation with the greatest absolute value.
+
+    Ties keep the first index and NaN values are never selected. If no
+    correlation has an absolute value greater than zero, None is returned.
+    """
+    # Initialized at min absolute value
+    res: float = 0.0
+    index: Optional[int] = None
+    for i, correlation in enumerate(correlations):
+        if np.abs(correlation) > np.abs(res):
+            res = correlation
+            index = i
+    return index
+
+
+def select_synchrony_value(correlations: np.ndarray) -> Union[float, np.ndarray]:
+    """
+    Return the correlation with the greatest absolute value, or 0.0 if none
+    is greater than zero in absolute value.
+
+    If many profiles are stacked in rows, one value per row is returned.
+    """
+    absolute_correlations = np.abs(np.nan_to_num(correlations, nan=0.0))
+    index = np.argmax(absolute_correlations, axis=-1)[..., np.newaxis]
+    selected = np.take_along_axis(correlations, index, axis=-1)[..., 0]
+    selected_absolute = np.take_along_axis(absolute_correlations, index, axis=-1)[
+        ..., 0
+    ]
+    return np.where(selected_absolute > 0, selected, 0.0)[()]
 
 
 def calculate_numerator_montecarlo(
@@ -132,7 +217,7 @@ def calculate_numerator_montecarlo(
         time_series_values_a_crop - mean_a, time_series_values_b_crop - mean_b
     )
     # Monte Carlo integration, the lenght of the interval is simplified with the denominator
-    numerator = np.mean(numerator_not_integrated)
+    numerator = np.mean(numerator_not_integrated, axis=-1)
     return numerator  # type: ignore
 
 
@@ -146,49 +231,74 @@ def calculate_denominator_montecarlo(
     square_distance_to_mean_b = np.square(time_series_values_b_crop - mean_b)
 
     # Monte Carlo integration, the lenght of the interval is simplified with the numerator
-    integral_a = np.mean(square_distance_to_mean_a)
-    integral_b = np.mean(square_distance_to_mean_b)
+    integral_a = np.mean(square_distance_to_mean_a, axis=-1)
+    integral_b = np.mean(square_distance_to_mean_b, axis=-1)
 
     denominator = np.sqrt(np.multiply(integral_a, integral_b))
 
     return denominator
 
 
-def calculate_synchrony_montecarlo(
+def calculate_synchrony_profile_montecarlo(
     time_series_a: TimeSeries,
     time_series_b: TimeSeries,
     start: float,
     end: float,
     granularity: float,
     synchrony_deltas: List[float],
-) -> float:
-    # Initialized at min absolute value
-    res: float = 0.0
-
-    # Precalculate values and means
+) -> np.ndarray:
+    # Precalculate values
     time_series_values_a = time_series_a.predict_interval(start, end, granularity)
     time_series_values_b = time_series_b.predict_interval(start, end, granularity)
 
-    mean_a = np.mean(time_series_values_a)
-    mean_b = np.mean(time_series_values_b)
+    return calculate_synchrony_profile_montecarlo_from_values(
+        time_series_values_a,
+        time_series_values_b,
+        start,
+        end,
+        granularity,
+        synchrony_deltas,
+    )
+
+
+def calculate_synchrony_profile_montecarlo_from_values(
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: List[float],
+) -> np.ndarray:
+    """
+    Calculate the correlation for each synchrony delta from the values of two
+    times series predicted between start and end with the given granularity.
+
+    The values can also be stacked in arrays with many rows (one for each pair
+    of time series), in which case a profile is returned for each row.
+    """
+    correlations: List[np.ndarray] = []
+
+    # Precalculate means
+    mean_a = np.mean(time_series_values_a, axis=-1, keepdims=True)
+    mean_b = np.mean(time_series_values_b, axis=-1, keepdims=True)
 
     for synchrony_delta in synchrony_deltas:
         # Validate synchrony_delta
         if abs(synchrony_delta) > end - start:
             raise ValueError(f"Synchrony delta bigger than interval {start} to {end}")
 
-        time_series_values_a_crop = deepcopy(time_series_values_a)
-        time_series_values_b_crop = deepcopy(time_series_values_b)
+        time_series_values_a_crop = time_series_values_a
+        time_series_values_b_crop = time_series_values_b
 
         if synchrony_delta > 0:
             values_to_crop = int(synchrony_delta / granularity)
-            time_series_values_a_crop = time_series_values_a_crop[values_to_crop:]
-            time_series_values_b_crop = time_series_values_b_crop[:-values_to_crop]
+            time_series_values_a_crop = time_series_values_a_crop[..., values_to_crop:]
+            time_series_values_b_crop = time_series_values_b_crop[..., :-values_to_crop]
 
         elif synchrony_delta < 0:
             values_to_crop = int(-synchrony_delta / granularity)
-            time_series_values_a_crop = time_series_values_a_crop[:-values_to_crop]
-            time_series_values_b_crop = time_series_values_b_crop[values_to_crop:]
+            time_series_values_a_crop = time_series_values_a_crop[..., :-values_to_crop]
+            time_series_values_b_crop = time_series_values_b_crop[..., values_to_crop:]
 
         numerator = calculate_numerator_montecarlo(
             time_series_values_a_crop, time_series_values_b_crop, mean_a, mean_b  # type: ignore
@@ -198,12 +308,23 @@ def calculate_synchrony_montecarlo(
             time_series_values_a_crop, time_series_values_b_crop, mean_a, mean_b  # type: ignore
         )
 
-        actual_res: float = np.divide(numerator, denominator)
+        correlations.append(np.divide(numerator, denominator))
 
-        if np.abs(actual_res) > np.abs(res):
-            res = actual_res
+    return np.stack(correlations, axis=-1)
 
-    return res
+
+def calculate_synchrony_montecarlo(
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: List[float],
+) -> float:
+    correlations = calculate_synchrony_profile_montecarlo(
+        time_series_a, time_series_b, start, end, granularity, synchrony_deltas
+    )
+    return float(select_synchrony_value(correlations))
 
 
 def calculate_numerator_trapz(
@@ -256,31 +377,56 @@ def calculate_denominator_trapz(
     return denominator
 
 
-def calculate_synchrony_trapz(
+def calculate_synchrony_profile_trapz(
     time_series_a: TimeSeries,
     time_series_b: TimeSeries,
     start: float,
     end: float,
     granularity: float,
     synchrony_deltas: List[float],
-) -> float:
-    # Initialized at min absolute value
-    res: float = 0.0
-
-    # Precalculate global means
+) -> np.ndarray:
+    # Precalculate values
     time_series_values_a = time_series_a.predict_interval(start, end, granularity)
     time_series_values_b = time_series_b.predict_interval(start, end, granularity)
 
-    mean_a = np.mean(time_series_values_a)
-    mean_b = np.mean(time_series_values_b)
+    return calculate_synchrony_profile_trapz_from_values(
+        time_series_values_a,
+        time_series_values_b,
+        start,
+        end,
+        granularity,
+        synchrony_deltas,
+    )
+
+
+def calculate_synchrony_profile_trapz_from_values(
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: List[float],
+) -> np.ndarray:
+    """
+    Calculate the correlation for each synchrony delta from the values of two
+    times series predicted between start and end with the given granularity.
+
+    The values can also be stacked in arrays with many rows (one for each pair
+    of time series), in which case a profile is returned for each row.
+    """
+    correlations: List[np.ndarray] = []
+
+    # Precalculate global means
+    mean_a = np.mean(time_series_values_a, axis=-1, keepdims=True)
+    mean_b = np.mean(time_series_values_b, axis=-1, keepdims=True)
 
     for synchrony_delta in synchrony_deltas:
         # Validate synchrony_delta
         if abs(synchrony_delta) > end - start:
             raise ValueError(f"Synchrony delta bigger than interval {start} to {end}")
 
-        time_series_values_a_crop = deepcopy(time_series_values_a)
-        time_series_values_b_crop = deepcopy(time_series_values_b)
+        time_series_values_a_crop = time_series_values_a
+        time_series_values_b_crop = time_series_values_b
 
         values_to_predict_a_in_s = None
         values_to_predict_b_in_s = None
@@ -294,14 +440,18 @@ def calculate_synchrony_trapz(
             )
             if synchrony_delta > 0:
                 values_to_crop = int(synchrony_delta / granularity)
-                time_series_values_a_crop = time_series_values_a_crop[values_to_crop:]
-                time_series_values_b_crop = time_series_values_b_crop[:-values_to_crop]
+                time_series_values_a_crop = time_series_values_a_crop[
+                    ..., values_to_crop:
+                ]
+                time_series_values_b_crop = time_series_values_b_crop[
+                    ..., :-values_to_crop
+                ]
 
         elif synchrony_delta < 0:
             # Crop the other way with abs(synchrony_delta)
             values_to_crop = int(abs(synchrony_delta) / granularity)
-            time_series_values_a_crop = time_series_values_a_crop[:-values_to_crop]
-            time_series_values_b_crop = time_series_values_b_crop[values_to_crop:]
+            time_series_values_a_crop = time_series_values_a_crop[..., :-values_to_crop]
+            time_series_values_b_crop = time_series_values_b_crop[..., values_to_crop:]
             values_to_predict_a_in_s = np.arange(
                 start, end + granularity - abs(synchrony_delta), granularity
             )
@@ -317,11 +467,23 @@ def calculate_synchrony_trapz(
             time_series_values_a_crop, time_series_values_b_crop, values_to_predict_a_in_s, values_to_predict_b_in_s, mean_a, mean_b  # type: ignore
         )
 
-        actual_res: float = np.divide(numerator, denominator)
+        correlations.append(np.divide(numerator, denominator))
 
-        if np.abs(actual_res) > np.abs(res):
-            res = actual_res
-    return res
+    return np.stack(correlations, axis=-1)
+
+
+def calculate_synchrony_trapz(
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: List[float],
+) -> float:
+    correlations = calculate_synchrony_profile_trapz(
+        time_series_a, time_series_b, start, end, granularity, synchrony_deltas
+    )
+    return float(select_synchrony_value(correlations))
 
 
 def calculate_synchrony(
@@ -332,6 +494,7 @@ def calculate_synchrony(
     granularity: float,
     synchrony_deltas: Optional[List[float]] = None,
     integration_method: Optional[str] = None,
+    chunk_size: Optional[int] = None,
 ) -> float:
     """
     Calculate the synchrony value between two times series
@@ -352,6 +515,8 @@ def calculate_synchrony(
         The step in time in which to predict from the time series.
     integration_method: Optional[str] = None
         The integration method to use. Methods available: "montecarlo" and "trapz"
+    chunk_size: Optional[int]
+        The amount of points in time to predict at once. Default is the whole interval.
 
     Returns
     -------
@@ -359,9 +524,25 @@ def calculate_synchrony(
         The metric value.
     """
     if synchrony_deltas is None:
-        synchrony_deltas = [-15.0, -10.0, -5.0, 0.0, 5.0, 10.0, 15.0]
-
-    if integration_method is None or integration_method == "montecarlo":
+        synchrony_deltas = DEFAULT_SYNCHRONY_DELTAS
+
+    if chunk_size is not None:
+        if integration_method is None:
+            integration_method = "montecarlo"
+        if integration_method not in ["montecarlo", "trapz"]:
+            raise ValueError("Not a valid integration_method given")
+        correlations = calculate_chunked_synchrony_profile(
+            time_series_a,
+            time_series_b,
+            start,
+            end,
+            granularity,
+            synchrony_deltas,
+            integration_method,
+            chunk_size,
+        )
+        res = float(select_synchrony_value(correlations))
+    elif integration_method is None or integration_method == "montecarlo":
         res = calculate_synchrony_montecarlo(
             time_series_a, time_series_b, start, end, granularity, synchrony_deltas
         )
@@ -375,6 +556,182 @@ def calculate_synchrony(
     return res
 
 
+def calculate_synchrony_profile(
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    granularity: Optional[float] = None,
+    synchrony_deltas: Optional[List[float]] = None,
+    integration_method: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+) -> Tuple[np.ndarray, float]:
+    """
+    Calculate the correlation between two times series for every synchrony delta
+
+    Unlike calculate_metric("synchrony", ...), which only keeps the correlation
+    with the greatest absolute value, the whole lag profile is returned. Both
+    are computed in the same pass over the predicted values.
+
+    Parameters
+    ----------
+    time_series_a: TimeSeries
+        One of the two TimeSeries to calculate the profile from.
+    time_series_b: TimeSeries
+        The other TimeSeries to calculate the profile from.
+    start: Optional[float]
+        A starting point in time to calculate the profile. Default is the start of the common support.
+    end: Optional[float]
+       An ending point in time to calculate the profile. Default is the end of the common support.
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+    synchrony_deltas: Optional[List[float]]
+        The lags in seconds to correlate the TimeSeries with. Default is [-15.0, -10.0, -5.0, 0.0, 5.0, 10.0, 15.0]
+    integration_method: Optional[str] = None
+        The integration method to use. Methods available: "montecarlo" and "trapz"
+    chunk_size: Optional[int]
+        The amount of points in time to predict at once, bounding the memory
+        used to the chunk and the synchrony deltas. Default is the whole interval.
+
+    Returns
+    -------
+    Tuple[np.ndarray, float]
+        The correlation for each synchrony delta, and the synchrony delta
+        whose correlation has the greatest absolute value (NaN if every
+        correlation is zero or NaN).
+    """
+    if granularity is None:
+        granularity = 0.01
+
+    if start is None or end is None:
+        common_start, common_end = calculate_common_support(
+            time_series_a, time_series_b
+        )
+        if start is None:
+            start = common_start
+        if end is None:
+            end = common_end
+
+    if synchrony_deltas is None:
+        synchrony_deltas = DEFAULT_SYNCHRONY_DELTAS
+
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError("Not a valid chunk_size given")
+
+    if chunk_size is not None:
+        if integration_method is None:
+            integration_method = "montecarlo"
+        if integration_method not in ["montecarlo", "trapz"]:
+            raise ValueError("Not a valid integration_method given")
+        correlations = calculate_chunked_synchrony_profile(
+            time_series_a,
+            time_series_b,
+            start,
+            end,
+            granularity,
+            synchrony_deltas,
+            integration_method,
+            chunk_size,
+        )
+    elif integration_method is None or integration_method == "montecarlo":
+        correlations = calculate_synchrony_profile_montecarlo(
+            time_series_a, time_series_b, start, end, granularity, synchrony_deltas
+        )
+    elif integration_method == "trapz":
+        correlations = calculate_synchrony_profile_trapz(
+            time_series_a, time_series_b, start, end, granularity, synchrony_deltas
+        )
+    else:
+        raise ValueError("Not a valid integration_method given")
+
+    index = select_synchrony_index(correlations)
+    best_delta = np.nan if index is None else synchrony_deltas[index]
+
+    return correlations, best_delta
+
+
+def calculate_metric_from_values(
+    metric: str,
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: Optional[List[float]] = None,
+    integration_method: Optional[str] = None,
+) -> Union[float, np.ndarray]:
+    """
+    Calculate an entrainment metric from the values of two times series
+    predicted between start and end with the given granularity.
+
+    The values can also be stacked in arrays with many rows (one for
+    each pair of time series), in which case one value per row is returned.
+
+
+    Parameters
+    ----------
+    metric: str
+       The metric to be calculated ("synchrony", "proximity", or "convergence")
+    time_series_values_a: np.ndarray
+        The values predicted from one of the two TimeSeries.
+    time_series_values_b: np.ndarray
+        The values predicted from the other TimeSeries.
+    start: float
+        The starting point in time of the predicted values.
+    end: float
+       The ending point in time of the predicted values.
+    granularity: float
+        The step in time between the predicted values.
+    synchrony_deltas: Optional[List[float]]
+        The lags in seconds used to calculate synchrony.
+    integration_method: Optional[str] = None
+        The integration method to use for synchrony. Methods available: "montecarlo" and "trapz"
+    Returns
+    -------
+    Union[float, np.ndarray]
+        The metric value, or one per row for stacked values.
+    """
+    metric = metric.lower()
+    res: Union[float, np.ndarray]
+    if metric == "proximity":
+        res = calculate_proximity_from_values(
+            time_series_values_a, time_series_values_b
+        )
+    elif metric == "pearson" or metric == "convergence":
+        values_to_predict_in_s = np.arange(start, end + granularity, granularity)
+        res = calculate_convergence_from_values(
+            time_series_values_a, time_series_values_b, values_to_predict_in_s
+        )
+    elif metric == "synchrony":
+        if synchrony_deltas is None:
+            synchrony_deltas = DEFAULT_SYNCHRONY_DELTAS
+
+        if integration_method is None or integration_method == "montecarlo":
+            correlations = calculate_synchrony_profile_montecarlo_from_values(
+                time_series_values_a,
+                time_series_values_b,
+                start,
+                end,
+                granularity,
+                synchrony_deltas,
+            )
+        elif integration_method == "trapz":
+            correlations = calculate_synchrony_profile_trapz_from_values(
+                time_series_values_a,
+                time_series_values_b,
+                start,
+                end,
+                granularity,
+                synchrony_deltas,
+            )
+        else:
+            raise ValueError("Not a valid integration_method given")
+        res = select_synchrony_value(correlations)
+    else:
+        raise ValueError("Not a valid metric")
+    return res
+
+
 def calculate_metric(
     metric: str,
     time_series_a: TimeSeries,
@@ -384,12 +741,19 @@ def calculate_metric(
     granularity: Optional[float] = None,
     synchrony_deltas: Optional[List[float]] = None,
     integration_method: Optional[str] = None,
+    chunk_size: Optional[int] = None,
 ) -> float:
     """
     Calculate entrainment metrics given a times series from each speaker
 
     Metrics avaible: 'proximity', 'convergence' (AKA 'pearson') and 'synchrony'
 
+    By default both TimeSeries are predicted over the whole interval at
+    once. For very long sessions, chunk_size bounds the memory used: the
+    TimeSeries are predicted chunk_size points at a time and the metric is
+    accumulated from sums over each chunk (plus the points of the synchrony
+    deltas), giving the same value up to floating point rounding.
+
 
     Parameters
     ----------
@@ -405,6 +769,12 @@ def calculate_metric(
        An ending point in time to calculate the metric.
     granularity: Optional[float]
         The step in time in which to predict from the time series.
+    synchrony_deltas: Optional[List[float]]
+        The lags in seconds used to calculate synchrony.
+    integration_method: Optional[str] = None
+        The integration method to use for synchrony. Methods available: "montecarlo" and "trapz"
+    chunk_size: Optional[int]
+        The amount of points in time to predict at once. Default is the whole interval.
     Returns
     -------
     float
@@ -413,6 +783,9 @@ def calculate_metric(
     if granularity is None:
         granularity = 0.01
 
+    if chunk_size is not None and chunk_size <= 0:
+        raise ValueError("Not a valid chunk_size given")
+
     if start is None or end is None:
         common_start, common_end = calculate_common_support(
             time_series_a, time_series_b
@@ -425,21 +798,37 @@ def calculate_metric(
     res = None
     metric = metric.lower()
     if metric == "proximity":
-        res = calculate_proximity(time_series_a, time_series_b, start, end, granularity)
+        with stage("calculate_metric.proximity"):
+            if chunk_size is None:
+                res = calculate_proximity(
+                    time_series_a, time_series_b, start, end, granularity
+                )
+            else:
+                res = calculate_chunked_proximity(
+                    time_series_a, time_series_b, start, end, granularity, chunk_size
+                )
     elif metric == "pearson" or metric == "convergence":
-        res = calculate_convergence(
-            time_series_a, time_series_b, start, end, granularity
-        )
+        with stage("calculate_metric.convergence"):
+            if chunk_size is None:
+                res = calculate_convergence(
+                    time_series_a, time_series_b, start, end, granularity
+                )
+            else:
+                res = calculate_chunked_convergence(
+                    time_series_a, time_series_b, start, end, granularity, chunk_size
+                )
     elif metric == "synchrony":
-        res = calculate_synchrony(
-            time_series_a,
-            time_series_b,
-            start,
-            end,
-            granularity,
-            synchrony_deltas,
-            integration_method,
-        )
+        with stage("calculate_metric.synchrony"):
+            res = calculate_synchrony(
+                time_series_a,
+                time_series_b,
+                start,
+                end,
+                granularity,
+                synchrony_deltas,
+                integration_method,
+                chunk_size,
+            )
     else:
         raise ValueError("Not a valid metric")
     return res
@@ -0,0 +1,307 @@
+import warnings
+from copy import deepcopy
+from typing import List, Optional
+
+import numpy as np
+
+from entrainment_metrics import InterPausalUnit
+from entrainment_metrics.precision import get_dtype
+
+# Amount of points in time predicted at once, bounds the memory used by predict
+PREDICT_CHUNK_SIZE: int = 4096
+
+
+class MultiFeatureTimeSeries:
+    """The evolution of many acoustic-prosodic feature
+    values in time.
+
+    Equivalent to building one TimeSeries per feature, but the IPUs are
+    cleaned once, a single neighbor search is made for all the features
+    and predictions are returned as a (points in time x features) matrix.
+    Each feature keeps its own NaN and outlier masks, so the k neighbors
+    used for a feature are the k nearest IPUs with a valid value for it.
+
+
+    Parameters
+    ----------
+    features: List[str]
+        The features to get the value from each InterPausalUnit
+
+    interpausal_units: List[InterPausalUnit]
+        An ordered list of InterPausalUnit's
+
+    method: str
+        The method to be used to predict
+
+    k: Optional[int]
+        The amount of neighbors to use for each feature
+
+    MAX_DEVIATIONS: Optional[int]
+        The amount of deviation to define an outlier
+
+    """
+
+    def __init__(
+        self,
+        features: List[str],
+        interpausal_units: List[InterPausalUnit],
+        method: str,
+        k: Optional[int] = None,
+        MAX_DEVIATIONS: Optional[int] = None,
+    ) -> None:
+        if not features:
+            raise ValueError("At least one feature is needed")
+
+        #: The features to get the value from each InterPausalUnit.
+        self.features: List[str] = list(features)
+
+        #: The InterPausalUnits of the MultiFeatureTimeSeries, sorted by start.
+        self.ipus: List[InterPausalUnit] = self._sort_ipus(interpausal_units)
+
+        #: The feature values of each ipu, one column per feature. NaN if missing.
+        self.ipus_feature_values: np.ndarray = (
+            self._get_interpausal_units_feature_values()
+        )
+
+        #: Whether the value of each ipu is used for each feature.
+        self.mask: np.ndarray = self._prepare_data(MAX_DEVIATIONS)
+
+        if method == "knn":
+            from sklearn.neighbors import NearestNeighbors
+
+            if k is None:
+                k = 7
+
+            if len(interpausal_units) < k:
+                raise ValueError(
+                    "k cannot be bigger than the amount of interpausal units, default k is 7"
+                )
+
+            valid_ipus_per_feature = self.mask.sum(axis=0)
+            features_wo_enough_ipus = [
+                feature
+                for feature, amount in zip(self.features, valid_ipus_per_feature)
+                if amount < k
+            ]
+            if features_wo_enough_ipus:
+                raise ValueError(
+                    f"k cannot be bigger than the amount of valid interpausal units of {features_wo_enough_ipus}"
+                )
+
+            self.k: int = k
+
+            # The k nearest valid IPUs of a feature are always among the
+            # k + (amount of discarded IPUs of that feature) nearest IPUs
+            max_discarded = int(len(self.ipus) - valid_ipus_per_feature.min())
+            self.model = NearestNeighbors(
+                n_neighbors=min(len(self.ipus), k + max_discarded)
+            )
+            self.model.fit(self._get_middle_points_in_time().reshape(-1, 1))
+        else:
+            raise ValueError("Model to be implemented")
+
+    def __repr__(self):
+        return f"MultiFeatureTimeSeries(features={self.features}, interpausal_units={self.ipus})"
+
+    def _sort_ipus(
+        self,
+        interpausal_units: List[InterPausalUnit],
+    ) -> List[InterPausalUnit]:
+        ipus = deepcopy(interpausal_units)
+        ipus.sort(key=lambda ipu: ipu.start)
+        if ipus != interpausal_units:
+            warnings.warn(
+                f"""InterPausalUnits not sorted
+                    Default behaviour sorts InterPausalUnit/s by start.
+                """
+            )
+        return ipus
+
+    def _get_interpausal_units_feature_values(
+        self,
+    ) -> np.ndarray:
+        """
+        Returns a matrix with the value of each feature (columns) for each IPU (rows).
+        """
+        values = np.full((len(self.ipus), len(self.features)), np.nan)
+        for i, ipu in enumerate(self.ipus):
+            for j, feature in enumerate(self.features):
+                value = ipu.feature_value(feature)
+                if value is not None:
+                    values[i, j] = value
+        return values
+
+    def _prepare_data(
+        self,
+        MAX_DEVIATIONS: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Returns the mask of the values to use for each feature.
+
+        Values are discarded if they are None, NaN or outliers. Outliers are values
+        with a distance from the mean of the feature greater than MAX_DEVIATIONS times
+        its standard deviation, as in TimeSeries.
+        """
+        if MAX_DEVIATIONS is None:
+            MAX_DEVIATIONS = 3
+
+        not_missing = ~np.isnan(self.ipus_feature_values)
+        features_wo_value = [
+            feature
+            for feature, has_value in zip(self.features, not_missing.all(axis=0))
+            if not has_value
+        ]
+        if features_wo_value:
+            warnings.warn(
+                f"""InterPausalUnit with None or NaN value: some InterPausalUnit's do not have a value for {features_wo_value}
+                    Default behaviour discards this InterPausalUnit/s for those features
+                """
+            )
+
+        with warnings.catch_warnings():
+            # Features without any value have NaN mean and deviation
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            mean = np.nanmean(self.ipus_feature_values, axis=0)
+            standard_deviation = np.nanstd(self.ipus_feature_values, axis=0)
+        distance_from_mean = np.abs(self.ipus_feature_values - mean)
+        not_outlier = distance_from_mean < MAX_DEVIATIONS * standard_deviation
+
+        #: The amount of IPUs with an outlier value for each feature.
+        self.outliers: np.ndarray = (not_missing & ~not_outlier).sum(axis=0)
+
+        return not_missing & not_outlier
+
+    def _get_middle_points_in_time(
+        self,
+    ) -> np.ndarray:
+        """
+        Returns a list with the middle point in time of each IPU.
+        """
+        return np.array([(ipu.start + ipu.end) / 2 for ipu in self.ipus])
+
+    def start(
+        self,
+    ) -> np.ndarray:
+        """
+        Returns, for each feature, the starting point in time in which
+        its time series is defined
+        """
+        middle_points = self._get_middle_points_in_time()
+        return np.array(
+            [middle_points[np.flatnonzero(column)[0]] for column in self.mask.T]
+        )
+
+    def end(
+        self,
+    ) -> np.ndarray:
+        """
+        Returns, for each feature, the ending point in time in which
+        its time series is defined
+        """
+        middle_points = self._get_middle_points_in_time()
+        return np.array(
+            [middle_points[np.flatnonzero(column)[-1]] for column in self.mask.T]
+        )
+
+    def predict(
+        self,
+        X,
+    ) -> np.ndarray:
+        """
+        Given a point or an array of points in time,
+        predict the value of every feature.
+
+
+        Parameters
+        ----------
+        X: float, list or np.ndarray
+            A point or an array/list of points in time.
+
+        Returns
+        -------
+        np.ndarray
+            The predicted values, with shape (amount of points, amount of features).
+        """
+        # Convert float to expected predict type
+        if isinstance(X, float):
+            X = [X]
+
+        # Validate input
+        if isinstance(X, list) or (isinstance(X, np.ndarray) and X.ndim == 1):
+            X = np.array(X, dtype=float)
+        else:
+            raise ValueError(
+                """Invalid input: the value/s to predict must be a float or
+                a 1 dimentional list or numpy array with the points in time to predict.
+                """
+            )
+
+        if np.any(X > self.end().min()) or np.any(X < self.start().max()):
+            warnings.warn(
+                """Out of bounds: a value in X is outside the time series of some feature.
+                Remember each feature is defined between the middle points of its first and last non-outlier IPUs.
+                """
+            )
+
+        values = np.where(self.mask, self.ipus_feature_values, 0.0)
+        predictions = np.empty((X.shape[0], len(self.features)), dtype=get_dtype())
+        for chunk_start in range(0, X.shape[0], PREDICT_CHUNK_SIZE):
+            chunk = slice(chunk_start, chunk_start + PREDICT_CHUNK_SIZE)
+            neighbors = self.model.kneighbors(
+                X[chunk].reshape(-1, 1), return_distance=False
+            )
+            # Keep, for each feature, the first k valid neighbors
+            neighbors_mask = self.mask[neighbors]
+            selected = neighbors_mask & (np.cumsum(neighbors_mask, axis=1) <= self.k)
+            predictions[chunk] = (
+                np.einsum("gkf,gkf->gf", values[neighbors], selected) / self.k
+            )
+        return predictions
+
+    def predict_interval(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        granularity: Optional[float] = None,
+    ) -> np.ndarray:
+        """
+        Predict the values of every feature between the given
+        start and end, and with the given granularity.
+
+
+        Parameters
+        ----------
+        start: Optional[float]
+            A starting point in time to predict. Default is the latest start among the features.
+        end: Optional[float]
+            An ending point in time to predict. Default is the earliest end among the features.
+        granularity: Optional[float]
+            The step in time in which to predict from the time series. Default is 0.01
+        Returns
+        -------
+        np.ndarray
+            The values predicted, with shape (amount of points, amount of features).
+        """
+        if start is None:
+            start = self.start().max()
+
+        if end is None:
+            end = self.end().min()
+
+        if granularity is None:
+            granularity = 0.01
+
+        # Prepare values to predict
+        values_to_predict_in_s = np.arange(start, end + granularity, granularity)
+
+        # Last value to predict could be greater than the end
+        if values_to_predict_in_s[-1] > end:
+            values_to_predict_in_s[-1] = end
+
+        return self.predict(values_to_predict_in_s)
+
+    def outlier_ipus(self) -> np.ndarray:
+        """
+        Returns, for each feature, the amount of InterPausalUnits with an outlier value.
+        """
+        return self.outliers
@@ -0,0 +1,551 @@
+import math
+import warnings
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from entrainment_metrics import InterPausalUnit
+
+from .metrics import (DEFAULT_SYNCHRONY_DELTAS,
+                      calculate_convergence_from_values,
+                      calculate_proximity_from_values,
+                      calculate_synchrony_profile_montecarlo_from_values,
+                      select_synchrony_value)
+
+# Initial capacity of the arrays of an OnlineTimeSeries, doubled when full
+INITIAL_CAPACITY: int = 64
+
+
+class OnlineTimeSeries:
+    """The evolution of an acoustic-prosodic feature value in time,
+    built while the InterPausalUnits arrive.
+
+    Predictions are the same as the ones of a TimeSeries built with the
+    knn method over the InterPausalUnits appended so far: values are
+    discarded if they are None, NaN or outliers with respect to the mean
+    and standard deviation of all the values appended so far.
+
+    Appending an InterPausalUnit is amortized O(1). Before the first
+    prediction after some appends, only the new InterPausalUnits are
+    classified as outliers or not. The old ones are classified again (in
+    O(n)) only when the running mean and standard deviation move the
+    outlier threshold across one of their values, which becomes rare as
+    the conversation grows. Each point in time is predicted in O(log n + k).
+
+    Consumers of the predictions (e.g. OnlineMetrics) find which ones may
+    have changed since they last looked with changed_from_since.
+
+
+    Parameters
+    ----------
+    feature: str
+        The feature to get the value from each InterPausalUnit
+
+    k: Optional[int]
+        The amount of neighbors to use
+
+    MAX_DEVIATIONS: Optional[int]
+        The amount of deviation to define an outlier
+
+    """
+
+    def __init__(
+        self,
+        feature: str,
+        k: Optional[int] = None,
+        MAX_DEVIATIONS: Optional[int] = None,
+    ) -> None:
+        if k is None:
+            k = 7
+
+        if MAX_DEVIATIONS is None:
+            MAX_DEVIATIONS = 3
+
+        #: The feature to get the value from each InterPausalUnit.
+        self.feature: str = feature
+
+        #: The amount of neighbors to use.
+        self.k: int = k
+
+        self.MAX_DEVIATIONS: int = MAX_DEVIATIONS
+
+        self._middle_points: np.ndarray = np.empty(INITIAL_CAPACITY)
+        self._values: np.ndarray = np.empty(INITIAL_CAPACITY)
+        self._size: int = 0
+        self._last_start: float = -math.inf
+
+        # Running mean and sum of squared distances to the mean (Welford)
+        self._mean: float = 0.0
+        self._sum_square_distances: float = 0.0
+
+        # Non-outlier IPUs as of the last refresh, the first _valid_size
+        # positions of these arrays (doubled when full)
+        self._valid_middle_points_buffer: np.ndarray = np.empty(INITIAL_CAPACITY)
+        self._valid_values_buffer: np.ndarray = np.empty(INITIAL_CAPACITY)
+        self._valid_size: int = 0
+        self._refreshed_size: int = 0
+
+        # Extremes of the valid values and the closest outliers below and
+        # above them, to know when the threshold moves across an old value
+        self._min_valid_value: float = math.inf
+        self._max_valid_value: float = -math.inf
+        self._max_outlier_below: float = -math.inf
+        self._min_outlier_above: float = math.inf
+
+        # Earliest point in time whose prediction may have changed in each
+        # refresh that changed something, see changed_from_since
+        self._changes: List[float] = []
+
+    def __repr__(self):
+        return (
+            f"OnlineTimeSeries(feature={self.feature}, interpausal_units={self._size})"
+        )
+
+    def __len__(self):
+        return self._size
+
+    def append(
+        self,
+        interpausal_unit: InterPausalUnit,
+    ) -> None:
+        """
+        Add an InterPausalUnit to the time series.
+
+        InterPausalUnits must be appended in time order. If its value for
+        the feature is None or NaN it is discarded.
+        """
+        middle_point = (interpausal_unit.start + interpausal_unit.end) / 2
+        if interpausal_unit.start < self._last_start or (
+            self._size and middle_point < self._middle_points[self._size - 1]
+        ):
+            raise ValueError("InterPausalUnits must be appended in time order")
+        self._last_start = interpausal_unit.start
+
+        value = interpausal_unit.feature_value(self.feature)
+        if value is None or math.isnan(value):
+            warnings.warn(
+                f"""InterPausalUnit with None or NaN value: {interpausal_unit} does not have a value for {self.feature}
+                    Default behaviour discards this InterPausalUnit
+                """
+            )
+            return
+
+        if self._size == self._values.shape[0]:
+            self._middle_points = np.concatenate(
+                [self._middle_points, np.empty(self._size)]
+            )
+            self._values = np.concatenate([self._values, np.empty(self._size)])
+
+        self._middle_points[self._size] = middle_point
+        self._values[self._size] = value
+        self._size += 1
+
+        # Update running statistics
+        distance_to_old_mean = value - self._mean
+        self._mean += distance_to_old_mean / self._size
+        self._sum_square_distances += distance_to_old_mean * (value - self._mean)
+
+    @property
+    def _valid_middle_points(self) -> np.ndarray:
+        return self._valid_middle_points_buffer[: self._valid_size]
+
+    @property
+    def _valid_values(self) -> np.ndarray:
+        return self._valid_values_buffer[: self._valid_size]
+
+    def _outlier_threshold(self) -> float:
+        return self.MAX_DEVIATIONS * math.sqrt(self._sum_square_distances / self._size)
+
+    def _is_valid(self, values, threshold: float):
+        return np.abs(values - self._mean) < threshold
+
+    def _old_values_keep_their_class(self, threshold: float) -> bool:
+        """
+        Returns whether the InterPausalUnits of the last refresh are still
+        (non-)outliers with threshold and the current mean.
+
+        Valid values are the ones inside an interval around the mean, so
+        only the extreme valid values and the closest outliers to them can
+        be the first ones to change.
+        """
+        if self._valid_size and not (
+            self._is_valid(self._min_valid_value, threshold)
+            and self._is_valid(self._max_valid_value, threshold)
+        ):
+            return False
+        if self._max_outlier_below > -math.inf and (
+            self._max_outlier_below > self._mean
+            or self._is_valid(self._max_outlier_below, threshold)
+        ):
+            return False
+        if self._min_outlier_above < math.inf and (
+            self._min_outlier_above < self._mean
+            or self._is_valid(self._min_outlier_above, threshold)
+        ):
+            return False
+        return True
+
+    def _add_to_valid(
+        self,
+        middle_points: np.ndarray,
+        values: np.ndarray,
+        mask: np.ndarray,
+    ) -> None:
+        """
+        Append the IPUs of mask to the valid ones and update the extremes.
+        """
+        new_valid_values = values[mask]
+        new_size = self._valid_size + new_valid_values.size
+        if new_size > self._valid_values_buffer.shape[0]:
+            capacity = max(new_size, 2 * self._valid_values_buffer.shape[0])
+            self._valid_middle_points_buffer = np.concatenate(
+                [self._valid_middle_points, np.empty(capacity - self._valid_size)]
+            )
+            self._valid_values_buffer = np.concatenate(
+                [self._valid_values, np.empty(capacity - self._valid_size)]
+            )
+        self._valid_middle_points_buffer[self._valid_size : new_size] = middle_points[
+            mask
+        ]
+        self._valid_values_buffer[self._valid_size : new_size] = new_valid_values
+        self._valid_size = new_size
+
+        if new_valid_values.size:
+            self._min_valid_value = min(
+                self._min_valid_value, float(np.min(new_valid_values))
+            )
+            self._max_valid_value = max(
+                self._max_valid_value, float(np.max(new_valid_values))
+            )
+        outliers = values[~mask]
+        # With no deviation every value is an outlier, even the mean
+        below = outliers[outliers <= self._mean]
+        above = outliers[outliers > self._mean]
+        if below.size:
+            self._max_outlier_below = max(self._max_outlier_below, float(np.max(below)))
+        if above.size:
+            self._min_outlier_above = min(self._min_outlier_above, float(np.min(above)))
+
+    def _refresh(self) -> None:
+        """
+        Update the outliers and the valid IPUs after some InterPausalUnits were appended.
+        """
+        if self._refreshed_size == self._size:
+            return
+
+        threshold = self._outlier_threshold()
+        if self._old_values_keep_their_class(threshold):
+            # Only the new IPUs need to be classified
+            old_valid_size = self._valid_size
+            middle_points = self._middle_points[self._refreshed_size : self._size]
+            values = self._values[self._refreshed_size : self._size]
+            self._add_to_valid(middle_points, values, self._is_valid(values, threshold))
+
+            # Find from which point in time predictions may have changed
+            changed_from = math.inf
+            if self._valid_size > old_valid_size:
+                if old_valid_size < self.k:
+                    changed_from = -math.inf
+                else:
+                    # Before the middle point between the first new IPU and the
+                    # k-th last old one, the k old neighbors are closer
+                    changed_from = (
+                        self._valid_middle_points[old_valid_size - self.k]
+                        + self._valid_middle_points[old_valid_size]
+                    ) / 2
+        else:
+            # The threshold moved across an old value, classify every IPU again
+            self._valid_size = 0
+            self._min_valid_value = self._min_outlier_above = math.inf
+            self._max_valid_value = self._max_outlier_below = -math.inf
+            values = self._values[: self._size]
+            self._add_to_valid(
+                self._middle_points[: self._size],
+                values,
+                self._is_valid(values, threshold),
+            )
+            changed_from = -math.inf
+
+        if changed_from < math.inf:
+            self._changes.append(changed_from)
+        self._refreshed_size = self._size
+
+    def version(self) -> int:
+        """
+        Returns the amount of refreshes that changed the predictions so far,
+        to give to changed_from_since later.
+        """
+        self._refresh()
+        return len(self._changes)
+
+    def changed_from_since(
+        self,
+        version: int,
+    ) -> Tuple[float, int]:
+        """
+        Returns the earliest point in time whose prediction may have changed
+        since version (inf if none, -inf if every prediction may have
+        changed) and the current version.
+
+        Each consumer keeps the version it last saw, so many of them can
+        follow the same OnlineTimeSeries.
+        """
+        self._refresh()
+        return min(self._changes[version:], default=math.inf), len(self._changes)
+
+    def is_defined(self) -> bool:
+        """
+        Returns whether there are enough non-outlier InterPausalUnits to predict.
+        """
+        self._refresh()
+        return self._valid_middle_points.size >= self.k
+
+    def start(
+        self,
+    ) -> float:
+        """
+        Returns the starting point in time in which
+        the OnlineTimeSeries is defined
+        """
+        self._refresh()
+        return self._valid_middle_points[0]
+
+    def end(
+        self,
+    ) -> float:
+        """
+        Returns the ending point in time in which
+        the OnlineTimeSeries is defined
+        """
+        self._refresh()
+        return self._valid_middle_points[-1]
+
+    def outlier_ipus(self) -> int:
+        """
+        Returns the amount of InterPausalUnits with an outlier feature value.
+        """
+        self._refresh()
+        return self._size - self._valid_middle_points.size
+
+    def predict(
+        self,
+        X,
+    ) -> np.ndarray:
+        """
+        Given a point or an array of points in time,
+        predict the OnlineTimeSeries value for its feature.
+
+
+        Parameters
+        ----------
+        X: float, list or np.ndarray
+            A point or an array/list of points in time.
+
+        Returns
+        -------
+        np.ndarray
+            The predicted value/s for the point/s in time given.
+        """
+        # Convert float to expected predict type
+        if isinstance(X, float):
+            X = [X]
+
+        # Validate input
+        if isinstance(X, list) or (isinstance(X, np.ndarray) and X.ndim == 1):
+            X = np.array(X, dtype=float)
+        else:
+            raise ValueError(
+                """Invalid input: the value/s to predict must be a float or
+                a 1 dimentional list or numpy array with the points in time to predict.
+                """
+            )
+
+        if not self.is_defined():
+            raise ValueError(
+                "k cannot be bigger than the amount of non-outlier interpausal units"
+            )
+
+        if np.any(X > self.end()) or np.any(X < self.start()):
+            warnings.warn(
+                """Out of bounds: a value in X is outside the OnlineTimeSeries.
+                Remember it is defined between the middle points of the first and last non-outlier IPUs.
+                """
+            )
+
+        # The k nearest neighbors of x are among the k valid IPUs before
+        # and the k valid IPUs after x
+        positions = np.searchsorted(self._valid_middle_points, X)
+        candidates = positions[:, np.newaxis] + np.arange(-self.k, self.k)
+        is_candidate = (candidates >= 0) & (candidates < self._valid_middle_points.size)
+        candidates = np.clip(candidates, 0, self._valid_middle_points.size - 1)
+
+        distances = np.abs(self._valid_middle_points[candidates] - X[:, np.newaxis])
+        distances[~is_candidate] = np.inf
+        # Stable sort keeps the earliest IPU among equidistant ones
+        nearest = np.argsort(distances, axis=1, kind="stable")[:, : self.k]
+        neighbors = np.take_along_axis(candidates, nearest, axis=1)
+
+        return np.mean(self._valid_values[neighbors], axis=1)
+
+
+class OnlineMetrics:
+    """Entrainment metrics over the last seconds of two OnlineTimeSeries.
+
+    The metrics are calculated over the trailing window of the common
+    support, evaluated on a grid of fixed points in time (multiples of
+    granularity). Values predicted for the window are kept between
+    calls, and only the points in time whose prediction may have
+    changed since the last call are predicted again, so an update costs
+    O(window) instead of a recomputation over the whole conversation.
+
+
+    Parameters
+    ----------
+    time_series_a: OnlineTimeSeries
+        One of the two OnlineTimeSeries to calculate the metrics from.
+
+    time_series_b: OnlineTimeSeries
+        The other OnlineTimeSeries to calculate the metrics from.
+
+    window: float
+        The length in seconds of the window of the metrics.
+
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+
+    synchrony_deltas: Optional[List[float]]
+        The lags in seconds used to calculate synchrony.
+
+    """
+
+    def __init__(
+        self,
+        time_series_a: OnlineTimeSeries,
+        time_series_b: OnlineTimeSeries,
+        window: float,
+        granularity: Optional[float] = None,
+        synchrony_deltas: Optional[List[float]] = None,
+    ) -> None:
+        if granularity is None:
+            granularity = 0.01
+
+        if synchrony_deltas is None:
+            synchrony_deltas = DEFAULT_SYNCHRONY_DELTAS
+
+        self.time_series_a = time_series_a
+        self.time_series_b = time_series_b
+        self.window = window
+        self.granularity = granularity
+        self.synchrony_deltas = synchrony_deltas
+
+        # Grid indices and values predicted in the last call
+        self._indices: np.ndarray = np.empty(0, dtype=int)
+        self._values_a: np.ndarray = np.empty(0)
+        self._values_b: np.ndarray = np.empty(0)
+        # Versions of each OnlineTimeSeries the values were predicted with
+        self._version_a: int = 0
+        self._version_b: int = 0
+
+    def _update_values(
+        self,
+        time_series: OnlineTimeSeries,
+        version: int,
+        indices: np.ndarray,
+        cached_values: np.ndarray,
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Return the values of time_series for the grid indices, reusing
+        cached values predicted with version, and the current version.
+        """
+        changed_from, version = time_series.changed_from_since(version)
+
+        values = np.empty(indices.size)
+        is_predicted = np.ones(indices.size, dtype=bool)
+        if self._indices.size:
+            # Grid indices are contiguous, so the cached ones are a slice
+            offset = indices[0] - self._indices[0]
+            overlap = np.arange(
+                max(0, -offset), min(indices.size, self._indices.size - offset)
+            )
+            reusable = overlap[(indices[overlap] * self.granularity) < changed_from]
+            values[reusable] = cached_values[reusable + offset]
+            is_predicted[reusable] = False
+
+        if np.any(is_predicted):
+            values[is_predicted] = time_series.predict(
+                indices[is_predicted] * self.granularity
+            )
+        return values, version
+
+    def calculate(
+        self,
+        metrics: Optional[List[str]] = None,
+    ) -> Dict[str, float]:
+        """
+        Calculate the metrics over the trailing window of the common support.
+
+
+        Parameters
+        ----------
+        metrics: Optional[List[str]]
+            The metrics to be calculated ("synchrony", "proximity", or "convergence"). Default is all of them.
+
+        Returns
+        -------
+        Dict[str, float]
+            The value of each metric.
+        """
+        if metrics is None:
+            metrics = ["proximity", "convergence", "synchrony"]
+
+        if not self.time_series_a.is_defined() or not self.time_series_b.is_defined():
+            raise ValueError(
+                "k cannot be bigger than the amount of non-outlier interpausal units"
+            )
+
+        common_start = max(self.time_series_a.start(), self.time_series_b.start())
+        common_end = min(self.time_series_a.end(), self.time_series_b.end())
+        window_start = max(common_start, common_end - self.window)
+
+        indices = np.arange(
+            math.ceil(window_start / self.granularity),
+            math.floor(common_end / self.granularity) + 1,
+        )
+        if not indices.size:
+            raise ValueError("The common support is shorter than the granularity")
+
+        self._values_a, self._version_a = self._update_values(
+            self.time_series_a, self._version_a, indices, self._values_a
+        )
+        self._values_b, self._version_b = self._update_values(
+            self.time_series_b, self._version_b, indices, self._values_b
+        )
+        self._indices = indices
+
+        values_to_predict_in_s = indices * self.granularity
+        results: Dict[str, float] = {}
+        for metric in metrics:
+            metric = metric.lower()
+            if metric == "proximity":
+                res = calculate_proximity_from_values(self._values_a, self._values_b)
+            elif metric == "pearson" or metric == "convergence":
+                res = calculate_convergence_from_values(
+                    self._values_a, self._values_b, values_to_predict_in_s
+                )
+            elif metric == "synchrony":
+                res = float(
+                    select_synchrony_value(
+                        calculate_synchrony_profile_montecarlo_from_values(
+                            self._values_a,
+                            self._values_b,
+                            values_to_predict_in_s[0],
+                            values_to_predict_in_s[-1],
+                            self.granularity,
+                            self.synchrony_deltas,
+                        )
+                    )
+                )
+            else:
+                raise ValueError("Not a valid metric")
+            results[metric] = res
+        return results
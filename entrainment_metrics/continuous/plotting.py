@@ -0,0 +1,234 @@
+from pathlib import Path
+from typing import (TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence,
+                    Tuple)
+from weakref import WeakKeyDictionary
+
+import numpy as np
+
+from entrainment_metrics.continuous import TimeSeries
+
+# matplotlib is only imported when drawing, and never pyplot: files are
+# rendered with Figure and the Agg canvas, without a GUI backend.
+if TYPE_CHECKING:
+    from matplotlib.axes import Axes
+
+# The points in time and the predictions in them of a TimeSeries
+Curve = Tuple[np.ndarray, np.ndarray]
+
+# The curves predicted with cache for each TimeSeries, by (start, end, granularity).
+# A TimeSeries is not refitted, so its curves stay valid while it exists or
+# until clear_curves is called.
+CURVES: "WeakKeyDictionary[TimeSeries, Dict[Tuple[float, float, float], Curve]]" = (
+    WeakKeyDictionary()
+)
+
+
+def predict_curve(
+    time_series: TimeSeries,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    granularity: Optional[float] = None,
+    cache: Optional[bool] = None,
+) -> Curve:
+    """
+    Return the points in time between start and end every granularity
+    seconds and the TimeSeries predictions in them, as TimeSeries.plot
+    draws them. With cache, the predictions are calculated only the first
+    time for each TimeSeries, start, end and granularity, and the arrays
+    returned are read-only as they are shared by every call.
+
+
+    Parameters
+    ----------
+    time_series: TimeSeries
+        The TimeSeries to predict from.
+    start: Optional[float]
+        A starting point in time to predict. Default is time_series.start()
+    end: Optional[float]
+        An ending point in time to predict. Default is time_series.end()
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+    cache: Optional[bool]
+        Whether to keep the curve for later calls, until clear_curves is called. Default is False.
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The points in time and the predictions.
+    """
+    if start is None:
+        start = time_series.start()
+
+    if end is None:
+        end = time_series.end()
+
+    if granularity is None:
+        granularity = 0.01
+
+    if cache is None:
+        cache = False
+
+    curves = CURVES.get(time_series, {})
+    if (start, end, granularity) in curves:
+        return curves[(start, end, granularity)]
+
+    xs = np.arange(start, end + granularity, granularity)
+    # Last value to predict could be greater than the end
+    ys = time_series.predict(np.minimum(xs, time_series.end()))
+    if cache:
+        xs.setflags(write=False)
+        ys.setflags(write=False)
+        CURVES.setdefault(time_series, {})[(start, end, granularity)] = (xs, ys)
+    return xs, ys
+
+
+def clear_curves(time_series: Optional[TimeSeries] = None) -> None:
+    """
+    Forget the curves kept by predict_curve for the TimeSeries given, or
+    for every TimeSeries if None.
+    """
+    if time_series is None:
+        CURVES.clear()
+    else:
+        CURVES.pop(time_series, None)
+
+
+def draw_time_series(
+    ax: "Axes",
+    time_series: TimeSeries,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    granularity: Optional[float] = None,
+    plot_ipus: Optional[bool] = None,
+    cache: Optional[bool] = None,
+    **kwargs,
+) -> None:
+    """
+    Draw the predictions of the TimeSeries between start and end, with the
+    given granularity, in the matplotlib Axes given. kwargs are passed to
+    Axes.plot and Axes.hlines.
+
+
+    Parameters
+    ----------
+    ax: Axes
+        The matplotlib Axes to draw in.
+    time_series: TimeSeries
+        The TimeSeries to draw.
+    start: Optional[float]
+        A starting point in time to predict. Default is time_series.start()
+    end: Optional[float]
+        An ending point in time to predict. Default is time_series.end()
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+    plot_ipus: Optional[bool]
+        Whether to plot also the InterPausalUnits feature values. Default is True.
+    cache: Optional[bool]
+        Whether to keep the predictions, see predict_curve. Default is False.
+    """
+    if start is None:
+        start = time_series.start()
+
+    if end is None:
+        end = time_series.end()
+
+    if plot_ipus is None:
+        plot_ipus = True
+
+    xs, ys = predict_curve(time_series, start, end, granularity, cache)
+    ax.plot(xs, ys, **kwargs)
+
+    if plot_ipus:
+        ipus = [
+            ipu for ipu in time_series.ipus if ipu.start >= start and ipu.end <= end
+        ]
+        ax.hlines(
+            y=[ipu.feature_value(time_series.feature) for ipu in ipus],
+            xmin=[ipu.start for ipu in ipus],
+            xmax=[ipu.end for ipu in ipus],
+            linewidth=4.4,
+            **kwargs,
+        )
+
+    ax.set_xlabel("Time (seconds)")
+    ax.set_ylabel(time_series.feature)
+
+
+def draw_legend(ax: "Axes") -> None:
+    """
+    Draw a legend in the Axes with each label once.
+    """
+    handles, labels = ax.get_legend_handles_labels()
+    by_label = dict(zip(labels, handles))
+    ax.legend(by_label.values(), by_label.keys())
+
+
+def save_time_series_plots(
+    sessions: Iterable[Tuple[Path, Sequence[TimeSeries]]],
+    names: Optional[List[str]] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    granularity: Optional[float] = None,
+    plot_ipus: Optional[bool] = None,
+    figsize: Optional[Tuple[float, float]] = None,
+    dpi: Optional[float] = None,
+    cache: Optional[bool] = None,
+    **kwargs,
+) -> None:
+    """
+    Save a plot of the TimeSeries of each session to a file
+
+    A single Figure is drawn for all the sessions, with the Agg canvas,
+    so pyplot and a GUI backend are never imported and nothing is kept
+    open between sessions. With cache, the predictions of each TimeSeries
+    are kept by predict_curve, so plotting again a TimeSeries (e.g. in
+    another report) does not predict again. kwargs are passed to Axes.plot
+    and Axes.hlines, and take precedence over the color and label of each
+    TimeSeries.
+
+
+    Parameters
+    ----------
+    sessions: Iterable[Tuple[Path, Sequence[TimeSeries]]]
+        The file to save each plot to (any format supported by
+        Figure.savefig, by the extension) and the TimeSeries to draw in it.
+    names: Optional[List[str]]
+        The label in the legend of the TimeSeries in each position. Default is no legend.
+    start: Optional[float]
+        A starting point in time to predict. Default is the start of each TimeSeries.
+    end: Optional[float]
+        An ending point in time to predict. Default is the end of each TimeSeries.
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+    plot_ipus: Optional[bool]
+        Whether to plot also the InterPausalUnits feature values. Default is True.
+    figsize: Optional[Tuple[float, float]]
+        The size in inches of the plots. Default is matplotlib default.
+    dpi: Optional[float]
+        The resolution of the plots. Default is matplotlib default.
+    cache: Optional[bool]
+        Whether to keep the predictions, see predict_curve. Default is False.
+    """
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=figsize)
+    ax = figure.add_subplot()
+    for fname, session_time_series in sessions:
+        ax.clear()
+        for i, time_series in enumerate(session_time_series):
+            draw_time_series(
+                ax,
+                time_series,
+                start=start,
+                end=end,
+                granularity=granularity,
+                plot_ipus=plot_ipus,
+                cache=cache,
+                **{
+                    "color": f"C{i}",
+                    "label": names[i] if names is not None else None,
+                    **kwargs,
+                },
+            )
+        if names is not None:
+            draw_legend(ax)
+        figure.savefig(fname, dpi=dpi)
@@ -0,0 +1,105 @@
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from entrainment_metrics import InterPausalUnit
+from entrainment_metrics.continuous import TimeSeries
+from entrainment_metrics.continuous.backends import create_regression_backend
+from entrainment_metrics.ipu_table import read_schema, write_schema
+
+#: Version of the layout of the directories written by save_time_series
+TIME_SERIES_VERSION: int = 1
+
+
+def save_time_series(
+    time_series: TimeSeries,
+    path: Path,
+) -> None:
+    """
+    Save a fitted TimeSeries to the directory path, creating it if needed
+
+    Only the state needed to predict is saved, the InterPausalUnits kept
+    after discarding missing values and outliers:
+        - schema.json: {"format": "time_series", "version": 1, "feature",
+          "method", "model_params": the parameters of the model of the
+          method, "outliers": amount of outliers discarded}
+        - starts.npy, ends.npy, feature_values.npy: float64 arrays with
+          the start, end and feature value of each InterPausalUnit kept.
+
+
+    Parameters
+    ----------
+    time_series: TimeSeries
+        The TimeSeries to save.
+    path: Path
+        The directory to save the TimeSeries to.
+    """
+    model_params = time_series.model.get_params()
+    try:
+        json.dumps(model_params)
+    except TypeError as e:
+        raise ValueError("TimeSeries model parameters can not be saved") from e
+
+    os.makedirs(path, exist_ok=True)
+    np.save(
+        Path(path) / "starts.npy",
+        np.array([ipu.start for ipu in time_series.ipus], dtype=np.float64),
+    )
+    np.save(
+        Path(path) / "ends.npy",
+        np.array([ipu.end for ipu in time_series.ipus], dtype=np.float64),
+    )
+    np.save(
+        Path(path) / "feature_values.npy",
+        np.asarray(time_series.ipus_feature_values, dtype=np.float64),
+    )
+    write_schema(
+        path,
+        {
+            "format": "time_series",
+            "version": TIME_SERIES_VERSION,
+            "feature": time_series.feature,
+            "method": time_series.method,
+            "model_params": model_params,
+            "outliers": int(time_series.outliers),
+        },
+    )
+
+
+def load_time_series(path: Path) -> TimeSeries:
+    """
+    Load a TimeSeries saved with save_time_series
+
+    The InterPausalUnits are not cleaned again, so the TimeSeries predicts
+    exactly as the one saved.
+
+
+    Parameters
+    ----------
+    path: Path
+        The directory the TimeSeries was saved to.
+    Returns
+    -------
+    TimeSeries
+        The TimeSeries saved.
+    """
+    schema = read_schema(path, "time_series", TIME_SERIES_VERSION)
+    starts = np.load(Path(path) / "starts.npy")
+    ends = np.load(Path(path) / "ends.npy")
+    feature_values = np.load(Path(path) / "feature_values.npy")
+
+    return TimeSeries._from_clean_ipus(  # pylint: disable=protected-access
+        feature=schema["feature"],
+        interpausal_units=[
+            InterPausalUnit(start, end, {schema["feature"]: value})
+            for start, end, value in zip(
+                starts.tolist(), ends.tolist(), feature_values.tolist()
+            )
+        ],
+        ipus_feature_values=feature_values,
+        outliers=schema["outliers"],
+        method=schema["method"],
+        model=create_regression_backend(schema["method"], **schema["model_params"]),
+    )
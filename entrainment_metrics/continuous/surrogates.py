@@ -0,0 +1,323 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+
+from entrainment_metrics.continuous import TimeSeries
+
+from .batch import calculate_metrics_batch
+from .metrics import (calculate_common_support, calculate_metric,
+                      calculate_metric_from_values)
+
+# Amount of surrogates whose values are stacked at once, bounds the memory used
+SURROGATES_CHUNK_SIZE: int = 128
+
+
+class SurrogateTestResult:
+    """
+    The result of comparing the metric of a pair of TimeSeries
+    against the metric of surrogate pairs.
+
+
+    Attributes
+    ----------
+    value: float
+        The metric value of the real pair.
+
+    surrogate_values: np.ndarray
+        The metric value of each surrogate pair.
+
+    p_value: float
+        The proportion of surrogates (counting the real pair) at least as extreme as the real pair.
+
+    alternative: str
+        The alternative hypothesis used for the p_value.
+    """
+
+    def __init__(
+        self,
+        value: float,
+        surrogate_values: np.ndarray,
+        p_value: float,
+        alternative: str,
+    ) -> None:
+        self.value = value
+        self.surrogate_values = surrogate_values
+        self.p_value = p_value
+        self.alternative = alternative
+
+    def __repr__(self):
+        return f"SurrogateTestResult(value={self.value}, p_value={self.p_value}, surrogates={len(self.surrogate_values)}, alternative={self.alternative})"
+
+
+def calculate_p_value(
+    value: float,
+    surrogate_values: np.ndarray,
+    alternative: str,
+) -> float:
+    """
+    Return the surrogate p-value of value, counting the real pair as one of the surrogates.
+
+    NaN surrogate values are ignored.
+    """
+    surrogate_values = surrogate_values[~np.isnan(surrogate_values)]
+    if alternative == "greater":
+        as_extreme = surrogate_values >= value
+    elif alternative == "less":
+        as_extreme = surrogate_values <= value
+    elif alternative == "two-sided":
+        as_extreme = np.abs(surrogate_values) >= np.abs(value)
+    else:
+        raise ValueError("Not a valid alternative")
+    return (1 + np.count_nonzero(as_extreme)) / (1 + surrogate_values.size)
+
+
+def circular_shift_values(
+    values: np.ndarray,
+    shifts: np.ndarray,
+) -> np.ndarray:
+    """
+    Return a row with values circularly shifted by each of the shifts given.
+    """
+    indices = (np.arange(values.shape[-1]) + shifts[:, np.newaxis]) % values.shape[-1]
+    return values[indices]
+
+
+def calculate_circular_shift_surrogates(
+    metric: str,
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    shifts: np.ndarray,
+    start: float,
+    end: float,
+    granularity: float,
+    synchrony_deltas: Optional[List[float]],
+    integration_method: Optional[str],
+) -> np.ndarray:
+    """
+    Calculate the metric between the values of a and the values of b
+    circularly shifted by each of the shifts given.
+    """
+    surrogate_values: List[np.ndarray] = []
+    for chunk_start in range(0, shifts.size, SURROGATES_CHUNK_SIZE):
+        shifted_values_b = circular_shift_values(
+            time_series_values_b,
+            shifts[chunk_start : chunk_start + SURROGATES_CHUNK_SIZE],
+        )
+        surrogate_values.append(
+            np.atleast_1d(
+                calculate_metric_from_values(
+                    metric,
+                    time_series_values_a,
+                    shifted_values_b,
+                    start,
+                    end,
+                    granularity,
+                    synchrony_deltas,
+                    integration_method,
+                )
+            )
+        )
+    return np.concatenate(surrogate_values)
+
+
+def surrogate_test(
+    metric: str,
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    method: Optional[str] = None,
+    n_surrogates: Optional[int] = None,
+    surrogate_partners: Optional[List[TimeSeries]] = None,
+    alternative: Optional[str] = None,
+    min_shift: Optional[float] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    granularity: Optional[float] = None,
+    synchrony_deltas: Optional[List[float]] = None,
+    integration_method: Optional[str] = None,
+    seed: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+) -> SurrogateTestResult:
+    """
+    Test whether the entrainment measured between two times series is
+    greater than the one expected by chance
+
+    The metric of the real pair is compared against the metric of surrogate
+    pairs, which keep the properties of each TimeSeries but break the
+    relation between them. Already fitted TimeSeries are reused: no
+    TimeSeries is built to create the surrogates.
+
+    Methods available:
+        - "circular_shift": the values of time_series_b predicted over the
+          common support are circularly shifted by random amounts of time,
+          so both TimeSeries are predicted only once. Not valid for
+          proximity: a shift does not change the mean of time_series_b, so
+          every surrogate would equal the real pair.
+        - "partners": time_series_a is paired with each of the TimeSeries in
+          surrogate_partners (for example, speakers that never talked to A).
+
+
+    Parameters
+    ----------
+    metric: str
+       The metric to be tested ("synchrony", "proximity", or "convergence")
+    time_series_a: TimeSeries
+        One of the two TimeSeries to calculate the metric from.
+    time_series_b: TimeSeries
+        The other TimeSeries to calculate the metric from.
+    method: Optional[str]
+        The method to create the surrogates. Default is "circular_shift" ("partners" is needed for proximity).
+    n_surrogates: Optional[int]
+        The amount of circular shifts to use as surrogates. Default is 1000.
+    surrogate_partners: Optional[List[TimeSeries]]
+        The TimeSeries to pair with time_series_a when method is "partners".
+    alternative: Optional[str]
+        "greater", "less" or "two-sided" (compares absolute values). Default is
+        "greater" for proximity and "two-sided" for convergence and synchrony.
+    min_shift: Optional[float]
+        The minimum circular shift in seconds, in both directions. Default is 0.1 times the length of the interval.
+    start: Optional[float]
+        A starting point in time to calculate the metric. Default is the start of the common support.
+    end: Optional[float]
+       An ending point in time to calculate the metric. Default is the end of the common support.
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+    synchrony_deltas: Optional[List[float]]
+        The lags in seconds used to calculate synchrony.
+    integration_method: Optional[str] = None
+        The integration method to use for synchrony. Methods available: "montecarlo" and "trapz"
+    seed: Optional[int]
+        The seed used to draw the circular shifts.
+    n_jobs: Optional[int]
+        The amount of processes among which the surrogates are distributed. Default is 1, no extra processes.
+    Returns
+    -------
+    SurrogateTestResult
+        The metric of the real pair, the metric of each surrogate and the p-value.
+    """
+    metric = metric.lower()
+
+    if method is None:
+        method = "circular_shift"
+
+    if alternative is None:
+        alternative = "greater" if metric == "proximity" else "two-sided"
+    elif alternative not in ["greater", "less", "two-sided"]:
+        raise ValueError("Not a valid alternative")
+
+    if n_surrogates is not None and n_surrogates < 1:
+        raise ValueError("Not a valid n_surrogates given")
+
+    if granularity is None:
+        granularity = 0.01
+
+    if n_jobs is None:
+        n_jobs = 1
+
+    if method == "partners":
+        if not surrogate_partners:
+            raise ValueError("surrogate_partners are needed for the partners method")
+
+        value = calculate_metric(
+            metric,
+            time_series_a,
+            time_series_b,
+            start,
+            end,
+            granularity,
+            synchrony_deltas,
+            integration_method,
+        )
+        surrogate_values = calculate_metrics_batch(
+            [(time_series_a, partner) for partner in surrogate_partners],
+            [metric],
+            start,
+            end,
+            granularity,
+            synchrony_deltas,
+            integration_method,
+            n_jobs,
+        )[metric]
+    elif method == "circular_shift":
+        if metric == "proximity":
+            raise ValueError(
+                "Not a valid method for proximity, circular shifts do not change "
+                "it: use the partners method"
+            )
+
+        if n_surrogates is None:
+            n_surrogates = 1000
+
+        if start is None or end is None:
+            common_start, common_end = calculate_common_support(
+                time_series_a, time_series_b
+            )
+            if start is None:
+                start = common_start
+            if end is None:
+                end = common_end
+
+        if min_shift is None:
+            min_shift = 0.1 * (end - start)
+
+        time_series_values_a = time_series_a.predict_interval(start, end, granularity)
+        time_series_values_b = time_series_b.predict_interval(start, end, granularity)
+
+        amount_of_values = time_series_values_b.shape[-1]
+        min_shift_values = max(1, int(min_shift / granularity))
+        if 2 * min_shift_values >= amount_of_values:
+            raise ValueError(f"min_shift too big for interval {start} to {end}")
+
+        value = float(
+            calculate_metric_from_values(
+                metric,
+                time_series_values_a,
+                time_series_values_b,
+                start,
+                end,
+                granularity,
+                synchrony_deltas,
+                integration_method,
+            )
+        )
+
+        # Shifts are drawn beforehand so results do not depend on n_jobs
+        rng = np.random.default_rng(seed)
+        shifts = rng.integers(
+            min_shift_values,
+            amount_of_values - min_shift_values,
+            size=n_surrogates,
+            endpoint=True,
+        )
+
+        tasks = [
+            (
+                metric,
+                time_series_values_a,
+                time_series_values_b,
+                shifts_chunk,
+                start,
+                end,
+                granularity,
+                synchrony_deltas,
+                integration_method,
+            )
+            for shifts_chunk in np.array_split(shifts, max(1, n_jobs))
+            if shifts_chunk.size
+        ]
+        if n_jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                chunks_values = list(
+                    executor.map(calculate_circular_shift_surrogates, *zip(*tasks))
+                )
+        else:
+            chunks_values = [
+                calculate_circular_shift_surrogates(*task) for task in tasks
+            ]
+        surrogate_values = np.concatenate(chunks_values)
+    else:
+        raise ValueError("Not a valid surrogate method")
+
+    p_value = calculate_p_value(value, surrogate_values, alternative)
+
+    return SurrogateTestResult(value, surrogate_values, p_value, alternative)
@@ -1,7 +1,5 @@
 from typing import Optional
 
-import matplotlib.pyplot as plt
-
 from . import TimeSeries
 
 
@@ -45,6 +43,10 @@ def plot_time_series(
     save_fname: Optional[str]
         The fname to pass to plt.savefig(). If provided the plot will be saved.
     """
+    import matplotlib.pyplot as plt
+
+    from .plotting import draw_legend
+
     if (
         legend is None
         or time_series_a_name is not None
@@ -80,9 +82,7 @@ def plot_time_series(
         **kwargs
     )
     if legend:
-        handles, labels = plt.gca().get_legend_handles_labels()
-        by_label = dict(zip(labels, handles))
-        plt.legend(by_label.values(), by_label.keys())
+        draw_legend(plt.gca())
 
     if save_fname is not None:
         plt.savefig(save_fname)
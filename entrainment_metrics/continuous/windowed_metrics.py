@@ -0,0 +1,243 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from entrainment_metrics.continuous import TimeSeries
+
+from .metrics import (DEFAULT_SYNCHRONY_DELTAS, calculate_common_support,
+                      select_synchrony_value)
+
+
+def prefix_sums(values: np.ndarray) -> np.ndarray:
+    """
+    Return the sums of the first i values, for i from 0 to len(values).
+    """
+    return np.concatenate([[0.0], np.cumsum(values)])
+
+
+def windows_sums(
+    sums: np.ndarray,
+    window_starts: np.ndarray,
+    window_length: int,
+) -> np.ndarray:
+    """
+    Return the sum of the values in each window, given the prefix sums of the values.
+    """
+    return sums[window_starts + window_length] - sums[window_starts]
+
+
+def calculate_windowed_proximity(
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    window_starts: np.ndarray,
+    window_length: int,
+) -> np.ndarray:
+    sum_a = windows_sums(
+        prefix_sums(time_series_values_a), window_starts, window_length
+    )
+    sum_b = windows_sums(
+        prefix_sums(time_series_values_b), window_starts, window_length
+    )
+    return -np.abs(sum_a - sum_b) / window_length
+
+
+def calculate_windowed_convergence(
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    window_starts: np.ndarray,
+    window_length: int,
+) -> np.ndarray:
+    d_t = np.abs(time_series_values_a - time_series_values_b) * -1
+    # Pearson correlation is invariant to shifts, center d_t to keep precision
+    d_t = d_t - np.mean(d_t)
+    # Points in time are equally spaced, so they are correlated through their index
+    indices = np.arange(d_t.size)
+
+    sum_d_t = windows_sums(prefix_sums(d_t), window_starts, window_length)
+    sum_square_d_t = windows_sums(
+        prefix_sums(np.square(d_t)), window_starts, window_length
+    )
+    # Sum of d_t times the index relative to the window start
+    sum_d_t_times_index = (
+        windows_sums(prefix_sums(d_t * indices), window_starts, window_length)
+        - window_starts * sum_d_t
+    )
+    sum_index = window_length * (window_length - 1) / 2
+
+    covariance = sum_d_t_times_index - sum_d_t * sum_index / window_length
+    d_t_variance = np.maximum(sum_square_d_t - np.square(sum_d_t) / window_length, 0.0)
+    index_variance = window_length * (window_length**2 - 1) / 12
+
+    return np.clip(covariance / np.sqrt(d_t_variance * index_variance), -1.0, 1.0)
+
+
+def calculate_windowed_synchrony(
+    time_series_values_a: np.ndarray,
+    time_series_values_b: np.ndarray,
+    window_starts: np.ndarray,
+    window_length: int,
+    granularity: float,
+    synchrony_deltas: List[float],
+) -> np.ndarray:
+    # Pearson correlation is invariant to shifts, center values to keep precision
+    values_a = time_series_values_a - np.mean(time_series_values_a)
+    values_b = time_series_values_b - np.mean(time_series_values_b)
+
+    sums_a = prefix_sums(values_a)
+    sums_b = prefix_sums(values_b)
+    square_sums_a = prefix_sums(np.square(values_a))
+    square_sums_b = prefix_sums(np.square(values_b))
+
+    # Means over the whole window, as in calculate_synchrony
+    mean_a = windows_sums(sums_a, window_starts, window_length) / window_length
+    mean_b = windows_sums(sums_b, window_starts, window_length) / window_length
+
+    correlations: List[np.ndarray] = []
+    for synchrony_delta in synchrony_deltas:
+        # Validate synchrony_delta
+        if abs(synchrony_delta) > (window_length - 1) * granularity:
+            raise ValueError("Synchrony delta bigger than window")
+
+        values_to_crop = int(abs(synchrony_delta) / granularity)
+        crop_length = window_length - values_to_crop
+
+        # Where the cropped values of a and b start inside each window, and
+        # the products of the values of a and b paired by the crop
+        if synchrony_delta > 0:
+            starts_a, starts_b = window_starts + values_to_crop, window_starts
+            lagged_products = values_a[values_to_crop:] * values_b[:-values_to_crop]
+            products_starts = starts_b
+        else:
+            starts_a, starts_b = window_starts, window_starts + values_to_crop
+            lagged_products = (
+                values_a[: values_a.size - values_to_crop] * values_b[values_to_crop:]
+            )
+            products_starts = starts_a
+
+        sum_products = windows_sums(
+            prefix_sums(lagged_products), products_starts, crop_length
+        )
+        sum_a = windows_sums(sums_a, starts_a, crop_length)
+        sum_b = windows_sums(sums_b, starts_b, crop_length)
+        sum_square_a = windows_sums(square_sums_a, starts_a, crop_length)
+        sum_square_b = windows_sums(square_sums_b, starts_b, crop_length)
+
+        # Sums of (a - mean_a) * (b - mean_b), (a - mean_a)^2 and (b - mean_b)^2
+        numerator = (
+            sum_products
+            - mean_b * sum_a
+            - mean_a * sum_b
+            + crop_length * mean_a * mean_b
+        )
+        integral_a = sum_square_a - 2 * mean_a * sum_a + crop_length * np.square(mean_a)
+        integral_b = sum_square_b - 2 * mean_b * sum_b + crop_length * np.square(mean_b)
+
+        correlations.append(numerator / np.sqrt(integral_a * integral_b))
+
+    return np.asarray(select_synchrony_value(np.stack(correlations, axis=-1)))
+
+
+def calculate_windowed_metric(
+    metric: str,
+    time_series_a: TimeSeries,
+    time_series_b: TimeSeries,
+    window: float,
+    step: Optional[float] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    granularity: Optional[float] = None,
+    synchrony_deltas: Optional[List[float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculate an entrainment metric over sliding windows of the conversation
+
+    Each window value is the one calculate_metric returns between the
+    start and end of the window (synchrony with the "montecarlo" integration
+    method). Both TimeSeries are predicted once over the whole interval and
+    every window is calculated from cumulative sums, so the cost is
+    proportional to the length of the interval instead of the amount of
+    windows times their length.
+
+
+    Parameters
+    ----------
+    metric: str
+       The metric to be calculated ("synchrony", "proximity", or "convergence")
+    time_series_a: TimeSeries
+        One of the two TimeSeries to calculate the metric from.
+    time_series_b: TimeSeries
+        The other TimeSeries to calculate the metric from.
+    window: float
+        The length in seconds of each window.
+    step: Optional[float]
+        The time in seconds between the start of consecutive windows. Default is the granularity.
+    start: Optional[float]
+        A starting point in time for the first window. Default is the start of the common support.
+    end: Optional[float]
+       An ending point in time for the last window. Default is the end of the common support.
+    granularity: Optional[float]
+        The step in time in which to predict from the time series. Default is 0.01
+    synchrony_deltas: Optional[List[float]]
+        The lags in seconds used to calculate synchrony.
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The center in time of each window and the metric value for each window.
+    """
+    if granularity is None:
+        granularity = 0.01
+
+    if step is None:
+        step = granularity
+
+    if synchrony_deltas is None:
+        synchrony_deltas = DEFAULT_SYNCHRONY_DELTAS
+
+    if start is None or end is None:
+        common_start, common_end = calculate_common_support(
+            time_series_a, time_series_b
+        )
+        if start is None:
+            start = common_start
+        if end is None:
+            end = common_end
+
+    values_to_predict_in_s = np.arange(start, end + granularity, granularity)
+    time_series_values_a = time_series_a.predict_interval(start, end, granularity)
+    time_series_values_b = time_series_b.predict_interval(start, end, granularity)
+
+    window_length = int(round(window / granularity)) + 1
+    window_step = max(1, int(round(step / granularity)))
+    if window_length > values_to_predict_in_s.size:
+        raise ValueError(f"Window bigger than interval {start} to {end}")
+
+    window_starts = np.arange(
+        0, values_to_predict_in_s.size - window_length + 1, window_step
+    )
+    window_centers = (
+        values_to_predict_in_s[window_starts]
+        + values_to_predict_in_s[window_starts + window_length - 1]
+    ) / 2
+
+    metric = metric.lower()
+    if metric == "proximity":
+        res = calculate_windowed_proximity(
+            time_series_values_a, time_series_values_b, window_starts, window_length
+        )
+    elif metric == "pearson" or metric == "convergence":
+        res = calculate_windowed_convergence(
+            time_series_values_a, time_series_values_b, window_starts, window_length
+        )
+    elif metric == "synchrony":
+        res = calculate_windowed_synchrony(
+            time_series_values_a,
+            time_series_values_b,
+            window_starts,
+            window_length,
+            granularity,
+            synchrony_deltas,
+        )
+    else:
+        raise ValueError("Not a valid metric")
+
+    return window_centers, res
@@ -0,0 +1,393 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .interpausal_unit import InterPausalUnit
+from .utils import get_interpausal_units_bounds
+
+#: Version of the layout of the arrays saved by CorpusIndex.save
+CORPUS_INDEX_VERSION: int = 2
+
+SPEAKERS: List[str] = ["A", "B"]
+
+
+def split_speaker_fname(fname: Path) -> Optional[Tuple[str, str]]:
+    """
+    Return the conversation and the speaker of a file named as the ones
+    written by scripts/task_separator.py, '{session}.1.{task}.{speaker}.{extension}'
+
+    The speaker is the last part of the name, between dots, equal to "A" or "B".
+    The conversation is the name without the speaker and the extension.
+    Returns None if the name has no speaker.
+    """
+    parts = fname.name.split(".")[:-1]
+    for i in reversed(range(len(parts))):
+        if parts[i] in SPEAKERS:
+            conversation = ".".join(parts[:i] + parts[i + 1 :])
+            return str(fname.parent / conversation), parts[i]
+    return None
+
+
+def find_transcripts(
+    corpus_path: Path,
+) -> List[Tuple[str, str, Path, Optional[Path]]]:
+    """
+    Return the conversation, speaker, .words file and .wav file (None if
+    there is not one) of each .words file of a speaker inside corpus_path
+    and its subdirectories, sorted by conversation and speaker.
+    """
+    corpus_path = Path(corpus_path)
+    transcripts: List[Tuple[str, str, Path, Optional[Path]]] = []
+    for words_fname in corpus_path.rglob("*.words"):
+        conversation_speaker = split_speaker_fname(words_fname.relative_to(corpus_path))
+        if conversation_speaker is None:
+            continue
+        conversation, speaker = conversation_speaker
+        wav_fname = words_fname.with_suffix(".wav")
+        transcripts.append(
+            (
+                conversation,
+                speaker,
+                words_fname,
+                wav_fname if wav_fname.exists() else None,
+            )
+        )
+    transcripts.sort(key=lambda transcript: transcript[:2])
+    return transcripts
+
+
+class CorpusIndex:
+    """
+    The bounds of the InterPausalUnits of every transcript of a corpus.
+
+    The IPUs of all the transcripts are kept in two flat arrays, starts and
+    ends, and the ones of transcript i are between offsets[i] and
+    offsets[i + 1]. The whole index is saved to and loaded from a single
+    .npz file.
+
+
+    Attributes
+    ----------
+    conversations: np.ndarray
+        The conversation of each transcript.
+
+    speakers: np.ndarray
+        The speaker ("A" or "B") of each transcript.
+
+    words_fnames: np.ndarray
+        The .words file of each transcript, relative to corpus_path.
+
+    wav_fnames: np.ndarray
+        The .wav file of each transcript relative to corpus_path, an empty string if there is not one.
+
+    offsets: np.ndarray
+        The position in starts and ends of the first IPU of each transcript, and their total length.
+
+    starts: np.ndarray
+        The start of each IPU.
+
+    ends: np.ndarray
+        The end of each IPU.
+
+    corpus_path: Optional[Path]
+        The directory the files are resolved against. Default is the current directory.
+    """
+
+    def __init__(
+        self,
+        conversations: np.ndarray,
+        speakers: np.ndarray,
+        words_fnames: np.ndarray,
+        wav_fnames: np.ndarray,
+        offsets: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        corpus_path: Optional[Path] = None,
+    ) -> None:
+        self.conversations = conversations
+        self.speakers = speakers
+        self.words_fnames = words_fnames
+        self.wav_fnames = wav_fnames
+        self.offsets = offsets
+        self.starts = starts
+        self.ends = ends
+        self.corpus_path = Path(corpus_path) if corpus_path is not None else Path()
+
+        self._positions: Dict[Tuple[str, str], int] = {
+            (conversation, speaker): i
+            for i, (conversation, speaker) in enumerate(
+                zip(conversations.tolist(), speakers.tolist())
+            )
+        }
+
+    def __repr__(self):
+        return f"CorpusIndex(transcripts={len(self.conversations)}, interpausal_units={len(self.starts)})"
+
+    def __len__(self):
+        return len(self.conversations)
+
+    def pairs(self) -> List[str]:
+        """
+        Returns the conversations with a transcript for both speakers.
+        """
+        speakers_per_conversation: Dict[str, List[str]] = {}
+        for conversation, speaker in self._positions:
+            speakers_per_conversation.setdefault(conversation, []).append(speaker)
+        return sorted(
+            conversation
+            for conversation, speakers in speakers_per_conversation.items()
+            if all(speaker in speakers for speaker in SPEAKERS)
+        )
+
+    def _position(
+        self,
+        conversation: str,
+        speaker: str,
+    ) -> int:
+        if (conversation, speaker) not in self._positions:
+            raise ValueError(
+                f"No transcript for speaker {speaker} of conversation {conversation}"
+            )
+        return self._positions[(conversation, speaker)]
+
+    def bounds(
+        self,
+        conversation: str,
+        speaker: str,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the starts and ends of the IPUs of the speaker in the conversation.
+        """
+        i = self._position(conversation, speaker)
+        ipus = slice(self.offsets[i], self.offsets[i + 1])
+        return self.starts[ipus], self.ends[ipus]
+
+    def interpausal_units(
+        self,
+        conversation: str,
+        speaker: str,
+    ) -> List[InterPausalUnit]:
+        """
+        Returns the IPUs of the speaker in the conversation, as get_interpausal_units does.
+        """
+        starts, ends = self.bounds(conversation, speaker)
+        return [
+            InterPausalUnit(start, end)
+            for start, end in zip(starts.tolist(), ends.tolist())
+        ]
+
+    def words_fname(
+        self,
+        conversation: str,
+        speaker: str,
+    ) -> Path:
+        """
+        Returns the .words file of the speaker in the conversation.
+        """
+        return (
+            self.corpus_path / self.words_fnames[self._position(conversation, speaker)]
+        )
+
+    def wav_fname(
+        self,
+        conversation: str,
+        speaker: str,
+    ) -> Optional[Path]:
+        """
+        Returns the .wav file of the speaker in the conversation, None if there is not one.
+        """
+        wav_fname = self.wav_fnames[self._position(conversation, speaker)]
+        return self.corpus_path / wav_fname if wav_fname else None
+
+    def save(
+        self,
+        index_fname: Path,
+    ) -> None:
+        """
+        Save the index to a .npz file.
+        """
+        with open(index_fname, mode="wb") as index_file:
+            np.savez(
+                index_file,
+                version=np.array(CORPUS_INDEX_VERSION),
+                conversations=self.conversations,
+                speakers=self.speakers,
+                words_fnames=self.words_fnames,
+                wav_fnames=self.wav_fnames,
+                offsets=self.offsets,
+                starts=self.starts,
+                ends=self.ends,
+            )
+
+
+def load_corpus_index(
+    index_fname: Path,
+    corpus_path: Optional[Path] = None,
+) -> CorpusIndex:
+    """
+    Load an index saved with CorpusIndex.save, whose files are resolved
+    against corpus_path (default is the current directory).
+    """
+    with np.load(index_fname, allow_pickle=False) as index:
+        if int(index["version"]) != CORPUS_INDEX_VERSION:
+            raise ValueError(
+                f"Index version {int(index['version'])} not supported, expected {CORPUS_INDEX_VERSION}"
+            )
+        return CorpusIndex(
+            conversations=index["conversations"],
+            speakers=index["speakers"],
+            words_fnames=index["words_fnames"],
+            wav_fnames=index["wav_fnames"],
+            offsets=index["offsets"],
+            starts=index["starts"],
+            ends=index["ends"],
+            corpus_path=corpus_path,
+        )
+
+
+def build_corpus_index(
+    corpus_path: Path,
+    n_jobs: Optional[int] = None,
+) -> CorpusIndex:
+    """
+    Find and parse every .words file of a speaker inside corpus_path
+
+
+    Parameters
+    ----------
+    corpus_path: Path
+        The directory with the .words and .wav files, named as the ones written by scripts/task_separator.py.
+    n_jobs: Optional[int]
+        The amount of processes among which the .words files are parsed. Default is 1, no extra processes.
+    Returns
+    -------
+    CorpusIndex
+        The IPUs of every transcript found.
+    """
+    if n_jobs is None:
+        n_jobs = 1
+
+    corpus_path = Path(corpus_path)
+    transcripts = find_transcripts(corpus_path)
+    words_fnames = [words_fname for _, _, words_fname, _ in transcripts]
+
+    if n_jobs > 1 and len(words_fnames) > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            transcripts_bounds = list(
+                executor.map(
+                    get_interpausal_units_bounds,
+                    words_fnames,
+                    chunksize=max(1, len(words_fnames) // (4 * n_jobs)),
+                )
+            )
+    else:
+        transcripts_bounds = [
+            get_interpausal_units_bounds(words_fname) for words_fname in words_fnames
+        ]
+
+    offsets = np.zeros(len(transcripts) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([starts.size for starts, _ in transcripts_bounds])
+
+    return CorpusIndex(
+        conversations=np.array(
+            [conversation for conversation, _, _, _ in transcripts], dtype=str
+        ),
+        speakers=np.array([speaker for _, speaker, _, _ in transcripts], dtype=str),
+        words_fnames=np.array(
+            [str(words_fname.relative_to(corpus_path)) for words_fname in words_fnames],
+            dtype=str,
+        ),
+        wav_fnames=np.array(
+            [
+                str(wav_fname.relative_to(corpus_path)) if wav_fname else ""
+                for _, _, _, wav_fname in transcripts
+            ],
+            dtype=str,
+        ),
+        offsets=offsets,
+        starts=np.concatenate(
+            [starts for starts, _ in transcripts_bounds] + [np.empty(0)]
+        ),
+        ends=np.concatenate([ends for _, ends in transcripts_bounds] + [np.empty(0)]),
+        corpus_path=corpus_path,
+    )
+
+
+def is_corpus_index_stale(
+    corpus_index: CorpusIndex,
+    index_fname: Path,
+) -> bool:
+    """
+    Returns whether a .words file of a speaker inside the corpus of
+    corpus_index is not in it, or was modified after index_fname was saved.
+    Removed .words files are not noticed.
+    """
+    index_mtime = os.stat(index_fname).st_mtime
+    indexed_words_fnames = set(corpus_index.words_fnames.tolist())
+    for _, _, words_fname, _ in find_transcripts(corpus_index.corpus_path):
+        if (
+            str(words_fname.relative_to(corpus_index.corpus_path))
+            not in indexed_words_fnames
+        ):
+            return True
+        if os.stat(words_fname).st_mtime > index_mtime:
+            return True
+    return False
+
+
+def load_corpus(
+    corpus_path: Path,
+    index_fname: Optional[Path] = None,
+    n_jobs: Optional[int] = None,
+    rebuild: Optional[bool] = None,
+    check_stale: Optional[bool] = None,
+) -> CorpusIndex:
+    """
+    Load the IPUs of every transcript of a corpus
+
+    The first time, every .words file is parsed and the result is saved to
+    index_fname. Afterwards the whole corpus is loaded from that single
+    file, without reading the .words files again: use rebuild after
+    changing them, or check_stale to parse them again only if one was added
+    or modified after the index was saved.
+
+
+    Parameters
+    ----------
+    corpus_path: Path
+        The directory with the .words and .wav files, named as the ones written by scripts/task_separator.py.
+    index_fname: Optional[Path]
+        The .npz file with the index of the corpus. Default is 'ipus_index.npz' inside corpus_path.
+    n_jobs: Optional[int]
+        The amount of processes among which the .words files are parsed. Default is 1, no extra processes.
+    rebuild: Optional[bool]
+        Whether to parse the .words files even if the index already exists. Default is False.
+    check_stale: Optional[bool]
+        Whether to look for .words files added or modified after the index was saved, and parse
+        them all again if any. Every file of the corpus is listed, removed ones are not noticed.
+        Default is False.
+    Returns
+    -------
+    CorpusIndex
+        The IPUs of every transcript of the corpus.
+    """
+    if index_fname is None:
+        index_fname = Path(corpus_path) / "ipus_index.npz"
+
+    if rebuild is None:
+        rebuild = False
+
+    if check_stale is None:
+        check_stale = False
+
+    if Path(index_fname).exists() and not rebuild:
+        corpus_index = load_corpus_index(index_fname, corpus_path)
+        if not check_stale or not is_corpus_index_stale(corpus_index, index_fname):
+            return corpus_index
+
+    corpus_index = build_corpus_index(corpus_path, n_jobs)
+    corpus_index.save(index_fname)
+    return corpus_index
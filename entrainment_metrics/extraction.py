@@ -0,0 +1,514 @@
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .instrumentation import count, stage
+from .interpausal_unit import (PRAAT_FEATURES, InterPausalUnit,
+                               get_opensmile_extractor, get_pitch_range,
+                               get_praat_script)
+from .ipu_table import InterPausalUnitTable
+from .precision import get_dtype
+from .shared import SharedAudio, audio_file_path
+
+AVAILABLE_FUNCTIONALS: List[str] = ["mean", "std", "min", "max", "range"]
+
+#: Version of the layout of the .npz files written by calculate_praat_tracks
+PRAAT_TRACKS_VERSION: int = 1
+
+
+def calculate_llds(
+    audio_file: Union[Path, SharedAudio],
+    feature_set: Optional[str] = None,
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Extract the opensmile low-level descriptors of a whole wav file in one pass
+
+
+    Parameters
+    ----------
+    audio_file: Union[Path, SharedAudio]
+        A path to a wav file, or the wav file decoded in shared memory (see share_audio).
+    feature_set: Optional[str]
+        The opensmile feature set, any of opensmile.FeatureSet (e.g. "eGeMAPSv02"). Default is "ComParE_2016".
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, List[str]]
+        The middle point in time of each frame, the low-level descriptors
+        with shape (frames, descriptors) and the name of each descriptor.
+    """
+    if feature_set is None:
+        feature_set = "ComParE_2016"
+
+    smile = get_opensmile_extractor(feature_set, "LowLevelDescriptors")
+    with stage("calculate_llds"):
+        if isinstance(audio_file, SharedAudio):
+            llds = smile.process_signal(*audio_file.read())
+        else:
+            llds = smile.process_file(str(audio_file))
+
+    frames_starts = llds.index.get_level_values("start").total_seconds().to_numpy()
+    frames_ends = llds.index.get_level_values("end").total_seconds().to_numpy()
+    return (
+        (frames_starts + frames_ends) / 2,
+        llds.to_numpy(dtype=np.float64),
+        list(llds.columns),
+    )
+
+
+def calculate_functionals(
+    frames_times: np.ndarray,
+    llds: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    functionals: List[str],
+    percentiles: List[float],
+) -> np.ndarray:
+    """
+    Calculate the functionals of the low-level descriptors of the frames
+    whose middle point is inside each interval [start, end).
+
+    Returns an array with shape (intervals, functionals + percentiles,
+    descriptors). Intervals without frames are NaN.
+    """
+    firsts = np.searchsorted(frames_times, starts, side="left")
+    lasts = np.searchsorted(frames_times, ends, side="left")
+    amount_of_frames = (lasts - firsts)[:, np.newaxis]
+    is_empty = amount_of_frames[:, 0] == 0
+
+    res = np.full(
+        (starts.shape[0], len(functionals) + len(percentiles), llds.shape[1]), np.nan
+    )
+    if not llds.shape[0]:
+        return res
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Mean and deviation from prefix sums, centered to keep precision
+        centered_llds = llds - llds.mean(axis=0)
+        sums = np.concatenate(
+            [np.zeros((1, llds.shape[1])), np.cumsum(centered_llds, axis=0)]
+        )
+        square_sums = np.concatenate(
+            [np.zeros((1, llds.shape[1])), np.cumsum(np.square(centered_llds), axis=0)]
+        )
+        centered_means = (sums[lasts] - sums[firsts]) / amount_of_frames
+        variances = (
+            square_sums[lasts] - square_sums[firsts]
+        ) / amount_of_frames - np.square(centered_means)
+        means = centered_means + llds.mean(axis=0)
+        standard_deviations = np.sqrt(np.maximum(variances, 0.0))
+
+    # Minimum and maximum of consecutive (first, last) pairs, a row is added so last can be len(llds)
+    padded_llds = np.concatenate([llds, np.full((1, llds.shape[1]), np.nan)])
+    bounds = np.stack([firsts, lasts], axis=1).ravel()
+    minimums = np.minimum.reduceat(padded_llds, bounds, axis=0)[::2]
+    maximums = np.maximum.reduceat(padded_llds, bounds, axis=0)[::2]
+
+    for i, functional in enumerate(functionals):
+        if functional == "mean":
+            res[:, i] = means
+        elif functional == "std":
+            res[:, i] = standard_deviations
+        elif functional == "min":
+            res[:, i] = minimums
+        elif functional == "max":
+            res[:, i] = maximums
+        elif functional == "range":
+            res[:, i] = maximums - minimums
+        else:
+            raise ValueError("Not a valid functional")
+
+    if percentiles:
+        for j, (first, last) in enumerate(zip(firsts, lasts)):
+            if first < last:
+                res[j, len(functionals) :] = np.percentile(
+                    llds[first:last], percentiles, axis=0
+                )
+
+    res[is_empty] = np.nan
+    return res
+
+
+def calculate_features_from_llds(
+    interpausal_units: List[InterPausalUnit],
+    audio_file: Union[Path, SharedAudio],
+    feature_set: Optional[str] = None,
+    functionals: Optional[List[str]] = None,
+    percentiles: Optional[List[float]] = None,
+) -> InterPausalUnitTable:
+    """
+    Feature extraction for all the InterPausalUnits of a wav file at once
+
+    The low-level descriptors of the feature set are extracted once over
+    the whole file, instead of running opensmile for each IPU, and the
+    functionals of each IPU are calculated over the frames whose middle
+    point is inside it. Each feature is named f"{descriptor}_{functional}",
+    or f"{descriptor}_percentile{percentile}", and stored in the
+    features_values of each InterPausalUnit, as calculate_features does.
+    IPUs without frames inside get NaN values.
+
+    Functionals available: "mean", "std", "min", "max" and "range".
+
+
+    Parameters
+    ----------
+    interpausal_units: List[InterPausalUnit]
+        The InterPausalUnits of the wav file.
+    audio_file: Union[Path, SharedAudio]
+        A path to a wav file, or the wav file decoded in shared memory (see share_audio).
+    feature_set: Optional[str]
+        The opensmile feature set, any of opensmile.FeatureSet (e.g. "eGeMAPSv02"). Default is "ComParE_2016".
+    functionals: Optional[List[str]]
+        The functionals to calculate for each descriptor. Default is ["mean", "std"].
+    percentiles: Optional[List[float]]
+        The percentiles (between 0 and 100) to calculate for each descriptor. Default is none.
+    Returns
+    -------
+    InterPausalUnitTable
+        The features calculated for each InterPausalUnit.
+    """
+    if functionals is None:
+        functionals = ["mean", "std"]
+
+    if percentiles is None:
+        percentiles = []
+
+    if any(functional not in AVAILABLE_FUNCTIONALS for functional in functionals):
+        raise ValueError("Not a valid functional")
+
+    frames_times, llds, descriptors = calculate_llds(audio_file, feature_set)
+    count("calculate_llds", ipus=len(interpausal_units))
+
+    starts = np.array([ipu.start for ipu in interpausal_units], dtype=np.float64)
+    ends = np.array([ipu.end for ipu in interpausal_units], dtype=np.float64)
+    values = calculate_functionals(
+        frames_times, llds, starts, ends, functionals, percentiles
+    )
+
+    functionals_names = functionals + [
+        f"percentile{float(percentile)}" for percentile in percentiles
+    ]
+    features = [
+        f"{descriptor}_{functional}"
+        for functional in functionals_names
+        for descriptor in descriptors
+    ]
+    values = values.reshape(len(interpausal_units), len(features))
+
+    for ipu, row in zip(interpausal_units, values.tolist()):
+        ipu.features_values.update(zip(features, row))
+
+    return InterPausalUnitTable(
+        starts, ends, features, np.asfortranarray(values, dtype=get_dtype())
+    )
+
+
+def calculate_praat_features(
+    interpausal_units: List[InterPausalUnit],
+    audio_file: Union[Path, SharedAudio],
+    pitch_gender: Optional[str] = None,
+    features: Optional[List[str]] = None,
+) -> InterPausalUnitTable:
+    """
+    Praat feature extraction for all the InterPausalUnits of a wav file at once
+
+    The bounds of every IPU are passed in a table to
+    extractStandardAcousticsBatch.praat, which opens the wav file once and
+    runs the same analysis as extractStandardAcoustics.praat for each of
+    them, in a single praat run. The values are the same as the ones of
+    calculate_features with the "praat" extractor, and are stored in the
+    features_values of each InterPausalUnit the same way (undefined values
+    are not stored). In the table, undefined values are NaN.
+
+
+    Parameters
+    ----------
+    interpausal_units: List[InterPausalUnit]
+        The InterPausalUnits of the wav file.
+    audio_file: Union[Path, SharedAudio]
+        A path to a wav file, or a SharedAudio (praat reads the file on its own).
+    pitch_gender: Optional[str]
+        Useful for a more accurate praat extraction. "M" or "F", or None.
+    features: Optional[List[str]]
+        The features to store. Default is every feature extracted.
+    Returns
+    -------
+    InterPausalUnitTable
+        The features calculated for each InterPausalUnit.
+    """
+    from parselmouth.praat import run_file
+
+    if features is None:
+        features = PRAAT_FEATURES
+
+    if any(feature not in PRAAT_FEATURES for feature in features):
+        raise ValueError("Not a valid praat feature")
+
+    min_pitch, max_pitch = get_pitch_range(pitch_gender)
+    starts = np.array([ipu.start for ipu in interpausal_units], dtype=np.float64)
+    ends = np.array([ipu.end for ipu in interpausal_units], dtype=np.float64)
+
+    all_values = np.full((len(interpausal_units), len(PRAAT_FEATURES)), np.nan)
+    if interpausal_units:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            bounds_fname = os.path.join(tmp_dir, "bounds.tsv")
+            with open(bounds_fname, encoding="utf-8", mode="w") as bounds_file:
+                # The bounds are written as the per-IPU extraction passes them
+                bounds_file.write("start\tend\n")
+                for ipu in interpausal_units:
+                    bounds_file.write(f"{str(ipu.start)}\t{str(ipu.end)}\n")
+
+            f = io.StringIO()
+            with stage("calculate_praat_features", ipus=len(interpausal_units)):
+                with redirect_stdout(f):
+                    run_file(
+                        get_praat_script('extractStandardAcousticsBatch.praat'),
+                        os.fspath(audio_file_path(audio_file).resolve()),
+                        bounds_fname,
+                        str(min_pitch),
+                        str(max_pitch),
+                    )
+
+        # Parse results
+        for i, line in enumerate(f.getvalue().rstrip().splitlines()):
+            all_values[i] = [
+                float(value) if value != "--undefined--" else np.nan
+                for value in line.split("\t")
+            ]
+
+    columns = [PRAAT_FEATURES.index(feature) for feature in features]
+    values = np.asfortranarray(all_values[:, columns])
+
+    for ipu, row in zip(interpausal_units, values.tolist()):
+        ipu.features_values.update(
+            (feature, value)
+            for feature, value in zip(features, row)
+            if not np.isnan(value)
+        )
+
+    return InterPausalUnitTable(
+        starts, ends, list(features), values.astype(get_dtype(), copy=False)
+    )
+
+
+def calculate_praat_tracks(
+    audio_file: Union[Path, SharedAudio],
+    pitch_gender: Optional[str] = None,
+    cache: Optional[bool] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate the praat pitch and intensity of a whole wav file
+
+    The pitch is calculated with "To Pitch" and the intensity with
+    "To Intensity", as extractStandardAcoustics.praat does, but once for
+    the whole file. The tracks are saved next to the wav file, as
+    '{name}.praat_tracks.{min_pitch}-{max_pitch}.npz', and loaded from
+    there the next time, unless the wav file changed afterwards. If they
+    can not be saved (e.g. the directory is read-only) they are only returned.
+
+
+    Parameters
+    ----------
+    audio_file: Union[Path, SharedAudio]
+        A path to a wav file, or the wav file decoded in shared memory (see share_audio).
+    pitch_gender: Optional[str]
+        Useful for a more accurate praat extraction. "M" or "F", or None.
+    cache: Optional[bool]
+        Whether to load and save the tracks next to the wav file. Default is True.
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        The "pitch_times" and "pitch_values" (Hz, NaN if unvoiced) of each
+        pitch frame, and the "intensity_times" and "intensity_values" (dB)
+        of each intensity frame.
+    """
+    if cache is None:
+        cache = True
+
+    min_pitch, max_pitch = get_pitch_range(pitch_gender)
+    audio_path = audio_file_path(audio_file)
+    tracks_fname = audio_path.with_name(
+        f"{audio_path.stem}.praat_tracks.{min_pitch}-{max_pitch}.npz"
+    )
+
+    if (
+        cache
+        and tracks_fname.exists()
+        and tracks_fname.stat().st_mtime >= audio_path.stat().st_mtime
+    ):
+        with np.load(tracks_fname, allow_pickle=False) as tracks_file:
+            if int(tracks_file["version"]) == PRAAT_TRACKS_VERSION:
+                return {
+                    track: tracks_file[track]
+                    for track in tracks_file.files
+                    if track != "version"
+                }
+
+    import parselmouth
+
+    with stage("calculate_praat_tracks"):
+        if isinstance(audio_file, SharedAudio):
+            signal, sampling_rate = audio_file.read()
+            sound = parselmouth.Sound(
+                signal.astype(np.float64), sampling_frequency=sampling_rate
+            )
+        else:
+            sound = parselmouth.Sound(os.fspath(audio_file))
+        count("calculate_praat_tracks", audio_bytes=sound.values.nbytes)
+        pitch = sound.to_pitch(pitch_floor=min_pitch, pitch_ceiling=max_pitch)
+        pitch_values = pitch.selected_array["frequency"]
+        intensity = sound.to_intensity(minimum_pitch=min_pitch)
+    tracks = {
+        "pitch_times": pitch.xs(),
+        "pitch_values": np.where(pitch_values > 0, pitch_values, np.nan),
+        "intensity_times": intensity.xs(),
+        "intensity_values": intensity.values[0].copy(),
+    }
+
+    if cache:
+        try:
+            save_praat_tracks(tracks_fname, tracks)
+        except OSError:
+            # e.g. a read-only corpus, the tracks are calculated every time
+            pass
+    return tracks
+
+
+def save_praat_tracks(
+    tracks_fname: Path,
+    tracks: Dict[str, np.ndarray],
+) -> None:
+    """
+    Save the tracks of calculate_praat_tracks to tracks_fname. They are
+    written to a temporary file in the same directory first, so an
+    interrupted write does not leave a truncated tracks file behind.
+    """
+    tracks_fd, tmp_tracks_fname = tempfile.mkstemp(
+        prefix=f"{tracks_fname.name}.", suffix=".tmp", dir=tracks_fname.parent
+    )
+    try:
+        with os.fdopen(tracks_fd, mode="wb") as tracks_file:
+            np.savez(tracks_file, version=np.array(PRAAT_TRACKS_VERSION), **tracks)
+        os.replace(tmp_tracks_fname, tracks_fname)
+    except BaseException:
+        os.remove(tmp_tracks_fname)
+        raise
+
+
+def calculate_features_from_praat_tracks(
+    interpausal_units: List[InterPausalUnit],
+    audio_file: Union[Path, SharedAudio],
+    pitch_gender: Optional[str] = None,
+    features: Optional[List[str]] = None,
+    cache: Optional[bool] = None,
+) -> InterPausalUnitTable:
+    """
+    Praat feature extraction for all the InterPausalUnits of a wav file
+    from the pitch and intensity of the whole file
+
+    The tracks of calculate_praat_tracks are calculated (or loaded) once,
+    and the features of each IPU are the statistics of the frames whose
+    time is inside it, so the analysis near the bounds of an IPU uses the
+    audio around it. The features have the names of the ones of the
+    "praat" extractor, but are statistics of the frames of the whole file
+    tracks (without parabolic interpolation), so they are close to but not
+    the same values. As in extractStandardAcoustics.praat, IPUs not longer
+    than 6.4 / min_pitch only get SECONDS. Undefined values are not stored
+    in the InterPausalUnits and are NaN in the table.
+
+
+    Parameters
+    ----------
+    interpausal_units: List[InterPausalUnit]
+        The InterPausalUnits of the wav file.
+    audio_file: Union[Path, SharedAudio]
+        A path to a wav file, or the wav file decoded in shared memory (see share_audio).
+    pitch_gender: Optional[str]
+        Useful for a more accurate praat extraction. "M" or "F", or None.
+    features: Optional[List[str]]
+        The features to store. Default is every feature extracted.
+    cache: Optional[bool]
+        Whether to load and save the tracks next to the wav file. Default is True.
+    Returns
+    -------
+    InterPausalUnitTable
+        The features calculated for each InterPausalUnit.
+    """
+    if features is None:
+        features = PRAAT_FEATURES
+
+    if any(feature not in PRAAT_FEATURES for feature in features):
+        raise ValueError("Not a valid praat feature")
+
+    min_pitch, _ = get_pitch_range(pitch_gender)
+    tracks = calculate_praat_tracks(audio_file, pitch_gender, cache)
+    count("calculate_praat_tracks", ipus=len(interpausal_units))
+    pitch_times = tracks["pitch_times"]
+    pitch_values = tracks["pitch_values"]
+    intensity_times = tracks["intensity_times"]
+    intensity_values = tracks["intensity_values"]
+
+    starts = np.array([ipu.start for ipu in interpausal_units], dtype=np.float64)
+    ends = np.array([ipu.end for ipu in interpausal_units], dtype=np.float64)
+    pitch_firsts = np.searchsorted(pitch_times, starts, side="left")
+    pitch_lasts = np.searchsorted(pitch_times, ends, side="left")
+    intensity_firsts = np.searchsorted(intensity_times, starts, side="left")
+    intensity_lasts = np.searchsorted(intensity_times, ends, side="left")
+
+    all_values = np.full((len(interpausal_units), len(PRAAT_FEATURES)), np.nan)
+    all_values[:, 0] = ends - starts
+    for i in np.flatnonzero(ends - starts > 6.4 / min_pitch):
+        ipu_pitch_values = pitch_values[pitch_firsts[i] : pitch_lasts[i]]
+        voiced = ~np.isnan(ipu_pitch_values)
+        voiced_times = pitch_times[pitch_firsts[i] : pitch_lasts[i]][voiced]
+        voiced_values = ipu_pitch_values[voiced]
+        if voiced_values.size:
+            all_values[i, 1:6] = [
+                voiced_values.max(),
+                voiced_values.min(),
+                voiced_values.mean(),
+                np.median(voiced_values),
+                voiced_values.std(ddof=1) if voiced_values.size > 1 else np.nan,
+            ]
+        if voiced_values.size > 1:
+            all_values[i, 6] = np.abs(np.diff(voiced_values)).sum() / (
+                voiced_times[-1] - voiced_times[0]
+            )
+        if ipu_pitch_values.size:
+            all_values[i, 11] = voiced.sum() / ipu_pitch_values.size
+
+        ipu_intensity_values = intensity_values[
+            intensity_firsts[i] : intensity_lasts[i]
+        ]
+        if ipu_intensity_values.size:
+            all_values[i, 7:11] = [
+                ipu_intensity_values.max(),
+                ipu_intensity_values.min(),
+                ipu_intensity_values.mean(),
+                (
+                    ipu_intensity_values.std(ddof=1)
+                    if ipu_intensity_values.size > 1
+                    else np.nan
+                ),
+            ]
+
+    # Rounded as the praat scripts print them
+    all_values = np.round(all_values, 3)
+
+    columns = [PRAAT_FEATURES.index(feature) for feature in features]
+    values = np.asfortranarray(all_values[:, columns])
+
+    for ipu, row in zip(interpausal_units, values.tolist()):
+        ipu.features_values.update(
+            (feature, value)
+            for feature, value in zip(features, row)
+            if not np.isnan(value)
+        )
+
+    return InterPausalUnitTable(
+        starts, ends, list(features), values.astype(get_dtype(), copy=False)
+    )
@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# The Profiler recording in the current thread or task, None when not profiling
+ACTIVE_PROFILER: ContextVar[Optional["Profiler"]] = ContextVar(
+    "active_profiler", default=None
+)
+
+
+class StageStats:
+    """
+    What a Profiler recorded for a stage.
+
+
+    Attributes
+    ----------
+    wall_time: float
+        The seconds spent in the stage, adding up every call.
+
+    calls: int
+        The amount of times the stage was run.
+
+    ipus: int
+        The amount of InterPausalUnits processed in the stage.
+
+    audio_bytes: int
+        The bytes of audio read in the stage.
+    """
+
+    def __init__(self) -> None:
+        self.wall_time = 0.0
+        self.calls = 0
+        self.ipus = 0
+        self.audio_bytes = 0
+
+    def __repr__(self):
+        return f"StageStats(wall_time={self.wall_time}, calls={self.calls}, ipus={self.ipus}, audio_bytes={self.audio_bytes})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_time": self.wall_time,
+            "calls": self.calls,
+            "ipus": self.ipus,
+            "audio_bytes": self.audio_bytes,
+        }
+
+
+class Profiler:
+    """
+    Records the time spent and the work done in each stage of the library
+    while it is active, as a context manager:
+
+        with Profiler() as profiler:
+            ipu.calculate_features(audio_file, extractor="praat")
+        profiler.to_json("profile.json")
+
+    Nothing is recorded, and the cost is a single check per stage, when no
+    Profiler is active. Stages run inside other stages (e.g. the feature
+    extraction inside tama.calculate_time_series) are recorded in both, so
+    the wall times of nested stages overlap.
+
+    Stages recorded:
+        - calculate_features.{extractor}: InterPausalUnit.calculate_features.
+          The audio bytes are the ones read in Python, praat reads the
+          audio file on its own.
+        - calculate_llds, calculate_praat_features, calculate_praat_tracks:
+          the whole-file extraction of entrainment_metrics.extraction.
+        - tama.calculate_time_series
+        - TimeSeries.fit: the construction of a TimeSeries.
+        - TimeSeries.predict
+        - calculate_metric.{metric}
+
+
+    Attributes
+    ----------
+    stages: Dict[str, StageStats]
+        What was recorded for each stage, by name.
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, StageStats] = {}
+        self._tokens: List[Token] = []
+        # Stages may be recorded from several threads, e.g. by an AsyncRunner
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "Profiler":
+        self._tokens.append(ACTIVE_PROFILER.set(self))
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        ACTIVE_PROFILER.reset(self._tokens.pop())
+
+    def __repr__(self):
+        return f"Profiler(stages={list(self.stages)})"
+
+    def record(
+        self,
+        stage_name: str,
+        wall_time: float = 0.0,
+        calls: int = 0,
+        ipus: int = 0,
+        audio_bytes: int = 0,
+    ) -> None:
+        """
+        Add to what was recorded for the stage.
+        """
+        with self._lock:
+            if stage_name not in self.stages:
+                self.stages[stage_name] = StageStats()
+            stage_stats = self.stages[stage_name]
+            stage_stats.wall_time += wall_time
+            stage_stats.calls += calls
+            stage_stats.ipus += ipus
+            stage_stats.audio_bytes += audio_bytes
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns what was recorded for each stage, as plain dictionaries.
+        """
+        return {
+            stage_name: stage_stats.to_dict()
+            for stage_name, stage_stats in self.stages.items()
+        }
+
+    def to_json(
+        self,
+        fname: Optional[Path] = None,
+    ) -> str:
+        """
+        Returns what was recorded for each stage as JSON, also written to fname if given.
+        """
+        profile_json = json.dumps(self.to_dict(), indent=2)
+        if fname is not None:
+            with open(fname, encoding="utf-8", mode="w") as profile_file:
+                profile_file.write(profile_json)
+        return profile_json
+
+
+def get_profiler() -> Optional[Profiler]:
+    """
+    Return the active Profiler, None if not profiling.
+    """
+    return ACTIVE_PROFILER.get()
+
+
+@contextmanager
+def stage(
+    stage_name: str,
+    ipus: int = 0,
+) -> Iterator[None]:
+    """
+    Record the wall time of the block, as a call to the stage that
+    processes ipus InterPausalUnits, in the active Profiler if any.
+    """
+    profiler = ACTIVE_PROFILER.get()
+    if profiler is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.record(stage_name, time.perf_counter() - start, 1, ipus)
+
+
+def count(
+    stage_name: str,
+    ipus: int = 0,
+    audio_bytes: int = 0,
+) -> None:
+    """
+    Add the counters to the stage in the active Profiler if any.
+    """
+    profiler = ACTIVE_PROFILER.get()
+    if profiler is not None:
+        profiler.record(stage_name, ipus=ipus, audio_bytes=audio_bytes)
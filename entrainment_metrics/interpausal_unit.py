@@ -1,17 +1,113 @@
 import io
 import os
+import tempfile
 from contextlib import redirect_stdout
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
 
-import audiofile
 import numpy as np
-import opensmile
-import pandas as pd
-from allosaurus.app import read_recognizer
-from parselmouth.praat import run_file
 from scipy.io import wavfile
 
+from .instrumentation import count, stage
+from .shared import SharedAudio, audio_file_path
+
+# The extractors (opensmile, praat, allosaurus) are imported when first
+# used, importing them takes seconds and most code only needs one of them.
+if TYPE_CHECKING:
+    import opensmile
+    import pandas as pd
+    from allosaurus.app import Recognizer
+
+# opensmile extractors already configured, by feature set and level.
+# Building one takes longer than processing an IPU with it.
+OPENSMILE_EXTRACTORS: Dict[Tuple[str, str], "opensmile.Smile"] = {}
+
+
+def get_opensmile_extractor(
+    feature_set: str,
+    feature_level: Optional[str] = None,
+) -> "opensmile.Smile":
+    """
+    Return the opensmile extractor of the feature set and feature level given
+    (default is "Functionals"), building it only the first time.
+    """
+    import opensmile
+
+    if feature_level is None:
+        feature_level = "Functionals"
+
+    if feature_set not in opensmile.FeatureSet.__members__:
+        raise ValueError("Not a valid opensmile feature set")
+
+    if feature_level not in opensmile.FeatureLevel.__members__:
+        raise ValueError("Not a valid opensmile feature level")
+
+    if (feature_set, feature_level) not in OPENSMILE_EXTRACTORS:
+        OPENSMILE_EXTRACTORS[(feature_set, feature_level)] = opensmile.Smile(
+            feature_set=opensmile.FeatureSet[feature_set],
+            feature_level=opensmile.FeatureLevel[feature_level],
+        )
+    return OPENSMILE_EXTRACTORS[(feature_set, feature_level)]
+
+
+# allosaurus recognizers already loaded, by model name. Loading one takes
+# seconds, far longer than recognizing the phones of an IPU.
+SPEECH_RECOGNIZERS: Dict[str, "Recognizer"] = {}
+
+
+def get_speech_recognizer(model_name: Optional[str] = None) -> "Recognizer":
+    """
+    Return the allosaurus recognizer of the model given (default is
+    "latest"), loading it only the first time.
+    """
+    from allosaurus.app import read_recognizer
+
+    if model_name is None:
+        model_name = "latest"
+
+    if model_name not in SPEECH_RECOGNIZERS:
+        SPEECH_RECOGNIZERS[model_name] = read_recognizer(model_name)
+    return SPEECH_RECOGNIZERS[model_name]
+
+
+# Features printed by the praat scripts, in the order extractStandardAcousticsBatch.praat prints them
+PRAAT_FEATURES: List[str] = [
+    "SECONDS",
+    "F0_MAX",
+    "F0_MIN",
+    "F0_MEAN",
+    "F0_MEDIAN",
+    "F0_STDV",
+    "F0_MAS",
+    "ENG_MAX",
+    "ENG_MIN",
+    "ENG_MEAN",
+    "ENG_STDV",
+    "VCD2TOT_FRAMES",
+]
+
+
+def get_pitch_range(pitch_gender: Optional[str]) -> Tuple[int, int]:
+    """
+    Return the minimum and maximum pitch for praat of the pitch gender given,
+    "M" or "F", or None.
+    """
+    if pitch_gender == "M":
+        return 50, 300
+    elif pitch_gender == "F":
+        return 75, 500
+    elif pitch_gender is None:
+        return 50, 500
+    else:
+        raise ValueError("Not a valid pitch gender")
+
+
+def get_praat_script(script_name: str) -> str:
+    """
+    Return the absolute path of one of the praat scripts of the package.
+    """
+    return os.path.abspath(os.path.join(os.path.dirname(__file__), script_name))
+
 
 class InterPausalUnit:
     """
@@ -66,21 +162,32 @@ class InterPausalUnit:
 
     def calculate_features(
         self,
-        audio_file: Path,
+        audio_file: Union[Path, SharedAudio],
         pitch_gender: Optional[str] = None,
         extractor: Optional[str] = None,
+        features: Optional[List[str]] = None,
+        feature_set: Optional[str] = None,
     ) -> Optional[Dict[str, float]]:
         """
         Feature extraction for an InterPausalUnit.
 
+        Only the features requested are stored. For opensmile, a smaller
+        feature set than the default ComParE_2016 (6373 functionals), such as
+        "eGeMAPSv02" (88 functionals), makes the extraction faster.
+
         Parameters
         ----------
-        audio_file: Path
-            A path to a wav file.
+        audio_file: Union[Path, SharedAudio]
+            A path to a wav file, or the wav file decoded in shared memory
+            (see share_audio), whose samples opensmile uses without reading the file.
         pitch_gender: Optional[str]
             Useful for a more accurate praat extraction. "M" or "F", or None.
         extractor: Optional[str]
             The extractor to calculate features. It can be either "praat" ,"opensmile", or "allosaurus"/"speech-rate". Default is "opensmile".
+        features: Optional[List[str]]
+            The features to store, for the praat and opensmile extractors. Default is every feature extracted.
+        feature_set: Optional[str]
+            The opensmile feature set, any of opensmile.FeatureSet (e.g. "eGeMAPSv02"). Default is "ComParE_2016".
         Returns
         -------
         Dict[str, float]
@@ -95,19 +202,28 @@ class InterPausalUnit:
             pass
         elif extractor not in available_extractors:
             raise ValueError('Not a valid extractor')
-        elif extractor == "praat":
-            self._calculate_praat_features(audio_file, pitch_gender)  # type: ignore
-        elif extractor == "opensmile":
-            self._calculate_opensmile_features(audio_file)  # type: ignore
-        elif extractor in ["speech-rate", "allosaurus"]:
-            self._calculate_speech_rate(audio_file)
+        else:
+            # "allosaurus" is recorded as "speech-rate", both are the same extractor
+            extractor_name = "speech-rate" if extractor == "allosaurus" else extractor
+            with stage(f"calculate_features.{extractor_name}", ipus=1):
+                if extractor == "praat":
+                    self._calculate_praat_features(  # type: ignore
+                        audio_file, pitch_gender, features
+                    )
+                elif extractor == "opensmile":
+                    self._calculate_opensmile_features(  # type: ignore
+                        audio_file, feature_set, features
+                    )
+                elif extractor in ["speech-rate", "allosaurus"]:
+                    self._calculate_speech_rate(audio_file)
 
         return self.features_values
 
     def _calculate_praat_features(
         self,
-        audio_file: Path,
+        audio_file: Union[Path, SharedAudio],
         pitch_gender: Optional[str],
+        features: Optional[List[str]] = None,
     ) -> None:
         """
         Return the IPU values of the standard acoustics features
@@ -116,28 +232,13 @@ class InterPausalUnit:
         This features are calculated with praat using the script
         in praat_scripts
         """
-        min_pitch = None
-        max_pitch = None
-        if pitch_gender == "M":
-            min_pitch = 50
-            max_pitch = 300
-        elif pitch_gender == "F":
-            min_pitch = 75
-            max_pitch = 500
-        elif pitch_gender is None:
-            min_pitch = 50
-            max_pitch = 500
-        else:
-            raise ValueError("Not a valid pitch gender")
+        from parselmouth.praat import run_file
 
-        audio_file = Path(audio_file)
+        min_pitch, max_pitch = get_pitch_range(pitch_gender)
+
+        audio_file = audio_file_path(audio_file)
         audio_file_absolute = os.fspath(audio_file.resolve())
-        praat_script_absolute = os.path.abspath(
-            os.path.join(
-                os.path.dirname(__file__),
-                'extractStandardAcoustics.praat',
-            )
-        )
+        praat_script_absolute = get_praat_script('extractStandardAcoustics.praat')
         f = io.StringIO()
         with redirect_stdout(f):
             run_file(
@@ -154,56 +255,82 @@ class InterPausalUnit:
         features_results: Dict[str, float] = {}
         for line in result:
             feature, value = line.split(":")
-            if value != "--undefined--":
+            if value != "--undefined--" and (features is None or feature in features):
                 features_results[feature] = float(value)
 
         self.features_values.update(features_results)
 
-    def _calculate_opensmile_features(self, audio_file: Path):
-        smile = opensmile.Smile(
-            feature_set=opensmile.FeatureSet.ComParE_2016,
-            feature_level=opensmile.FeatureLevel.Functionals,
-        )
-        signal, sampling_rate = audiofile.read(
-            audio_file,
-            offset=self.start,
-            duration=self.duration(),
-        )
+    def _calculate_opensmile_features(
+        self,
+        audio_file: Union[Path, SharedAudio],
+        feature_set: Optional[str] = None,
+        features: Optional[List[str]] = None,
+    ):
+        if feature_set is None:
+            feature_set = "ComParE_2016"
+
+        smile = get_opensmile_extractor(feature_set)
+        if features is not None:
+            features_not_in_set = [
+                feature for feature in features if feature not in smile.feature_names
+            ]
+            if features_not_in_set:
+                raise ValueError(
+                    f"Features {features_not_in_set} not in feature set {feature_set}"
+                )
+
+        if isinstance(audio_file, SharedAudio):
+            signal, sampling_rate = audio_file.read(
+                offset=self.start,
+                duration=self.duration(),
+            )
+        else:
+            import audiofile
+
+            signal, sampling_rate = audiofile.read(
+                audio_file,
+                offset=self.start,
+                duration=self.duration(),
+            )
+        count("calculate_features.opensmile", audio_bytes=signal.nbytes)
         opensmile_features_csv = smile.process_signal(signal, sampling_rate)
+        if features is not None:
+            opensmile_features_csv = opensmile_features_csv[features]
         self.features_values.update(
             self._convert_opensmile_output(opensmile_features_csv)
         )
 
-    def _convert_opensmile_output(self, df: pd.DataFrame) -> Dict[str, float]:
+    def _convert_opensmile_output(self, df: "pd.DataFrame") -> Dict[str, float]:
         return df.to_dict(orient='records')[0]
 
-    def _calculate_speech_rate(self, audio_file: Path, lang_id: Optional[str] = None):
+    def _calculate_speech_rate(
+        self, audio_file: Union[Path, SharedAudio], lang_id: Optional[str] = None
+    ):
         if lang_id is None:
             lang_id = "ipa"
         # Create cropped wav
-        audio_file = Path(audio_file)
+        audio_file = audio_file_path(audio_file)
         audio_file_absolute = os.fspath(audio_file.resolve())
         samplerate, data = wavfile.read(audio_file)
+        count("calculate_features.speech-rate", audio_bytes=data.nbytes)
         wav_start, wav_end = int(self.start * samplerate), int(self.end * samplerate)
         cropped_wav: np.ndarray = data[wav_start:wav_end]
 
-        # Temporary save the cropped wav
-        cropped_wav_path = os.path.abspath(
-            os.path.join(
-                os.path.dirname(__file__),
-                'temp_crop.wav',
-            )
-        )
-        wavfile.write(cropped_wav_path, samplerate, cropped_wav)
+        # Temporary save the cropped wav, in a file of its own so that
+        # IPUs can be processed at once (e.g. by the scoring server)
+        cropped_wav_fd, cropped_wav_path = tempfile.mkstemp(suffix='.wav')
+        os.close(cropped_wav_fd)
+        try:
+            wavfile.write(cropped_wav_path, samplerate, cropped_wav)
 
-        # Phonemize wav
-        model = read_recognizer()
-        ipu_phones = model.recognize(cropped_wav_path, lang_id=lang_id)
+            # Phonemize wav
+            model = get_speech_recognizer()
+            ipu_phones = model.recognize(cropped_wav_path, lang_id=lang_id)
+        finally:
+            # Remove tempoary wav
+            os.remove(cropped_wav_path)
 
         # Calculate speech rate
         ipu_phones_qty = len(ipu_phones.split())
         ipu_speech_rate = ipu_phones_qty / self.duration()
         self.features_values.update({"speech_rate": ipu_speech_rate})
-
-        # Remove tempoary wav
-        os.remove(cropped_wav_path)
@@ -0,0 +1,241 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+import numpy as np
+
+from .interpausal_unit import InterPausalUnit
+from .precision import get_dtype
+
+#: Version of the layout of the directories written by InterPausalUnitTable.save
+IPU_TABLE_VERSION: int = 1
+
+
+def write_schema(
+    path: Path,
+    schema: Dict[str, Any],
+) -> None:
+    """
+    Write the schema.json of a saved directory. It is written last, so a
+    directory without it was not completely saved.
+    """
+    with open(Path(path) / "schema.json", encoding="utf-8", mode="w") as schema_file:
+        json.dump(schema, schema_file, indent=2)
+
+
+def read_schema(
+    path: Path,
+    format_name: str,
+    version: int,
+) -> Dict[str, Any]:
+    """
+    Read the schema.json of a saved directory and check its format and version.
+    """
+    schema_fname = Path(path) / "schema.json"
+    if not schema_fname.exists():
+        raise ValueError(f"Not a saved {format_name}: {schema_fname} does not exist")
+
+    with open(schema_fname, encoding="utf-8", mode="r") as schema_file:
+        schema: Dict[str, Any] = json.load(schema_file)
+
+    if schema.get("format") != format_name:
+        raise ValueError(f"Not a saved {format_name}: format is {schema.get('format')}")
+    if schema.get("version") != version:
+        raise ValueError(
+            f"{format_name} version {schema.get('version')} not supported, expected {version}"
+        )
+    return schema
+
+
+class InterPausalUnitTable:
+    """
+    The bounds and feature values of many InterPausalUnits as arrays.
+
+    Saved as a directory with:
+        - schema.json: {"format": "ipu_table", "version": 1,
+          "amount_of_ipus": n, "features": [feature names]}
+        - starts.npy, ends.npy: float64 arrays with shape (n,).
+        - feature_values.npy: array with shape (n, amount of features)
+          and the dtype of the values (float64 or float32), in Fortran order so the values of each feature are
+          contiguous and can be read alone from a memory-mapped file.
+          Missing (None or NaN) values are NaN.
+
+
+    Attributes
+    ----------
+    starts: np.ndarray
+        The start of each IPU.
+
+    ends: np.ndarray
+        The end of each IPU.
+
+    features: List[str]
+        The name of each column of values.
+
+    values: np.ndarray
+        The value of each feature (columns) for each IPU (rows), NaN if missing.
+        Tables built by the library have the dtype of the precision policy
+        (see set_dtype), the bounds are always float64.
+    """
+
+    def __init__(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        features: List[str],
+        values: np.ndarray,
+    ) -> None:
+        if values.shape != (starts.shape[0], len(features)):
+            raise ValueError(
+                "values must have a row for each IPU and a column for each feature"
+            )
+
+        self.starts = starts
+        self.ends = ends
+        self.features = list(features)
+        self.values = values
+
+        self._columns: Dict[str, int] = {
+            feature: j for j, feature in enumerate(self.features)
+        }
+
+    def __repr__(self):
+        return f"InterPausalUnitTable(interpausal_units={len(self.starts)}, features={len(self.features)})"
+
+    def __len__(self):
+        return len(self.starts)
+
+    def feature_values(
+        self,
+        feature: str,
+    ) -> np.ndarray:
+        """
+        Returns the value of the feature for each IPU, NaN if missing.
+        """
+        if feature not in self._columns:
+            raise ValueError(f"Feature {feature} not in the table")
+        return self.values[:, self._columns[feature]]
+
+    def interpausal_units(
+        self,
+        features: Optional[List[str]] = None,
+    ) -> List[InterPausalUnit]:
+        """
+        Returns an InterPausalUnit for each row, with the values of the given features. Default is every feature.
+        """
+        if features is None:
+            features = self.features
+
+        columns = np.column_stack(
+            [self.feature_values(feature) for feature in features]
+            + [np.empty((len(self), 0))]
+        )
+        return [
+            InterPausalUnit(start, end, dict(zip(features, row)))
+            for start, end, row in zip(
+                self.starts.tolist(), self.ends.tolist(), columns.tolist()
+            )
+        ]
+
+    def save(
+        self,
+        path: Path,
+    ) -> None:
+        """
+        Save the table to the directory path, creating it if needed.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(Path(path) / "starts.npy", np.asarray(self.starts, dtype=np.float64))
+        np.save(Path(path) / "ends.npy", np.asarray(self.ends, dtype=np.float64))
+        np.save(
+            Path(path) / "feature_values.npy",
+            np.asfortranarray(self.values),
+        )
+        write_schema(
+            path,
+            {
+                "format": "ipu_table",
+                "version": IPU_TABLE_VERSION,
+                "amount_of_ipus": len(self),
+                "features": self.features,
+            },
+        )
+
+
+def interpausal_units_table(
+    interpausal_units: List[InterPausalUnit],
+    features: Optional[List[str]] = None,
+) -> InterPausalUnitTable:
+    """
+    Build an InterPausalUnitTable from a list of InterPausalUnits
+
+
+    Parameters
+    ----------
+    interpausal_units: List[InterPausalUnit]
+        The InterPausalUnits to put in the table.
+    features: Optional[List[str]]
+        The features to keep. Default is every feature extracted for some IPU, in the order they are found.
+    Returns
+    -------
+    InterPausalUnitTable
+        A row for each InterPausalUnit, in the order given.
+    """
+    if features is None:
+        features = list(
+            dict.fromkeys(
+                feature
+                for ipu in interpausal_units
+                for feature in ipu.features_values or {}
+            )
+        )
+
+    rows: List[List[Optional[float]]] = []
+    for ipu in interpausal_units:
+        features_values = ipu.features_values or {}
+        if list(features_values) == features:
+            # Usually every IPU has the same features, extracted in the same order
+            rows.append(list(features_values.values()))
+        else:
+            rows.append([features_values.get(feature) for feature in features])
+
+    values = np.array(rows, dtype=get_dtype(), order="F").reshape(
+        len(interpausal_units), len(features)
+    )
+
+    return InterPausalUnitTable(
+        starts=np.array([ipu.start for ipu in interpausal_units], dtype=np.float64),
+        ends=np.array([ipu.end for ipu in interpausal_units], dtype=np.float64),
+        features=features,
+        values=values,
+    )
+
+
+def load_interpausal_units_table(
+    path: Path,
+    mmap_mode: Optional[Literal["r+", "r", "w+", "c"]] = None,
+) -> InterPausalUnitTable:
+    """
+    Load a table saved with InterPausalUnitTable.save
+
+
+    Parameters
+    ----------
+    path: Path
+        The directory the table was saved to.
+    mmap_mode: Optional[Literal["r+", "r", "w+", "c"]]
+        Passed to np.load. With "r", the values are memory-mapped and only
+        the columns of the features used are read from disk. Default is None, everything is read.
+    Returns
+    -------
+    InterPausalUnitTable
+        The table saved.
+    """
+    schema = read_schema(path, "ipu_table", IPU_TABLE_VERSION)
+    return InterPausalUnitTable(
+        starts=np.load(Path(path) / "starts.npy"),
+        ends=np.load(Path(path) / "ends.npy"),
+        features=schema["features"],
+        values=np.load(Path(path) / "feature_values.npy", mmap_mode=mmap_mode),
+    )
@@ -0,0 +1,355 @@
+import base64
+import json
+import os
+import socketserver
+import stat
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .extraction import calculate_praat_features
+from .interpausal_unit import (InterPausalUnit, get_opensmile_extractor,
+                               get_speech_recognizer)
+from .utils import get_interpausal_units
+
+#: The scores the server calculates, each one at POST /{endpoint}
+AVAILABLE_ENDPOINTS: List[str] = ["knn", "tama"]
+
+#: The extractors warm_up can load
+AVAILABLE_EXTRACTORS: List[str] = ["praat", "opensmile", "speech-rate"]
+
+
+def request_file(
+    request: Dict[str, Any],
+    name: str,
+    suffix: str,
+    directory: Path,
+) -> Path:
+    """
+    Return the path of a file of the request: request[f"{name}_file"] if
+    given, or else request[name] (a base64 encoded wav file, or the text of a
+    .words file) saved to directory.
+    """
+    if request.get(f"{name}_file") is not None:
+        path = Path(request[f"{name}_file"])
+        if not path.is_file():
+            raise FileNotFoundError(f"No such file: {path}")
+        return path
+    if request.get(name) is None:
+        raise ValueError(f"Neither {name}_file nor {name} given")
+
+    path = directory / f"{name}{suffix}"
+    if suffix == ".wav":
+        path.write_bytes(base64.b64decode(request[name]))
+    else:
+        path.write_text(request[name], encoding="utf-8")
+    return path
+
+
+def request_speakers(
+    request: Dict[str, Any],
+    directory: Path,
+) -> List[Tuple[Path, Path, Optional[str]]]:
+    """
+    Return the wav file, the .words file and the pitch gender of speakers
+    A and B of the request.
+    """
+    return [
+        (
+            request_file(request, f"audio_{speaker}", ".wav", directory),
+            request_file(request, f"words_{speaker}", ".words", directory),
+            request.get(f"pitch_gender_{speaker}"),
+        )
+        for speaker in ["a", "b"]
+    ]
+
+
+def score_knn(
+    request: Dict[str, Any],
+    directory: Path,
+) -> Dict[str, Any]:
+    """
+    Calculate a metric over the TimeSeries of both speakers, as
+    scripts/run_knn.py does. Praat features of each speaker are extracted
+    with a single run of praat (see calculate_praat_features).
+    """
+    from .continuous import (TimeSeries, calculate_common_support,
+                             calculate_metric)
+
+    if request.get("feature") is None or request.get("metric") is None:
+        raise ValueError("Not a valid request, feature and metric are needed")
+
+    time_series: List[TimeSeries] = []
+    res: Dict[str, Any] = {}
+    for speaker, (wav_fname, words_fname, pitch_gender) in zip(
+        ["a", "b"], request_speakers(request, directory)
+    ):
+        ipus: List[InterPausalUnit] = get_interpausal_units(words_fname)
+        res[f"ipus_{speaker}"] = len(ipus)
+        if request.get("extractor") == "praat":
+            calculate_praat_features(ipus, wav_fname, pitch_gender)
+        else:
+            for ipu in ipus:
+                ipu.calculate_features(
+                    audio_file=wav_fname,
+                    pitch_gender=pitch_gender,
+                    extractor=request.get("extractor"),
+                )
+        time_series.append(
+            TimeSeries(
+                interpausal_units=ipus,
+                feature=request["feature"],
+                method="knn",
+                k=request.get("k"),
+            )
+        )
+
+    time_series_a, time_series_b = time_series
+    common_start, common_end = calculate_common_support(time_series_a, time_series_b)
+    res["common_support"] = [common_start, common_end]
+    res[request["metric"]] = float(
+        calculate_metric(
+            request["metric"],
+            time_series_a,
+            time_series_b,
+            common_start,
+            common_end,
+        )
+    )
+    return res
+
+
+def score_tama(
+    request: Dict[str, Any],
+    directory: Path,
+) -> Dict[str, Any]:
+    """
+    Calculate the sample cross-correlations of the TAMA time series of
+    both speakers, as scripts/run_tama.py does.
+    """
+    from . import tama
+
+    if request.get("feature") is None or request.get("lags") is None:
+        raise ValueError("Not a valid request, feature and lags are needed")
+
+    time_series: List[List[float]] = []
+    res: Dict[str, Any] = {}
+    for speaker, (wav_fname, words_fname, pitch_gender) in zip(
+        ["a", "b"], request_speakers(request, directory)
+    ):
+        frames = tama.get_frames(wav_fname, words_fname)
+        res[f"frames_{speaker}"] = len(frames)
+        time_series.append(
+            tama.calculate_time_series(
+                request["feature"],
+                frames,
+                wav_fname,
+                request.get("extractor"),
+                pitch_gender,
+            )
+        )
+        res[f"time_series_{speaker}"] = time_series[-1]
+
+    if res["frames_a"] != res["frames_b"]:
+        raise ValueError("The amount of frames of each speaker is different")
+
+    time_series_a, time_series_b = time_series
+    res["sample_cross_correlations"] = [
+        float(correlation)
+        for correlation in tama.calculate_sample_correlation(
+            time_series_a, time_series_b, int(request["lags"])
+        )
+    ]
+    return res
+
+
+def score(
+    endpoint: str,
+    request: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    Calculate the scores of an endpoint ("knn" or "tama") for a request
+
+    Each file of a request is given either as a path the server can read
+    ("audio_a_file", "words_a_file", "audio_b_file", "words_b_file") or
+    uploaded: "audio_a" and "audio_b" with the base64 encoded wav file,
+    "words_a" and "words_b" with the text of the .words file.
+
+    Both endpoints take "feature", "extractor", "pitch_gender_a" and
+    "pitch_gender_b", "knn" also takes "metric" and "k" and "tama" also
+    takes "lags", as the options of scripts/run_knn.py and scripts/run_tama.py.
+
+
+    Parameters
+    ----------
+    endpoint: str
+        "knn" or "tama".
+    request: Dict[str, Any]
+        The files and options of the request.
+    Returns
+    -------
+    Dict[str, Any]
+        The scores, and the amount of IPUs or frames of each speaker.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        if endpoint == "knn":
+            return score_knn(request, Path(directory))
+        elif endpoint == "tama":
+            return score_tama(request, Path(directory))
+        else:
+            raise ValueError("Not a valid endpoint")
+
+
+def warm_up(
+    extractors: Optional[List[str]] = None,
+    feature_sets: Optional[List[str]] = None,
+) -> None:
+    """
+    Load the extractors given (default is every one of AVAILABLE_EXTRACTORS)
+    so that the first requests do not pay for it: opensmile builds the
+    extractors of the feature sets given (default is "ComParE_2016"),
+    praat imports parselmouth and speech-rate loads the allosaurus recognizer.
+    """
+    if extractors is None:
+        extractors = AVAILABLE_EXTRACTORS
+    if feature_sets is None:
+        feature_sets = ["ComParE_2016"]
+
+    for extractor in extractors:
+        if extractor == "opensmile":
+            for feature_set in feature_sets:
+                get_opensmile_extractor(feature_set)
+        elif extractor == "praat":
+            import parselmouth  # noqa: F401 pylint: disable=unused-import
+        elif extractor in ["speech-rate", "allosaurus"]:
+            get_speech_recognizer()
+        else:
+            raise ValueError('Not a valid extractor')
+
+    # knn TimeSeries import sklearn when the first one is fitted
+    import sklearn.neighbors  # noqa: F401 pylint: disable=unused-import
+
+    from . import continuous, tama  # noqa: F401 pylint: disable=unused-import
+
+
+class ScoringRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers GET /health and POST /knn and /tama, whose body is the JSON
+    request given to score, with the JSON of the scores. Invalid requests
+    are answered with status 400 and {"error": message}, and requests
+    whose scoring fails otherwise with status 500.
+    """
+
+    server: Union["ScoringHTTPServer", "ScoringUnixServer"]
+
+    def address_string(self) -> str:
+        # Clients of a unix socket have no address
+        return self.client_address[0] if self.client_address else "unix socket"
+
+    def send_json(self, status: int, body: Dict[str, Any]) -> None:
+        content = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"error": f"Not a valid path: {self.path}"})
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        endpoint = self.path.strip("/")
+        if endpoint not in AVAILABLE_ENDPOINTS:
+            self.send_json(404, {"error": f"Not a valid path: {self.path}"})
+            return
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if not isinstance(request, dict):
+                raise ValueError("Not a valid request, a JSON object is needed")
+            with self.server.slots:
+                res = score(endpoint, request)
+        except (ValueError, KeyError, TypeError, OSError) as e:
+            self.send_json(400, {"error": f"{type(e).__name__}: {e}"})
+            return
+        except Exception as e:  # pylint: disable=broad-except
+            # e.g. the extractors failing, the server keeps serving
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self.send_json(200, res)
+
+
+class ScoringHTTPServer(ThreadingHTTPServer):
+    """
+    The scoring server over TCP, see create_server.
+    """
+
+    daemon_threads = True
+    slots: threading.Semaphore
+
+
+class ScoringUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    The scoring server over a unix socket, see create_server.
+    """
+
+    daemon_threads = True
+    slots: threading.Semaphore
+
+
+def create_server(
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    unix_socket: Optional[Path] = None,
+    max_concurrency: Optional[int] = None,
+) -> Union[ScoringHTTPServer, ScoringUnixServer]:
+    """
+    Create the scoring server, to run with serve_forever
+
+    The server keeps the extractors loaded by warm_up (and the ones loaded
+    by the requests) between requests, so each request only pays for its
+    own computation.
+
+
+    Parameters
+    ----------
+    host: Optional[str]
+        The host to listen on. Default is "127.0.0.1".
+    port: Optional[int]
+        The port to listen on. Default is 8000, 0 picks a free one.
+    unix_socket: Optional[Path]
+        A unix socket to listen on instead of host and port.
+    max_concurrency: Optional[int]
+        The requests scored at once, the rest wait. Default is 1, as
+        extractors are shared by the requests.
+    Returns
+    -------
+    Union[ScoringHTTPServer, ScoringUnixServer]
+        The server.
+    """
+    if max_concurrency is None:
+        max_concurrency = 1
+    if max_concurrency < 1:
+        raise ValueError("Not a valid max_concurrency given")
+
+    server: Union[ScoringHTTPServer, ScoringUnixServer]
+    if unix_socket is not None:
+        # A socket left by a server that did not end cleanly
+        if os.path.exists(unix_socket) and stat.S_ISSOCK(os.stat(unix_socket).st_mode):
+            os.remove(unix_socket)
+        server = ScoringUnixServer(os.fspath(unix_socket), ScoringRequestHandler)
+    else:
+        server = ScoringHTTPServer(
+            (
+                host if host is not None else "127.0.0.1",
+                port if port is not None else 8000,
+            ),
+            ScoringRequestHandler,
+        )
+    server.slots = threading.Semaphore(max_concurrency)
+    return server
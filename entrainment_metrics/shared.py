@@ -0,0 +1,333 @@
+import os
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import (TYPE_CHECKING, Any, Dict, List, Literal, Optional, Tuple,
+                    Union)
+
+import numpy as np
+
+# The table and the IPUs are imported when used, interpausal_unit imports
+# this module to accept SharedAudio.
+if TYPE_CHECKING:
+    from .interpausal_unit import InterPausalUnit
+    from .ipu_table import InterPausalUnitTable
+
+
+class SharedArray:
+    """
+    A handle of a numpy array in shared memory
+
+    Pickling a handle (e.g. to send it to a worker process) only pickles
+    the name of the shared memory block, the shape and the dtype. The
+    array is attached the first time it is used in each process, and
+    every process sees the same memory: nothing is copied.
+
+    The process that shared the array must unlink it when no process
+    needs it anymore. Handles are context managers that unlink on exit.
+
+
+    Attributes
+    ----------
+    name: str
+        The name of the shared memory block.
+
+    shape: Tuple[int, ...]
+        The shape of the array.
+
+    dtype: str
+        The dtype of the array.
+
+    order: Literal["C", "F"]
+        The memory layout of the array, "C" or "F".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        shape: Tuple[int, ...],
+        dtype: str,
+        order: Optional[Literal["C", "F"]] = None,
+        shared_memory: Optional[SharedMemory] = None,
+    ) -> None:
+        self.name = name
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.order: Literal["C", "F"] = order if order is not None else "C"
+        # The block already attached in this process, if any
+        self._shared_memory = shared_memory
+
+    def __repr__(self):
+        return f"SharedArray(name={self.name}, shape={self.shape}, dtype={self.dtype})"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "shape": self.shape,
+            "dtype": self.dtype,
+            "order": self.order,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)  # type: ignore
+
+    def __enter__(self) -> "SharedArray":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.unlink()
+
+    def array(self) -> np.ndarray:
+        """
+        Returns the array, a view of the shared memory.
+        """
+        if self._shared_memory is None:
+            self._shared_memory = SharedMemory(name=self.name)
+        return np.ndarray(
+            self.shape,
+            dtype=self.dtype,
+            buffer=self._shared_memory.buf,
+            order=self.order,
+        )
+
+    def close(self) -> None:
+        """
+        Detach the shared memory from this process. Arrays returned by
+        array() must not be used afterwards.
+        """
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory = None
+
+    def unlink(self) -> None:
+        """
+        Free the shared memory, for every process. Arrays still in use in
+        this process keep it mapped until they are garbage collected.
+        """
+        if self._shared_memory is None:
+            self._shared_memory = SharedMemory(name=self.name)
+        self._shared_memory.unlink()
+        try:
+            self.close()
+        except BufferError:
+            self._shared_memory = None
+
+
+def share_array(array: np.ndarray) -> SharedArray:
+    """
+    Copy the array to a new shared memory block and return its handle. The
+    layout is kept for Fortran ordered arrays, C order is used otherwise.
+    """
+    order: Literal["C", "F"] = (
+        "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+    )
+    # Shared memory blocks can not be empty
+    shared_memory = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared_array = SharedArray(
+        shared_memory.name, array.shape, array.dtype.str, order, shared_memory
+    )
+    shared_array.array()[...] = array
+    return shared_array
+
+
+class SharedAudio:
+    """
+    The decoded audio of a wav file in shared memory, accepted wherever
+    an audio_file is (see share_audio).
+
+
+    Attributes
+    ----------
+    path: Path
+        The wav file, for the extractors that read it on their own.
+
+    signal: SharedArray
+        The float32 samples, as audiofile.read returns them: with shape
+        (samples,) for mono files and (channels, samples) otherwise.
+
+    sampling_rate: int
+        The sampling rate of the audio.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        signal: SharedArray,
+        sampling_rate: int,
+    ) -> None:
+        self.path = Path(path)
+        self.signal = signal
+        self.sampling_rate = sampling_rate
+
+    def __repr__(self):
+        return f"SharedAudio(path={self.path}, signal={self.signal}, sampling_rate={self.sampling_rate})"
+
+    def __enter__(self) -> "SharedAudio":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.unlink()
+
+    def read(
+        self,
+        offset: Optional[float] = None,
+        duration: Optional[float] = None,
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Returns the samples from offset (default is 0) during duration
+        seconds (default is until the end) and the sampling rate, the same
+        ones as audiofile.read, without copying them.
+        """
+        signal = self.signal.array()
+        first = 0 if offset is None else round(offset * self.sampling_rate)
+        last = (
+            signal.shape[-1]
+            if duration is None
+            else first + round(duration * self.sampling_rate)
+        )
+        return signal[..., first:last], self.sampling_rate
+
+    def close(self) -> None:
+        self.signal.close()
+
+    def unlink(self) -> None:
+        self.signal.unlink()
+
+
+def share_audio(audio_file: Path) -> SharedAudio:
+    """
+    Decode a wav file once into shared memory
+
+    The returned SharedAudio can be given to worker processes instead of
+    the path: InterPausalUnit.calculate_features, calculate_llds,
+    calculate_features_from_llds, calculate_praat_tracks,
+    calculate_features_from_praat_tracks, tama.calculate_time_series and
+    tama.get_frames use the shared samples instead of reading the file
+    again. The praat script and speech rate extractors read the file on
+    their own, so they get its path.
+
+
+    Parameters
+    ----------
+    audio_file: Path
+        A path to a wav file.
+    Returns
+    -------
+    SharedAudio
+        The handle of the decoded audio, to unlink when done.
+    """
+    import audiofile
+
+    signal, sampling_rate = audiofile.read(os.fspath(audio_file))
+    return SharedAudio(Path(audio_file), share_array(signal), sampling_rate)
+
+
+def audio_file_path(audio_file: Union[Path, SharedAudio]) -> Path:
+    """
+    Returns the path of the wav file, also for a SharedAudio.
+    """
+    if isinstance(audio_file, SharedAudio):
+        return audio_file.path
+    return Path(audio_file)
+
+
+class SharedInterPausalUnitTable:
+    """
+    An InterPausalUnitTable in shared memory, accepted wherever a list of
+    InterPausalUnits is by TimeSeries and tama.separate_frames (see share_table).
+
+
+    Attributes
+    ----------
+    starts: SharedArray
+        The start of each IPU.
+
+    ends: SharedArray
+        The end of each IPU.
+
+    features: List[str]
+        The name of each column of values.
+
+    values: SharedArray
+        The value of each feature (columns) for each IPU (rows), NaN if missing.
+    """
+
+    def __init__(
+        self,
+        starts: SharedArray,
+        ends: SharedArray,
+        features: List[str],
+        values: SharedArray,
+    ) -> None:
+        self.starts = starts
+        self.ends = ends
+        self.features = list(features)
+        self.values = values
+
+    def __repr__(self):
+        return f"SharedInterPausalUnitTable(interpausal_units={len(self)}, features={len(self.features)})"
+
+    def __len__(self):
+        return self.starts.shape[0]
+
+    def __enter__(self) -> "SharedInterPausalUnitTable":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.unlink()
+
+    def table(self) -> "InterPausalUnitTable":
+        """
+        Returns the InterPausalUnitTable, whose arrays are views of the shared memory.
+        """
+        from .ipu_table import InterPausalUnitTable
+
+        return InterPausalUnitTable(
+            starts=self.starts.array(),
+            ends=self.ends.array(),
+            features=self.features,
+            values=self.values.array(),
+        )
+
+    def interpausal_units(
+        self,
+        features: Optional[List[str]] = None,
+    ) -> List["InterPausalUnit"]:
+        """
+        Returns an InterPausalUnit for each row, with the values of the given features. Default is every feature.
+        """
+        return self.table().interpausal_units(features)
+
+    def close(self) -> None:
+        for shared_array in [self.starts, self.ends, self.values]:
+            shared_array.close()
+
+    def unlink(self) -> None:
+        for shared_array in [self.starts, self.ends, self.values]:
+            shared_array.unlink()
+
+
+def share_table(table: "InterPausalUnitTable") -> SharedInterPausalUnitTable:
+    """
+    Copy an InterPausalUnitTable to shared memory
+
+    The returned handle can be given to worker processes instead of a list
+    of InterPausalUnits, which is pickled IPU by IPU: each worker builds the
+    InterPausalUnits it needs from the shared arrays.
+
+
+    Parameters
+    ----------
+    table: InterPausalUnitTable
+        The table to share, e.g. from interpausal_units_table or the
+        whole-file extraction functions.
+    Returns
+    -------
+    SharedInterPausalUnitTable
+        The handle of the table, to unlink when done.
+    """
+    return SharedInterPausalUnitTable(
+        starts=share_array(table.starts),
+        ends=share_array(table.ends),
+        features=table.features,
+        values=share_array(table.values),
+    )
@@ -1,4 +1,5 @@
 from .entrainment import (calculate_sample_correlation, calculate_time_series,
                           signed_synchrony, unsigned_synchrony)
 from .frame import Frame, MissingFrame
+from .online import OnlineFrames, OnlineSampleCorrelation, OnlineTAMA
 from .utils import get_frames
@@ -3,25 +3,35 @@ from typing import List, Optional, Union
 
 import numpy as np
 
+from entrainment_metrics.instrumentation import stage
+from entrainment_metrics.precision import get_dtype
+from entrainment_metrics.shared import SharedAudio
+
 from .frame import Frame, MissingFrame
 
 
 def calculate_time_series(
     feature: str,
     frames: List[Union[Frame, MissingFrame]],
-    audio_file: Optional[Path] = None,
+    audio_file: Optional[Union[Path, SharedAudio]] = None,
     extractor: Optional[str] = None,
     pitch_gender: Optional[str] = None,
 ) -> List[float]:
     """
     Generate a time series of the frames values for the feature given
+
+    audio_file can also be the wav file decoded in shared memory (see share_audio).
     """
     time_series: List[float] = []
-    for frame in frames:
-        frame_time_series_value = frame.calculate_feature_value(
-            feature, audio_file, pitch_gender, extractor
-        )
-        time_series.append(frame_time_series_value)
+    amount_of_ipus = sum(
+        len(frame.interpausal_units) for frame in frames if not frame.is_missing
+    )
+    with stage("tama.calculate_time_series", ipus=amount_of_ipus):
+        for frame in frames:
+            frame_time_series_value = frame.calculate_feature_value(
+                feature, audio_file, pitch_gender, extractor
+            )
+            time_series.append(frame_time_series_value)
     return time_series
 
 
@@ -90,6 +100,8 @@ def calculate_sample_correlation(
     of how much a speaker converged (diverged) in a task in
     terms of the behavior of a/p feature φ to the behavior her partner
     had h frames before, where h is the number of lags.
+
+    The values are computed in the dtype of the precision policy (see set_dtype).
     """
     if not time_series_a or not time_series_b:
         raise ValueError("Time series can not be empty")
@@ -97,15 +109,14 @@ def calculate_sample_correlation(
     if len(time_series_a) != len(time_series_b):
         raise ValueError("Time series can not have different lenght")
 
-    time_series_a_mean = np.nanmean(time_series_a)
-    time_series_b_mean = np.nanmean(time_series_b)
+    time_series_a_values = np.array(time_series_a, dtype=get_dtype())
+    time_series_b_values = np.array(time_series_b, dtype=get_dtype())
 
-    a_values_distances_to_mean: List[float] = (
-        np.array(time_series_a) - time_series_a_mean
-    )
-    b_values_distances_to_mean: List[float] = (
-        np.array(time_series_b) - time_series_b_mean
-    )
+    time_series_a_mean = np.nanmean(time_series_a_values)
+    time_series_b_mean = np.nanmean(time_series_b_values)
+
+    a_values_distances_to_mean: List[float] = time_series_a_values - time_series_a_mean
+    b_values_distances_to_mean: List[float] = time_series_b_values - time_series_b_mean
 
     denominator: float = sqrt_product_of_the_values_sum_square_distances(
         a_values_distances_to_mean, b_values_distances_to_mean
@@ -114,7 +125,7 @@ def calculate_sample_correlation(
         a_values_distances_to_mean, b_values_distances_to_mean, lags
     )
 
-    return np.array(numerators) / denominator
+    return np.array(numerators, dtype=get_dtype()) / denominator
 
 
 def unsigned_synchrony(
@@ -1,9 +1,10 @@
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 import numpy as np
 
 from entrainment_metrics import InterPausalUnit
+from entrainment_metrics.shared import SharedAudio
 
 
 class Frame:
@@ -55,7 +56,7 @@ class Frame:
     def calculate_feature_value(
         self,
         feature: str,
-        audio_file: Optional[Path] = None,
+        audio_file: Optional[Union[Path, SharedAudio]] = None,
         pitch_gender: Optional[str] = None,
         extractor: Optional[str] = None,
     ) -> float:
@@ -76,7 +77,7 @@ class Frame:
             IPU_features_results: Dict[
                 str, float
             ] = interpausal_unit.calculate_features(
-                audio_file, pitch_gender, extractor
+                audio_file, pitch_gender, extractor, features=[feature]
             )  # type: ignore
             IPU_feature_value: float = IPU_features_results[feature]
             IPU_duration_weighten_mean_value: float = (
@@ -119,7 +120,7 @@ class MissingFrame(Frame):
     def calculate_feature_value(
         self,
         feature: str,
-        audio_file: Optional[Path] = None,
+        audio_file: Optional[Union[Path, SharedAudio]] = None,
         pitch_gender: Optional[str] = None,  # pylint: disable=unused-argument
         extractor: Optional[str] = None,
     ) -> float:
@@ -0,0 +1,396 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+from entrainment_metrics import InterPausalUnit
+from entrainment_metrics.tama import Frame, MissingFrame
+
+from .utils import interpausal_units_inside_interval
+
+
+class OnlineFrames:
+    """
+    The frames of a speaker's audio as it is received.
+
+    Equivalent to separate_frames over the whole audio, but each frame is
+    returned as soon as the audio received covers its end. A frame is
+    closed at that moment, so the InterPausalUnits inside it must be
+    appended before the audio that covers its end.
+
+
+    Parameters
+    ----------
+    samplerate: int
+        The samplerate of the audio.
+
+    frame_length: Optional[float]
+        The length in seconds of each frame. Default is 16.
+
+    time_step: Optional[float]
+        The time in seconds between the start of consecutive frames. Default is 8.
+    """
+
+    def __init__(
+        self,
+        samplerate: int,
+        frame_length: Optional[float] = None,
+        time_step: Optional[float] = None,
+    ) -> None:
+        if frame_length is None:
+            frame_length = 16
+
+        if time_step is None:
+            time_step = 8
+
+        self.samplerate = samplerate
+        self.frame_length: int = int(frame_length * samplerate)
+        self.time_step: int = int(time_step * samplerate)
+
+        #: The amount of samples of audio received.
+        self.audio_length: int = 0
+
+        #: Whether the end of the audio was already received.
+        self.finished: bool = False
+
+        # The start in samples of the next frame to close
+        self._frame_start: int = 0
+        # The InterPausalUnits that can still be inside a frame to close
+        self._ipus: List[InterPausalUnit] = []
+        # The end in seconds of the last closed frame
+        self._closed_until: float = 0.0
+
+    def __repr__(self):
+        return f"OnlineFrames(samplerate={self.samplerate}, audio_length={self.audio_length})"
+
+    def append_interpausal_unit(
+        self,
+        interpausal_unit: InterPausalUnit,
+    ) -> None:
+        """
+        Add an InterPausalUnit, after the ones already appended.
+        """
+        if self.finished:
+            raise ValueError("The audio has already finished")
+
+        if self._ipus and interpausal_unit.start < self._ipus[-1].start:
+            raise ValueError("InterPausalUnits must be appended in time order")
+
+        if interpausal_unit.start < self._closed_until:
+            raise ValueError(
+                "InterPausalUnit starts inside an already closed frame, append it before its audio"
+            )
+
+        self._ipus.append(interpausal_unit)
+
+    def append_audio(
+        self,
+        data: Union[np.ndarray, int],
+    ) -> List[Union[Frame, MissingFrame]]:
+        """
+        Add a chunk of audio and return the frames closed by it.
+
+
+        Parameters
+        ----------
+        data: Union[np.ndarray, int]
+            The samples of the chunk, or only its amount of samples.
+        Returns
+        -------
+        List[Union[Frame, MissingFrame]]
+            The frames whose end is covered by the audio received so far.
+        """
+        if self.finished:
+            raise ValueError("The audio has already finished")
+
+        self.audio_length += data if isinstance(data, int) else data.shape[0]
+
+        frames: List[Union[Frame, MissingFrame]] = []
+        while self._frame_start + self.frame_length <= self.audio_length:
+            frames.append(self._close_frame(self._frame_start + self.frame_length))
+        return frames
+
+    def finish(self) -> List[Union[Frame, MissingFrame]]:
+        """
+        Mark the end of the audio and return the remaining frames, truncated at the end of the audio.
+        """
+        frames: List[Union[Frame, MissingFrame]] = []
+        while self._frame_start < self.audio_length:
+            frames.append(
+                self._close_frame(
+                    min(self._frame_start + self.frame_length, self.audio_length)
+                )
+            )
+        self.finished = True
+        return frames
+
+    def _close_frame(
+        self,
+        frame_end: int,
+    ) -> Union[Frame, MissingFrame]:
+        """
+        Build the next frame, ending at frame_end, and move to the following one.
+        """
+        frame_start_in_s: float = self._frame_start / self.samplerate
+        frame_end_in_s: float = frame_end / self.samplerate
+
+        IPUs_inside_frame: List[InterPausalUnit] = interpausal_units_inside_interval(
+            self._ipus, frame_start_in_s, frame_end_in_s
+        )
+
+        frame: Union[Frame, MissingFrame]
+        if IPUs_inside_frame:
+            frame = Frame(
+                start=frame_start_in_s,
+                end=frame_end_in_s,
+                is_missing=False,
+                interpausal_units=IPUs_inside_frame,
+            )
+        else:
+            frame = MissingFrame(
+                start=frame_start_in_s,
+                end=frame_end_in_s,
+            )
+
+        self._closed_until = frame_end_in_s
+        self._frame_start += self.time_step
+
+        # Drop the InterPausalUnits that end before the next frame
+        next_frame_start_in_s = self._frame_start / self.samplerate
+        while self._ipus and self._ipus[0].end <= next_frame_start_in_s:
+            self._ipus.pop(0)
+
+        return frame
+
+
+class OnlineSampleCorrelation:
+    """
+    The sample cross-correlations of two time series that grow one value at a time.
+
+    Equivalent to calculate_sample_correlation over the values appended so
+    far. Instead of the products of the distances to the means, the sums of
+    the values and of their lagged products are kept for each lag, so
+    appending a value and calculating the correlations are O(lags).
+
+
+    Parameters
+    ----------
+    lags: int
+        The amount of lags to calculate the correlations for.
+    """
+
+    def __init__(
+        self,
+        lags: int,
+    ) -> None:
+        self.lags = lags
+
+        #: The values appended of each time series.
+        self.time_series_a: List[float] = []
+        self.time_series_b: List[float] = []
+
+        # Sums over the non-missing values of each time series
+        self._amount_a = 0
+        self._amount_b = 0
+        self._sum_a = 0.0
+        self._sum_b = 0.0
+        self._square_sum_a = 0.0
+        self._square_sum_b = 0.0
+
+        # For each lag h, sums over the pairs (a_i, b_i-h) with both values non-missing
+        self._amount_lagged = np.zeros(lags + 1, dtype=int)
+        self._lagged_sum_a = np.zeros(lags + 1)
+        self._lagged_sum_b = np.zeros(lags + 1)
+        self._lagged_sum_products = np.zeros(lags + 1)
+
+    def __repr__(self):
+        return f"OnlineSampleCorrelation(lags={self.lags}, values={len(self.time_series_a)})"
+
+    def append(
+        self,
+        value_a: float,
+        value_b: float,
+    ) -> None:
+        """
+        Add the value of the next frame of each time series.
+        """
+        self.time_series_a.append(value_a)
+        self.time_series_b.append(value_b)
+
+        if not np.isnan(value_a):
+            self._amount_a += 1
+            self._sum_a += value_a
+            self._square_sum_a += value_a**2
+
+        if not np.isnan(value_b):
+            self._amount_b += 1
+            self._sum_b += value_b
+            self._square_sum_b += value_b**2
+
+        if np.isnan(value_a):
+            return
+
+        i = len(self.time_series_a) - 1
+        for lag in range(min(self.lags, i) + 1):
+            lagged_value_b = self.time_series_b[i - lag]
+            if not np.isnan(lagged_value_b):
+                self._amount_lagged[lag] += 1
+                self._lagged_sum_a[lag] += value_a
+                self._lagged_sum_b[lag] += lagged_value_b
+                self._lagged_sum_products[lag] += value_a * lagged_value_b
+
+    def calculate(self) -> np.ndarray:
+        """
+        Return the correlation for each lag between 0 and lags, as calculate_sample_correlation does.
+        """
+        if not self.time_series_a:
+            raise ValueError("Time series can not be empty")
+
+        mean_a = self._sum_a / self._amount_a if self._amount_a else np.nan
+        mean_b = self._sum_b / self._amount_b if self._amount_b else np.nan
+
+        # Missing values of time series a make the denominator NaN, missing values of b are ignored
+        if self._amount_a < len(self.time_series_a):
+            a_sum_square_distances = np.nan
+        else:
+            a_sum_square_distances = self._square_sum_a - self._amount_a * mean_a**2
+        b_sum_square_distances = 0.0
+        if self._amount_b:
+            b_sum_square_distances = self._square_sum_b - self._amount_b * mean_b**2
+        denominator = np.sqrt(
+            np.multiply(a_sum_square_distances, b_sum_square_distances)
+        )
+
+        numerators = (
+            self._lagged_sum_products
+            - mean_b * self._lagged_sum_a
+            - mean_a * self._lagged_sum_b
+            + self._amount_lagged * mean_a * mean_b
+        )
+        # Ignore lags with less than four non-missing terms
+        numerators[self._amount_lagged < 4] = np.nan
+
+        return numerators / denominator
+
+
+class OnlineTAMA:
+    """
+    TAMA for a conversation received as it happens.
+
+    Each speaker's audio and InterPausalUnits are appended as they arrive.
+    Each frame is closed as soon as both speakers' audio covers its end,
+    its value is calculated once and the sample cross-correlations are
+    updated in O(lags), instead of separating the frames and calculating
+    the correlations again from scratch.
+
+    The InterPausalUnits must already have the value for the feature (for
+    example, extracted from the audio chunk they belong to), and they must
+    be appended before the audio that closes the frames they are inside.
+
+
+    Parameters
+    ----------
+    feature: str
+        The feature to get the value of each frame from.
+
+    lags: int
+        The amount of lags to calculate the correlations for.
+
+    samplerate: int
+        The samplerate of the audio of both speakers.
+
+    frame_length: Optional[float]
+        The length in seconds of each frame. Default is 16.
+
+    time_step: Optional[float]
+        The time in seconds between the start of consecutive frames. Default is 8.
+    """
+
+    def __init__(
+        self,
+        feature: str,
+        lags: int,
+        samplerate: int,
+        frame_length: Optional[float] = None,
+        time_step: Optional[float] = None,
+    ) -> None:
+        self.feature = feature
+        self.frames_a = OnlineFrames(samplerate, frame_length, time_step)
+        self.frames_b = OnlineFrames(samplerate, frame_length, time_step)
+        self.correlation = OnlineSampleCorrelation(lags)
+
+        # Values of the frames closed for one speaker but not yet for the other
+        self._pending_a: List[float] = []
+        self._pending_b: List[float] = []
+
+    def __repr__(self):
+        return f"OnlineTAMA(feature={self.feature}, lags={self.correlation.lags}, frames={len(self.correlation.time_series_a)})"
+
+    def _speaker_frames(
+        self,
+        speaker: str,
+    ) -> OnlineFrames:
+        if speaker == "A":
+            return self.frames_a
+        elif speaker == "B":
+            return self.frames_b
+        else:
+            raise ValueError("Not a valid speaker")
+
+    def append_interpausal_unit(
+        self,
+        speaker: str,
+        interpausal_unit: InterPausalUnit,
+    ) -> None:
+        """
+        Add an InterPausalUnit of the speaker ("A" or "B").
+        """
+        self._speaker_frames(speaker).append_interpausal_unit(interpausal_unit)
+
+    def append_audio(
+        self,
+        speaker: str,
+        data: Union[np.ndarray, int],
+    ) -> List[Union[Frame, MissingFrame]]:
+        """
+        Add a chunk of audio of the speaker ("A" or "B") and return the speaker's frames closed by it.
+        """
+        frames = self._speaker_frames(speaker).append_audio(data)
+        self._add_frames(speaker, frames)
+        return frames
+
+    def finish(
+        self,
+        speaker: str,
+    ) -> List[Union[Frame, MissingFrame]]:
+        """
+        Mark the end of the audio of the speaker ("A" or "B") and return the speaker's remaining frames.
+        """
+        frames = self._speaker_frames(speaker).finish()
+        self._add_frames(speaker, frames)
+        return frames
+
+    def _add_frames(
+        self,
+        speaker: str,
+        frames: List[Union[Frame, MissingFrame]],
+    ) -> None:
+        pending = self._pending_a if speaker == "A" else self._pending_b
+        pending.extend(frame.calculate_feature_value(self.feature) for frame in frames)
+
+        while self._pending_a and self._pending_b:
+            self.correlation.append(self._pending_a.pop(0), self._pending_b.pop(0))
+
+    def time_series(self) -> List[List[float]]:
+        """
+        Return the values of the frames closed for both speakers, for speaker A and B.
+        """
+        return [
+            list(self.correlation.time_series_a),
+            list(self.correlation.time_series_b),
+        ]
+
+    def sample_correlation(self) -> np.ndarray:
+        """
+        Return the correlation for each lag over the frames closed for both speakers.
+        """
+        return self.correlation.calculate()
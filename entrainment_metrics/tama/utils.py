@@ -1,10 +1,11 @@
 from pathlib import Path
-from typing import List, Union
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 from scipy.io import wavfile
 
-from entrainment_metrics import InterPausalUnit
+from entrainment_metrics import InterPausalUnit, InterPausalUnitTable
+from entrainment_metrics.shared import SharedAudio, SharedInterPausalUnitTable
 from entrainment_metrics.tama import Frame, MissingFrame
 from entrainment_metrics.utils import get_interpausal_units
 
@@ -38,59 +39,196 @@ def interpausal_units_inside_interval(
     return IPUs
 
 
-def separate_frames(
-    interpausal_units: List[InterPausalUnit], data: np.ndarray, samplerate: int
-) -> List[Union[Frame, MissingFrame]]:
+def sort_interpausal_units(
+    interpausal_units: List[InterPausalUnit],
+) -> Tuple[List[InterPausalUnit], np.ndarray, np.ndarray, np.ndarray]:
     """
-    Given an audio data and samplerate, return a list of the frames inside
+    Return the IPUs sorted by start, their starts, their ends and the
+    maximum end among each IPU and the ones before it.
     """
+    sorted_ipus = sorted(interpausal_units, key=lambda ipu: ipu.start)
+    starts = np.array([ipu.start for ipu in sorted_ipus], dtype=float)
+    ends = np.array([ipu.end for ipu in sorted_ipus], dtype=float)
+    max_ends = np.maximum.accumulate(ends) if ends.size else ends
+    return sorted_ipus, starts, ends, max_ends
 
-    FRAME_LENGHT: int = 16 * samplerate
-    TIME_STEP: int = 8 * samplerate
 
-    frames: List[Union[Frame, MissingFrame]] = []
-    audio_length: int = data.shape[0]
+def calculate_frames_bounds(
+    audio_length: int,
+    samplerate: int,
+    frame_length: float,
+    time_step: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the start and end in seconds of each frame of an audio with audio_length samples
+    """
+    frame_length_in_samples: int = int(frame_length * samplerate)
+    time_step_in_samples: int = int(time_step * samplerate)
+    if frame_length_in_samples <= 0 or time_step_in_samples <= 0:
+        raise ValueError("Frame length and time step must be at least one sample")
 
-    frame_start, frame_end = 0, FRAME_LENGHT
-    while frame_start < audio_length:
-        # Truncate frame_end
-        if frame_end > audio_length:
-            frame_end = audio_length
+    frame_starts = np.arange(0, audio_length, time_step_in_samples)
+    # Truncate frame ends
+    frame_ends = np.minimum(frame_starts + frame_length_in_samples, audio_length)
 
-        # Convert frame ends to seconds
-        frame_start_in_s: float = frame_start / samplerate
-        frame_end_in_s: float = frame_end / samplerate
+    # Convert frame ends to seconds
+    return frame_starts / samplerate, frame_ends / samplerate
 
-        IPUs_inside_frame: List[InterPausalUnit] = interpausal_units_inside_interval(
-            interpausal_units, frame_start_in_s, frame_end_in_s
-        )
 
-        frame = None
+def build_frames(
+    sorted_ipus: List[InterPausalUnit],
+    starts: np.ndarray,
+    ends: np.ndarray,
+    max_ends: np.ndarray,
+    frame_starts: np.ndarray,
+    frame_ends: np.ndarray,
+) -> List[Union[Frame, MissingFrame]]:
+    """
+    Return the frames with the given bounds and the IPUs that intersect each of them
+    """
+    # IPUs before first_ipus end before the frame starts, IPUs from last_ipus start after it ends
+    first_ipus = np.searchsorted(max_ends, frame_starts, side="right")
+    last_ipus = np.searchsorted(starts, frame_ends, side="left")
+
+    frames: List[Union[Frame, MissingFrame]] = []
+    for frame_start, frame_end, first, last in zip(
+        frame_starts.tolist(), frame_ends.tolist(), first_ipus, last_ipus
+    ):
+        IPUs_inside_frame: List[InterPausalUnit] = [
+            sorted_ipus[i] for i in range(first, last) if ends[i] > frame_start
+        ]
+
+        frame: Union[Frame, MissingFrame]
         if IPUs_inside_frame:
             frame = Frame(
-                start=frame_start_in_s,
-                end=frame_end_in_s,
+                start=frame_start,
+                end=frame_end,
                 is_missing=False,
                 interpausal_units=IPUs_inside_frame,
             )
         else:
             # A particular frame could contain no IPUs, in which case its a/p feature values are considered ‘missing’
             frame = MissingFrame(
-                start=frame_start_in_s,
-                end=frame_end_in_s,
+                start=frame_start,
+                end=frame_end,
             )
-
         frames.append(frame)
 
-        frame_start += TIME_STEP
-        frame_end += TIME_STEP
-
     return frames
 
 
+def separate_frames(
+    interpausal_units: Union[
+        List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable
+    ],
+    data: np.ndarray,
+    samplerate: int,
+    frame_length: Optional[float] = None,
+    time_step: Optional[float] = None,
+) -> List[Union[Frame, MissingFrame]]:
+    """
+    Given an audio data and samplerate, return a list of the frames inside
+
+    Frames start every time_step seconds and last frame_length seconds,
+    the ones at the end of the audio are truncated. The IPUs of each frame
+    are the ones that intersect it, sorted by start.
+
+
+    Parameters
+    ----------
+    interpausal_units: Union[List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable]
+        The IPUs to separate into frames, or a table with them.
+    data: np.ndarray
+        The audio data.
+    samplerate: int
+        The samplerate of the audio.
+    frame_length: Optional[float]
+        The length in seconds of each frame. Default is 16.
+    time_step: Optional[float]
+        The time in seconds between the start of consecutive frames. Default is 8.
+    Returns
+    -------
+    List[Union[Frame, MissingFrame]]
+        The frames of the audio.
+    """
+    return separate_frames_sweep(
+        interpausal_units, data, samplerate, [(frame_length, time_step)]
+    )[0]
+
+
+def separate_frames_sweep(
+    interpausal_units: Union[
+        List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable
+    ],
+    data: np.ndarray,
+    samplerate: int,
+    configurations: List[Tuple[Optional[float], Optional[float]]],
+) -> List[List[Union[Frame, MissingFrame]]]:
+    """
+    Separate an audio into frames for many frame lengths and time steps at once
+
+    The IPUs are sorted once, and the bounds of the frames of every
+    configuration and the IPUs inside each of them are found with a single
+    vectorized search, so a sweep costs little more than one separation.
+
+
+    Parameters
+    ----------
+    interpausal_units: Union[List[InterPausalUnit], InterPausalUnitTable, SharedInterPausalUnitTable]
+        The IPUs to separate into frames, or a table with them.
+    data: np.ndarray
+        The audio data.
+    samplerate: int
+        The samplerate of the audio.
+    configurations: List[Tuple[Optional[float], Optional[float]]]
+        The (frame_length, time_step) pairs in seconds. None uses the default of 16 and 8.
+    Returns
+    -------
+    List[List[Union[Frame, MissingFrame]]]
+        The frames of the audio for each configuration, in the order of configurations.
+    """
+    if isinstance(
+        interpausal_units, (InterPausalUnitTable, SharedInterPausalUnitTable)
+    ):
+        interpausal_units = interpausal_units.interpausal_units()
+
+    audio_length: int = data.shape[0]
+    sorted_ipus, starts, ends, max_ends = sort_interpausal_units(interpausal_units)
+
+    configurations_bounds = [
+        calculate_frames_bounds(
+            audio_length,
+            samplerate,
+            16 if frame_length is None else frame_length,
+            8 if time_step is None else time_step,
+        )
+        for frame_length, time_step in configurations
+    ]
+    if not configurations_bounds:
+        return []
+
+    all_frames = build_frames(
+        sorted_ipus,
+        starts,
+        ends,
+        max_ends,
+        np.concatenate([frame_starts for frame_starts, _ in configurations_bounds]),
+        np.concatenate([frame_ends for _, frame_ends in configurations_bounds]),
+    )
+
+    res: List[List[Union[Frame, MissingFrame]]] = []
+    offset = 0
+    for frame_starts, _ in configurations_bounds:
+        res.append(all_frames[offset : offset + frame_starts.size])
+        offset += frame_starts.size
+    return res
+
+
 def get_frames(
-    wav_fname: Path,
+    wav_fname: Union[Path, SharedAudio],
     words_fname: Path,
+    frame_length: Optional[float] = None,
+    time_step: Optional[float] = None,
 ) -> List[Union[Frame, MissingFrame]]:
     """
     Return a list of Frames given a Path to a .word file and a .wav file
@@ -102,10 +240,14 @@ def get_frames(
 
     Parameters
     ----------
-    wav_fname: Path
-        The path to the wav file
+    wav_fname: Union[Path, SharedAudio]
+        The path to the wav file, or the wav file decoded in shared memory (see share_audio)
     words_fname: Path
         The path to the words file
+    frame_length: Optional[float]
+        The length in seconds of each frame. Default is 16.
+    time_step: Optional[float]
+        The time in seconds between the start of consecutive frames. Default is 8.
 
     Returns
     -------
@@ -113,12 +255,16 @@ def get_frames(
         The frames from the wav file with the InterPausalUnits from the word file.
     """
 
-    samplerate, data = wavfile.read(wav_fname)
+    if isinstance(wav_fname, SharedAudio):
+        # Samples first, as wavfile.read returns them
+        data, samplerate = wav_fname.signal.array().T, wav_fname.sampling_rate
+    else:
+        samplerate, data = wavfile.read(wav_fname)
 
     interpausal_units: List[InterPausalUnit] = get_interpausal_units(words_fname)
 
     frames: List[Union[Frame, MissingFrame]] = separate_frames(
-        interpausal_units, data, samplerate
+        interpausal_units, data, samplerate, frame_length, time_step
     )
 
     return frames
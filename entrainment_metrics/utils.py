@@ -1,13 +1,64 @@
+import warnings
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 
-import matplotlib.pyplot as plt
 import numpy as np
 from scipy.io import wavfile
 
 from .interpausal_unit import InterPausalUnit
 
 
+def get_interpausal_units_bounds(words_fname: Path) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Return the start and end of each IPU given a Path to a .word file
+
+    The whole file is read and parsed at once: an IPU is each run of
+    consecutive words between silences ("#"), blank lines are ignored.
+
+    The format of the file must be:
+        - For each line
+            f'{starting_time} {ending_time} {word}'
+        Where starting_time and ending_time are floats
+
+    Parameters
+    ----------
+    words_fname: Path
+        The path to the words file
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The starts and the ends of the InterPausalUnits from the words file.
+    """
+    # Only the first two characters of each word are needed to find the
+    # silences, read as text so that words in any language are valid
+    words_dtype = [("start", float), ("end", float), ("word", "U2")]
+    try:
+        with warnings.catch_warnings():
+            # Empty files are valid, they have no IPUs
+            warnings.simplefilter("ignore", category=UserWarning)
+            words = np.loadtxt(
+                words_fname,
+                dtype=words_dtype,
+                comments=None,
+                encoding="utf-8",
+                ndmin=1,
+            )
+    except ValueError as e:
+        raise ValueError(f"Not a valid words file {words_fname}") from e
+
+    words_starts = words["start"]
+    words_ends = words["end"]
+    is_word = words["word"] != "#"
+
+    # IPUs start where a word follows a silence and end where a silence follows a word
+    changes = np.diff(np.concatenate([[0], is_word.astype(np.int8), [0]]))
+    first_words = np.flatnonzero(changes == 1)
+    last_words = np.flatnonzero(changes == -1) - 1
+
+    return words_starts[first_words], words_ends[last_words]
+
+
 def get_interpausal_units(words_fname: Path) -> List[InterPausalUnit]:
     """
     Return a list of IPUs given a Path to a .word file
@@ -27,30 +78,11 @@ def get_interpausal_units(words_fname: Path) -> List[InterPausalUnit]:
     List[InterPausalUnit]
         The InterPausalUnits from the words file.
     """
-    interpausal_units: List[InterPausalUnit] = []
-    with open(words_fname, encoding="utf-8", mode="r") as word_file:
-        IPU_started: bool = False
-        IPU_start: float = 0.0
-        last_end: float = 0.0
-        while line := word_file.readline().rstrip():  # Efficient reading
-            start, end, word = line.split()
-            word_start, word_end = float(start), float(end)
-            if not IPU_started and word == "#":
-                IPU_start = 0.0
-                last_end = 0.0
-            elif not IPU_started and word != "#":
-                IPU_start = word_start
-                last_end = word_end
-                IPU_started = True
-            elif IPU_started and word != "#":
-                last_end = word_end
-            elif IPU_started and word == "#":
-                interpausal_units.append(InterPausalUnit(IPU_start, last_end))
-                IPU_started = False
-        if IPU_start and last_end:  # Last IPU if existent
-            interpausal_units.append(InterPausalUnit(IPU_start, last_end))
-
-    return interpausal_units
+    starts, ends = get_interpausal_units_bounds(words_fname)
+    return [
+        InterPausalUnit(start, end)
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]
 
 
 def print_audio_description(speaker: str, wav_fname: Path) -> None:
@@ -109,6 +141,8 @@ def plot_ipus(ipus: List[InterPausalUnit], feature: str, **kwargs):
     feature: str
         The feature from which to extract the feature value of each InterPausalUnit.
     """
+    import matplotlib.pyplot as plt
+
     ipus_values = [ipu.feature_value(feature) for ipu in ipus]
     ipus_starts = [ipu.start for ipu in ipus]
     ipus_ends = [ipu.end for ipu in ipus]
@@ -0,0 +1,71 @@
+import argparse
+from pathlib import Path
+
+from entrainment_metrics.server import (AVAILABLE_EXTRACTORS, create_server,
+                                        warm_up)
+
+arg_parser = argparse.ArgumentParser(
+    description="Serve knn and TAMA scores over HTTP, keeping the extractors loaded"
+)
+arg_parser.add_argument(
+    "--host", type=str, default="127.0.0.1", help="Host to listen on"
+)
+arg_parser.add_argument(
+    "-p", "--port", type=int, default=8000, help="Port to listen on"
+)
+arg_parser.add_argument(
+    "-u",
+    "--unix-socket",
+    type=str,
+    help="Unix socket to listen on instead of host and port",
+)
+arg_parser.add_argument(
+    "-j",
+    "--max-concurrency",
+    type=int,
+    default=1,
+    help="Requests scored at once, the rest wait",
+)
+arg_parser.add_argument(
+    "-e",
+    "--extractors",
+    type=str,
+    default=",".join(AVAILABLE_EXTRACTORS),
+    help="Comma separated extractors to load before serving, empty for none",
+)
+arg_parser.add_argument(
+    "-s",
+    "--feature-sets",
+    type=str,
+    default="ComParE_2016",
+    help="Comma separated opensmile feature sets to load before serving",
+)
+
+
+def main() -> None:
+    args = arg_parser.parse_args()
+
+    extractors = [extractor for extractor in args.extractors.split(",") if extractor]
+    feature_sets = [
+        feature_set for feature_set in args.feature_sets.split(",") if feature_set
+    ]
+    print(f"Loading extractors: {extractors}")
+    warm_up(extractors, feature_sets)
+
+    server = create_server(
+        host=args.host,
+        port=args.port,
+        unix_socket=Path(args.unix_socket) if args.unix_socket else None,
+        max_concurrency=args.max_concurrency,
+    )
+    print(f"Serving on {args.unix_socket or server.server_address}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
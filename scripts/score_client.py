@@ -0,0 +1,161 @@
+import argparse
+import base64
+import http.client
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Only the standard library is imported, so that the client starts fast
+
+arg_parser = argparse.ArgumentParser(
+    description="Request knn or TAMA scores to a server started with run_server.py"
+)
+arg_parser.add_argument(
+    "endpoint", type=str, choices=["knn", "tama", "health"], help="Score to request"
+)
+arg_parser.add_argument(
+    "--host", type=str, default="127.0.0.1", help="Host of the server"
+)
+arg_parser.add_argument(
+    "-p", "--port", type=int, default=8000, help="Port of the server"
+)
+arg_parser.add_argument(
+    "-u", "--unix-socket", type=str, help="Unix socket of the server"
+)
+arg_parser.add_argument(
+    "--upload",
+    action="store_true",
+    help="Send the contents of the files instead of their paths",
+)
+arg_parser.add_argument(
+    "-a", "--audio-file-a", type=str, help="Audio .wav file for a speaker A"
+)
+arg_parser.add_argument(
+    "-b", "--audio-file-b", type=str, help="Audio .wav file for a speaker B"
+)
+arg_parser.add_argument(
+    "-wa", "--words-file-a", type=str, help=".words file for a speaker A"
+)
+arg_parser.add_argument(
+    "-wb", "--words-file-b", type=str, help=".words file for a speaker B"
+)
+arg_parser.add_argument(
+    "-f", "--feature", type=str, help="Feature to calculate time series"
+)
+arg_parser.add_argument(
+    "-ga", "--pitch-gender-a", type=str, help="Gender of the pitch of speaker A"
+)
+arg_parser.add_argument(
+    "-gb", "--pitch-gender-b", type=str, help="Gender of the pitch of speaker B"
+)
+arg_parser.add_argument(
+    "-e", "--extractor", type=str, help="Extractor to use for calculating IPUs features"
+)
+arg_parser.add_argument(
+    "-k",
+    "--k-neighboors",
+    type=int,
+    help="Amount of neighboors to approximate with knn",
+)
+arg_parser.add_argument(
+    "-m",
+    "--metric",
+    type=str,
+    help="Entrainment metric from a/p evolution functions to calculate",
+)
+arg_parser.add_argument(
+    "-l",
+    "--lags",
+    type=int,
+    help="Variation of lags to calculate Sample cross-correlation",
+)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, unix_socket: str) -> None:
+        super().__init__("localhost")
+        self.unix_socket = unix_socket
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_socket)
+
+
+def build_request(args: argparse.Namespace) -> Dict[str, Any]:
+    request: Dict[str, Any] = {
+        "feature": args.feature,
+        "extractor": args.extractor,
+        "pitch_gender_a": args.pitch_gender_a,
+        "pitch_gender_b": args.pitch_gender_b,
+        "k": args.k_neighboors,
+        "metric": args.metric,
+        "lags": args.lags,
+    }
+    files = {
+        "audio_a": args.audio_file_a,
+        "audio_b": args.audio_file_b,
+        "words_a": args.words_file_a,
+        "words_b": args.words_file_b,
+    }
+    for name, fname in files.items():
+        if fname is None:
+            continue
+        if not args.upload:
+            # The server may run in another directory
+            request[f"{name}_file"] = os.path.abspath(fname)
+        elif name.startswith("audio"):
+            request[name] = base64.b64encode(Path(fname).read_bytes()).decode("ascii")
+        else:
+            request[name] = Path(fname).read_text(encoding="utf-8")
+    return request
+
+
+def send_request(
+    connection: http.client.HTTPConnection,
+    endpoint: str,
+    request: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    if request is None:
+        connection.request("GET", f"/{endpoint}")
+    else:
+        connection.request(
+            "POST",
+            f"/{endpoint}",
+            body=json.dumps(request),
+            headers={"Content-Type": "application/json"},
+        )
+    response = connection.getresponse()
+    res = json.loads(response.read())
+    if response.status != 200:
+        raise RuntimeError(res.get("error", response.reason))
+    return res
+
+
+def main() -> None:
+    args = arg_parser.parse_args()
+
+    connection: http.client.HTTPConnection
+    if args.unix_socket:
+        connection = UnixHTTPConnection(args.unix_socket)
+    else:
+        connection = http.client.HTTPConnection(args.host, args.port)
+
+    try:
+        res = send_request(
+            connection,
+            args.endpoint,
+            None if args.endpoint == "health" else build_request(args),
+        )
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        connection.close()
+    print(json.dumps(res, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+import warnings
+from unittest import IsolatedAsyncioTestCase
+
+import numpy as np
+
+from entrainment_metrics import InterPausalUnit, Profiler, use_dtype
+from entrainment_metrics.aio import AsyncRunner
+from entrainment_metrics.continuous import TimeSeries, calculate_metric
+
+
+class AsyncRunnerTestCase(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.audio_fname = "./data/hola-camaron.wav"
+        self.ipus_a = [
+            InterPausalUnit(float(start), float(start) + 2.0, {'F0_MAX': 100.0 + start})
+            for start in range(0, 80, 4)
+        ]
+        self.ipus_b = [
+            InterPausalUnit(float(start), float(start) + 2.0, {'F0_MAX': 300.0 - start})
+            for start in range(0, 80, 4)
+        ]
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self.lock = threading.Lock()
+
+    def blocking_call(self, value, seconds):
+        with self.lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(seconds)
+        with self.lock:
+            self.running -= 1
+        return value
+
+    async def test_concurrent_calls_with_the_same_key_are_coalesced(self):
+        async with AsyncRunner(max_concurrency=2) as runner:
+            results = await asyncio.gather(
+                *[runner.run("key", self.blocking_call, 1, 0.1) for _ in range(5)],
+                runner.run("other key", self.blocking_call, 2, 0.1),
+                runner.run(None, self.blocking_call, 3, 0.1),
+            )
+        self.assertEqual([1] * 5 + [2, 3], results)
+        self.assertEqual(3, self.calls)
+
+    async def test_bounded_concurrency_and_backpressure(self):
+        runner = AsyncRunner(max_concurrency=2, max_pending=2)
+        tasks = [
+            asyncio.ensure_future(runner.run(i, self.blocking_call, i, 0.1))
+            for i in range(4)
+        ]
+        await asyncio.sleep(0.05)
+        self.assertEqual(4, runner.in_flight())
+        self.assertEqual(2, runner.pending())
+        with self.assertRaises(asyncio.QueueFull):
+            await runner.run(4, self.blocking_call, 4, 0.1)
+
+        # The event loop keeps running while the computations do
+        ticks = 0
+        while not all(task.done() for task in tasks):
+            ticks += 1
+            await asyncio.sleep(0.01)
+        self.assertGreater(ticks, 5)
+        self.assertEqual(list(range(4)), [task.result() for task in tasks])
+        self.assertEqual(2, self.max_running)
+
+        await runner.aclose()
+        with self.assertRaises(ValueError):
+            AsyncRunner(max_concurrency=0)
+
+    async def test_calculate_features(self):
+        expected = InterPausalUnit(0.0, 0.342604).calculate_features(
+            self.audio_fname, extractor="praat"
+        )
+        interpausal_units = [InterPausalUnit(0.0, 0.342604) for _ in range(3)]
+        async with AsyncRunner() as runner:
+            results = await asyncio.gather(
+                *[
+                    runner.calculate_features(
+                        interpausal_unit, self.audio_fname, extractor="praat"
+                    )
+                    for interpausal_unit in interpausal_units
+                ]
+            )
+        for interpausal_unit, features_values in zip(interpausal_units, results):
+            self.assertEqual(expected, features_values)
+            self.assertEqual(expected, interpausal_unit.features_values)
+
+    async def test_time_series_and_calculate_metric(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            expected = calculate_metric(
+                "synchrony",
+                TimeSeries('F0_MAX', self.ipus_a, method='knn'),
+                TimeSeries('F0_MAX', self.ipus_b, method='knn'),
+            )
+            async with AsyncRunner() as runner:
+                time_series_a, time_series_b = await asyncio.gather(
+                    runner.time_series('F0_MAX', self.ipus_a, method='knn'),
+                    runner.time_series('F0_MAX', self.ipus_b, method='knn'),
+                )
+                value = await runner.calculate_metric(
+                    "synchrony", time_series_a, time_series_b
+                )
+                with use_dtype("float32"):
+                    predictions = await runner.run(None, time_series_a.predict_interval)
+        self.assertEqual(expected, value)
+        self.assertEqual(np.float32, predictions.dtype)
+
+    async def test_profiler_records_the_computations(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            async with AsyncRunner(max_concurrency=2) as runner:
+                with Profiler() as profiler:
+                    await asyncio.gather(
+                        runner.time_series('F0_MAX', self.ipus_a, method='knn'),
+                        runner.time_series('F0_MAX', self.ipus_b, method='knn'),
+                    )
+                self.assertEqual(2, profiler.stages["TimeSeries.fit"].calls)
+
+                # Nothing is recorded once the Profiler is not active
+                await runner.time_series('F0_MAX', self.ipus_a, method='knn', k=3)
+        self.assertEqual(2, profiler.stages["TimeSeries.fit"].calls)
@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from entrainment_metrics import get_interpausal_units, load_corpus
+
+
+class CorpusTestCase(TestCase):
+    def setUp(self):
+        self.corpus_path = Path(tempfile.mkdtemp())
+        self.cases = {
+            'session.1.1': {
+                'A': "./data/100-200-300_long_x2",
+                'B': "./data/200-300-100",
+            },
+            'session.1.2': {
+                'A': "./data/hola-camaron",
+                'B': "./data/silence",
+            },
+        }
+        for conversation, speakers in self.cases.items():
+            for speaker, fname in speakers.items():
+                for extension in ["words", "wav"]:
+                    shutil.copy(
+                        f"{fname}.{extension}",
+                        self.corpus_path / f"{conversation}.{speaker}.{extension}",
+                    )
+        # A transcript without its partner nor its audio, in a subdirectory
+        os.mkdir(self.corpus_path / "other")
+        shutil.copy(
+            "./data/200-300-100.words",
+            self.corpus_path / "other" / "session.1.1.A.words",
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.corpus_path)
+
+    def test_load_corpus_matches_get_interpausal_units(self):
+        corpus_index = load_corpus(self.corpus_path, n_jobs=2)
+
+        self.assertEqual(5, len(corpus_index))
+        self.assertEqual(['session.1.1', 'session.1.2'], corpus_index.pairs())
+        for conversation, speakers in self.cases.items():
+            for speaker, fname in speakers.items():
+                self.assertEqual(
+                    get_interpausal_units(f"{fname}.words"),
+                    corpus_index.interpausal_units(conversation, speaker),
+                )
+                self.assertEqual(
+                    self.corpus_path / f"{conversation}.{speaker}.wav",
+                    corpus_index.wav_fname(conversation, speaker),
+                )
+        self.assertIsNone(
+            corpus_index.wav_fname(os.path.join("other", "session.1.1"), "A")
+        )
+
+    def test_load_corpus_reads_saved_index(self):
+        corpus_index = load_corpus(self.corpus_path)
+        self.assertTrue((self.corpus_path / "ipus_index.npz").exists())
+
+        # The .words files are not read again once the index exists
+        for words_fname in self.corpus_path.rglob("*.words"):
+            os.remove(words_fname)
+        loaded_corpus_index = load_corpus(self.corpus_path)
+
+        np.testing.assert_array_equal(corpus_index.offsets, loaded_corpus_index.offsets)
+        np.testing.assert_array_equal(corpus_index.starts, loaded_corpus_index.starts)
+        np.testing.assert_array_equal(corpus_index.ends, loaded_corpus_index.ends)
+        self.assertEqual(
+            corpus_index.interpausal_units('session.1.1', 'A'),
+            loaded_corpus_index.interpausal_units('session.1.1', 'A'),
+        )
+
+        self.assertEqual(0, len(load_corpus(self.corpus_path, rebuild=True)))
+
+    def test_load_corpus_moved(self):
+        load_corpus(self.corpus_path)
+        moved_corpus_path = Path(tempfile.mkdtemp()) / "moved"
+        try:
+            shutil.move(self.corpus_path, moved_corpus_path)
+            corpus_index = load_corpus(moved_corpus_path)
+            self.assertEqual(
+                moved_corpus_path / "session.1.1.A.wav",
+                corpus_index.wav_fname('session.1.1', 'A'),
+            )
+            self.assertEqual(
+                moved_corpus_path / "other" / "session.1.1.A.words",
+                corpus_index.words_fname(os.path.join("other", "session.1.1"), "A"),
+            )
+        finally:
+            shutil.move(moved_corpus_path, self.corpus_path)
+            shutil.rmtree(moved_corpus_path.parent)
+
+    def test_load_corpus_rebuilds_stale_index(self):
+        self.assertEqual(5, len(load_corpus(self.corpus_path)))
+
+        # A new transcript, only noticed when checking
+        shutil.copy(
+            "./data/hola-camaron.words",
+            self.corpus_path / "other" / "session.1.1.B.words",
+        )
+        self.assertEqual(5, len(load_corpus(self.corpus_path)))
+        corpus_index = load_corpus(self.corpus_path, check_stale=True)
+        self.assertEqual(6, len(corpus_index))
+        self.assertEqual(
+            get_interpausal_units("./data/hola-camaron.words"),
+            corpus_index.interpausal_units(os.path.join("other", "session.1.1"), "B"),
+        )
+
+        # A modified transcript
+        index_mtime = os.stat(self.corpus_path / "ipus_index.npz").st_mtime
+        words_fname = self.corpus_path / "session.1.2.B.words"
+        shutil.copy("./data/hola-camaron.words", words_fname)
+        os.utime(words_fname, (index_mtime + 1, index_mtime + 1))
+        self.assertEqual(
+            get_interpausal_units("./data/hola-camaron.words"),
+            load_corpus(self.corpus_path, check_stale=True).interpausal_units(
+                'session.1.2', 'B'
+            ),
+        )
@@ -0,0 +1,25 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+
+class ImportsTestCase(TestCase):
+    def test_heavy_dependencies_not_imported_with_the_package(self):
+        heavy_modules = [
+            "allosaurus",
+            "audiofile",
+            "matplotlib",
+            "opensmile",
+            "pandas",
+            "parselmouth",
+            "sklearn",
+        ]
+        code = (
+            "import sys\n"
+            "import entrainment_metrics, entrainment_metrics.tama, entrainment_metrics.continuous\n"
+            f"print([module for module in {heavy_modules} if module in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual("[]", result.stdout.strip())
@@ -0,0 +1,108 @@
+import json
+import shutil
+import tempfile
+import warnings
+from pathlib import Path
+from unittest import TestCase
+
+import audiofile
+
+from entrainment_metrics import InterPausalUnit, Profiler, tama
+from entrainment_metrics.continuous import TimeSeries, calculate_metric
+from entrainment_metrics.instrumentation import count, get_profiler, stage
+
+
+class InstrumentationTestCase(TestCase):
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp())
+        self.audio_fname = "./data/hola-camaron.wav"
+        self.ipus_a = [
+            InterPausalUnit(float(start), float(start) + 2.0, {'F0_MAX': 100.0 + start})
+            for start in range(0, 40, 4)
+        ]
+        self.ipus_b = [
+            InterPausalUnit(float(start), float(start) + 2.0, {'F0_MAX': 300.0 - start})
+            for start in range(0, 40, 4)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_nothing_recorded_without_profiler(self):
+        self.assertIsNone(get_profiler())
+        with stage("stage"):
+            count("stage", ipus=1, audio_bytes=10)
+
+        with Profiler() as profiler:
+            self.assertIs(profiler, get_profiler())
+        self.assertIsNone(get_profiler())
+        self.assertEqual({}, profiler.to_dict())
+
+    def test_nested_profilers(self):
+        with Profiler() as outer_profiler:
+            with stage("outer"):
+                with Profiler() as inner_profiler:
+                    with stage("inner", ipus=2):
+                        pass
+                self.assertIs(outer_profiler, get_profiler())
+
+        self.assertEqual(["outer"], list(outer_profiler.stages))
+        self.assertEqual(["inner"], list(inner_profiler.stages))
+        self.assertEqual(1, inner_profiler.stages["inner"].calls)
+        self.assertEqual(2, inner_profiler.stages["inner"].ipus)
+
+    def test_features_extraction_stages(self):
+        with Profiler() as profiler:
+            for _ in range(2):
+                InterPausalUnit(0.0, 0.342604).calculate_features(
+                    self.audio_fname, extractor="praat"
+                )
+            InterPausalUnit(0.0, 0.342604).calculate_features(
+                self.audio_fname, extractor="opensmile", feature_set="eGeMAPSv02"
+            )
+
+        praat_stats = profiler.stages["calculate_features.praat"]
+        self.assertEqual(2, praat_stats.calls)
+        self.assertEqual(2, praat_stats.ipus)
+        self.assertGreater(praat_stats.wall_time, 0.0)
+
+        opensmile_stats = profiler.stages["calculate_features.opensmile"]
+        self.assertEqual(1, opensmile_stats.calls)
+        signal, _ = audiofile.read(self.audio_fname, offset=0.0, duration=0.342604)
+        self.assertEqual(signal.nbytes, opensmile_stats.audio_bytes)
+
+    def test_tama_time_series_stage(self):
+        frames = [
+            tama.Frame(0.0, 16.0, False, [InterPausalUnit(0.0, 0.342604)]),
+            tama.MissingFrame(8.0, 24.0),
+        ]
+        with Profiler() as profiler:
+            tama.calculate_time_series("F0_MAX", frames, self.audio_fname, "praat")
+
+        self.assertEqual(1, profiler.stages["tama.calculate_time_series"].calls)
+        self.assertEqual(1, profiler.stages["tama.calculate_time_series"].ipus)
+        self.assertEqual(1, profiler.stages["calculate_features.praat"].calls)
+
+    def test_time_series_and_metrics_stages(self):
+        with Profiler() as profiler:
+            time_series_a = TimeSeries('F0_MAX', self.ipus_a, "knn")
+            time_series_b = TimeSeries('F0_MAX', self.ipus_b, "knn")
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                calculate_metric("proximity", time_series_a, time_series_b)
+                calculate_metric("synchrony", time_series_a, time_series_b)
+
+        self.assertEqual(2, profiler.stages["TimeSeries.fit"].calls)
+        self.assertEqual(20, profiler.stages["TimeSeries.fit"].ipus)
+        self.assertEqual(1, profiler.stages["calculate_metric.proximity"].calls)
+        self.assertEqual(1, profiler.stages["calculate_metric.synchrony"].calls)
+        self.assertGreater(profiler.stages["TimeSeries.predict"].calls, 2)
+
+        profile_fname = self.path / "profile.json"
+        profiler.to_json(profile_fname)
+        with open(profile_fname, encoding="utf-8") as profile_file:
+            self.assertEqual(profiler.to_dict(), json.load(profile_file))
+        self.assertEqual(
+            {"wall_time", "calls", "ipus", "audio_bytes"},
+            set(profiler.to_dict()["TimeSeries.fit"]),
+        )
@@ -1,4 +1,11 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import warnings
 from math import nan
+from pathlib import Path
 from unittest import TestCase
 
 import numpy as np
@@ -6,7 +13,16 @@ from scipy.io import wavfile
 from sklearn.neighbors import KNeighborsRegressor
 
 from entrainment_metrics import InterPausalUnit
-from entrainment_metrics.continuous import TimeSeries, calculate_metric
+from entrainment_metrics.continuous import (MultiFeatureTimeSeries,
+                                            OnlineMetrics, OnlineTimeSeries,
+                                            TimeSeries, calculate_metric,
+                                            calculate_metrics_batch,
+                                            calculate_synchrony_profile,
+                                            calculate_windowed_metric,
+                                            clear_curves, predict_curve,
+                                            register_regression_backend,
+                                            save_time_series_plots,
+                                            surrogate_test)
 
 
 class KNNTestCase(TestCase):
@@ -62,6 +78,18 @@ class KNNTestCase(TestCase):
                     InterPausalUnit(48.0, 52.0, {'F0_MAX': 100.003}),
                 ],
             },
+            'multi_feature': {
+                'ipus': [
+                    InterPausalUnit(0.0, 1.3, {'F0_MAX': 101.2, 'ENG_MEAN': 60.1}),
+                    InterPausalUnit(2.1, 3.0, {'F0_MAX': 180.4, 'ENG_MEAN': nan}),
+                    InterPausalUnit(4.7, 6.2, {'F0_MAX': 150.9, 'ENG_MEAN': 62.3}),
+                    InterPausalUnit(7.3, 7.9, {'F0_MAX': nan, 'ENG_MEAN': 58.8}),
+                    InterPausalUnit(9.6, 11.5, {'F0_MAX': 120.7, 'ENG_MEAN': 65.2}),
+                    InterPausalUnit(12.2, 13.1, {'F0_MAX': 210.3, 'ENG_MEAN': 61.7}),
+                    InterPausalUnit(14.9, 16.6, {'F0_MAX': 140.2, 'ENG_MEAN': 59.4}),
+                    InterPausalUnit(17.5, 18.4, {'F0_MAX': 170.8, 'ENG_MEAN': 63.9}),
+                ],
+            },
             'unordered': {
                 'ipus': [
                     InterPausalUnit(16.0, 24.0, {'F0_MAX': 300.002}),
@@ -285,3 +313,574 @@ class KNNTestCase(TestCase):
             method='knn',
             k=3,
         )
+
+    def test_calculate_synchrony_profile_matches_synchrony(self):
+        case_a = self.cases['long_100-200-300_x2']
+        case_b = self.cases['long_300-200-100_x2']
+
+        time_series_a = TimeSeries(
+            feature='F0_MAX', interpausal_units=case_a['ipus'], method='knn', k=4
+        )
+        time_series_b = TimeSeries(
+            feature='F0_MAX', interpausal_units=case_b['ipus'], method='knn', k=4
+        )
+
+        synchrony_deltas = [-15.0, -10.0, -5.0, 0.0, 5.0, 10.0, 15.0]
+        for integration_method in ["montecarlo", "trapz"]:
+            correlations, best_delta = calculate_synchrony_profile(
+                time_series_a,
+                time_series_b,
+                synchrony_deltas=synchrony_deltas,
+                integration_method=integration_method,
+            )
+            self.assertEqual(len(correlations), len(synchrony_deltas))
+            for synchrony_delta, correlation in zip(synchrony_deltas, correlations):
+                np.testing.assert_almost_equal(
+                    correlation,
+                    calculate_metric(
+                        "synchrony",
+                        time_series_a,
+                        time_series_b,
+                        synchrony_deltas=[synchrony_delta],
+                        integration_method=integration_method,
+                    ),
+                )
+            np.testing.assert_almost_equal(
+                correlations[synchrony_deltas.index(best_delta)],
+                calculate_metric(
+                    "synchrony",
+                    time_series_a,
+                    time_series_b,
+                    integration_method=integration_method,
+                ),
+            )
+
+    def test_multi_feature_time_series_matches_time_series(self):
+        case = self.cases['multi_feature']
+        features = ['F0_MAX', 'ENG_MEAN']
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            multi_feature_time_series = MultiFeatureTimeSeries(
+                features=features, interpausal_units=case['ipus'], method='knn', k=3
+            )
+            values_to_predict = np.arange(1.0, 17.0, 0.013)
+            predictions = multi_feature_time_series.predict(values_to_predict)
+
+            self.assertEqual(predictions.shape, (len(values_to_predict), 2))
+            for j, feature in enumerate(features):
+                time_series = TimeSeries(
+                    feature=feature, interpausal_units=case['ipus'], method='knn', k=3
+                )
+                np.testing.assert_almost_equal(
+                    time_series.predict(values_to_predict), predictions[:, j]
+                )
+                self.assertEqual(
+                    time_series.start(), multi_feature_time_series.start()[j]
+                )
+                self.assertEqual(time_series.end(), multi_feature_time_series.end()[j])
+
+    def test_multi_feature_time_series_warns_nan_feature_value(self):
+        case = self.cases['multi_feature']
+        self.assertWarns(
+            Warning,
+            MultiFeatureTimeSeries,
+            features=['F0_MAX', 'ENG_MEAN'],
+            interpausal_units=case['ipus'],
+            method='knn',
+            k=3,
+        )
+
+    def test_calculate_metrics_batch_matches_calculate_metric(self):
+        time_series = [
+            TimeSeries(
+                feature='F0_MAX',
+                interpausal_units=self.cases[case]['ipus'],
+                method='knn',
+                k=4,
+            )
+            for case in ['long_100-200-300_x2', 'long_300-200-100_x2']
+        ]
+        pairs = [
+            (time_series[0], time_series[1]),
+            (time_series[1], time_series[0]),
+            (time_series[0], time_series[0]),
+        ]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            for integration_method in ["montecarlo", "trapz"]:
+                results = calculate_metrics_batch(
+                    pairs, integration_method=integration_method
+                )
+                for metric in ["proximity", "convergence", "synchrony"]:
+                    np.testing.assert_almost_equal(
+                        results[metric],
+                        [
+                            calculate_metric(
+                                metric,
+                                time_series_a,
+                                time_series_b,
+                                integration_method=integration_method,
+                            )
+                            for time_series_a, time_series_b in pairs
+                        ],
+                    )
+
+    def test_calculate_metrics_batch_invalid_metric_raises_exception(self):
+        case = self.cases['long_100-200-300_x2']
+        time_series_a = TimeSeries(
+            feature='F0_MAX', interpausal_units=case['ipus'], method='knn', k=4
+        )
+        self.assertRaises(
+            ValueError,
+            calculate_metrics_batch,
+            [(time_series_a, time_series_a)],
+            metrics=["not_a_metric"],
+        )
+
+    def test_surrogate_test_circular_shift(self):
+        case_a = self.cases['long_100-200-300_x2']
+        case_b = self.cases['long_300-200-100_x2']
+
+        time_series_a = TimeSeries(
+            feature='F0_MAX', interpausal_units=case_a['ipus'], method='knn', k=4
+        )
+        time_series_b = TimeSeries(
+            feature='F0_MAX', interpausal_units=case_b['ipus'], method='knn', k=4
+        )
+
+        result = surrogate_test(
+            "synchrony", time_series_a, time_series_b, n_surrogates=50, seed=0
+        )
+        np.testing.assert_almost_equal(
+            result.value, calculate_metric("synchrony", time_series_a, time_series_b)
+        )
+        self.assertEqual(len(result.surrogate_values), 50)
+        self.assertGreater(np.std(result.surrogate_values), 1e-6)
+        self.assertTrue(1 / 51 <= result.p_value <= 1.0)
+
+        same_seed_result = surrogate_test(
+            "synchrony", time_series_a, time_series_b, n_surrogates=50, seed=0
+        )
+        np.testing.assert_array_equal(
+            result.surrogate_values, same_seed_result.surrogate_values
+        )
+
+        for n_surrogates in [0, -1]:
+            self.assertRaises(
+                ValueError,
+                surrogate_test,
+                "synchrony",
+                time_series_a,
+                time_series_b,
+                n_surrogates=n_surrogates,
+            )
+
+        # Circular shifts keep the mean, every proximity surrogate would be the same
+        self.assertRaises(
+            ValueError, surrogate_test, "proximity", time_series_a, time_series_b
+        )
+
+    def test_surrogate_test_partners(self):
+        time_series = [
+            TimeSeries(
+                feature='F0_MAX',
+                interpausal_units=self.cases[case]['ipus'],
+                method='knn',
+                k=4,
+            )
+            for case in ['long_100-200-300_x2', 'long_300-200-100_x2']
+        ]
+
+        result = surrogate_test(
+            "proximity",
+            time_series[0],
+            time_series[1],
+            method="partners",
+            surrogate_partners=time_series,
+        )
+        np.testing.assert_almost_equal(
+            result.surrogate_values,
+            [
+                calculate_metric("proximity", time_series[0], partner)
+                for partner in time_series
+            ],
+        )
+        self.assertGreater(np.std(result.surrogate_values), 1e-6)
+        # Both surrogates (the pair with itself and the real pair) are as extreme
+        self.assertEqual(result.p_value, 1.0)
+
+    def test_online_time_series_matches_time_series(self):
+        case = self.cases['multi_feature']
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            online_time_series = OnlineTimeSeries(feature='F0_MAX', k=3)
+            for ipu in case['ipus']:
+                online_time_series.append(ipu)
+            time_series = TimeSeries(
+                feature='F0_MAX', interpausal_units=case['ipus'], method='knn', k=3
+            )
+
+            values_to_predict = np.arange(1.0, 17.0, 0.013)
+            np.testing.assert_almost_equal(
+                time_series.predict(values_to_predict),
+                online_time_series.predict(values_to_predict),
+            )
+        self.assertEqual(time_series.start(), online_time_series.start())
+        self.assertEqual(time_series.end(), online_time_series.end())
+
+    def test_online_time_series_unordered_append_raises_exception(self):
+        case = self.cases['unordered']
+        online_time_series = OnlineTimeSeries(feature='F0_MAX', k=1)
+        online_time_series.append(case['ipus'][0])
+        self.assertRaises(ValueError, online_time_series.append, case['ipus'][1])
+
+    def test_online_metrics_incremental_matches_from_scratch(self):
+        ipus_a = self.cases['long_100-200-300_x2']['ipus']
+        ipus_b = self.cases['long_300-200-100_x2']['ipus']
+
+        online_time_series_a = OnlineTimeSeries(feature='F0_MAX', k=2)
+        online_time_series_b = OnlineTimeSeries(feature='F0_MAX', k=2)
+        online_metrics = OnlineMetrics(
+            online_time_series_a,
+            online_time_series_b,
+            window=20.0,
+            synchrony_deltas=[-2.0, 0.0, 2.0],
+        )
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            for ipu_a, ipu_b in zip(ipus_a, ipus_b):
+                online_time_series_a.append(ipu_a)
+                online_time_series_b.append(ipu_b)
+                if online_time_series_a.is_defined():
+                    incremental_results = online_metrics.calculate()
+
+            from_scratch_results = OnlineMetrics(
+                online_time_series_a,
+                online_time_series_b,
+                window=20.0,
+                synchrony_deltas=[-2.0, 0.0, 2.0],
+            ).calculate()
+
+        for metric, value in from_scratch_results.items():
+            np.testing.assert_almost_equal(incremental_results[metric], value)
+
+    def test_online_time_series_with_outliers_matches_time_series(self):
+        rng = np.random.default_rng(0)
+        values = rng.normal(200.0, 10.0, 300)
+        # Some outliers, and values that become (non-)outliers as the mean and
+        # standard deviation change
+        outliers = rng.random(300) < 0.05
+        values[outliers] += rng.normal(0.0, 80.0, np.count_nonzero(outliers))
+        values[::37] += 60.0
+        ipus = [
+            InterPausalUnit(i * 2.0, i * 2.0 + 1.0, {'F0_MAX': float(value)})
+            for i, value in enumerate(values)
+        ]
+
+        online_time_series = OnlineTimeSeries(feature='F0_MAX', k=3)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for i, ipu in enumerate(ipus):
+                online_time_series.append(ipu)
+                if i % 10 == 9:
+                    time_series = TimeSeries(
+                        feature='F0_MAX',
+                        interpausal_units=ipus[: i + 1],
+                        method='knn',
+                        k=3,
+                    )
+                    # Never halfway between two IPUs, where ties are broken differently
+                    values_to_predict = np.arange(0.05, i * 2.0, 0.7)
+                    np.testing.assert_almost_equal(
+                        time_series.predict(values_to_predict),
+                        online_time_series.predict(values_to_predict),
+                    )
+                    self.assertEqual(
+                        i + 1 - len(time_series.ipus),
+                        online_time_series.outlier_ipus(),
+                    )
+
+    def test_online_metrics_sharing_time_series(self):
+        rng = np.random.default_rng(0)
+        ipus_a, ipus_b = [
+            [
+                InterPausalUnit(
+                    i * 2.0 + shift, i * 2.0 + shift + 1.0, {'F0_MAX': value}
+                )
+                for i, value in enumerate(rng.normal(200.0, 20.0, 40).tolist())
+            ]
+            for shift in [0.0, 0.6]
+        ]
+
+        online_time_series_a = OnlineTimeSeries(feature='F0_MAX', k=4)
+        online_time_series_b = OnlineTimeSeries(feature='F0_MAX', k=4)
+        windows = [20.0, 10.0]
+        online_metrics = [
+            OnlineMetrics(
+                online_time_series_a,
+                online_time_series_b,
+                window=window,
+                synchrony_deltas=[-2.0, 0.0, 2.0],
+            )
+            for window in windows
+        ]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            for i, (ipu_a, ipu_b) in enumerate(zip(ipus_a, ipus_b)):
+                online_time_series_a.append(ipu_a)
+                online_time_series_b.append(ipu_b)
+                # Once the common support is longer than the synchrony deltas
+                if i >= 5:
+                    # Each one must see the changes, even if the other saw them first
+                    incremental_results = [
+                        metrics.calculate() for metrics in online_metrics
+                    ]
+
+            for window, results in zip(windows, incremental_results):
+                from_scratch_results = OnlineMetrics(
+                    online_time_series_a,
+                    online_time_series_b,
+                    window=window,
+                    synchrony_deltas=[-2.0, 0.0, 2.0],
+                ).calculate()
+                for metric, value in from_scratch_results.items():
+                    np.testing.assert_almost_equal(results[metric], value)
+
+    def test_calculate_windowed_metric_matches_calculate_metric(self):
+        time_series_a = TimeSeries(
+            feature='F0_MAX',
+            interpausal_units=self.cases['long_100-200-300_x2']['ipus'],
+            method='knn',
+            k=4,
+        )
+        time_series_b = TimeSeries(
+            feature='F0_MAX',
+            interpausal_units=self.cases['long_300-200-100_x2']['ipus'],
+            method='knn',
+            k=4,
+        )
+
+        for metric in ["proximity", "convergence", "synchrony"]:
+            window_centers, values = calculate_windowed_metric(
+                metric,
+                time_series_a,
+                time_series_b,
+                window=20.0,
+                step=5.0,
+                granularity=0.5,
+                synchrony_deltas=[-2.0, 0.0, 2.0],
+            )
+            expected = [
+                calculate_metric(
+                    metric,
+                    time_series_a,
+                    time_series_b,
+                    start=center - 10.0,
+                    end=center + 10.0,
+                    granularity=0.5,
+                    synchrony_deltas=[-2.0, 0.0, 2.0],
+                )
+                for center in window_centers
+            ]
+            np.testing.assert_almost_equal(values, expected)
+
+    def test_calculate_windowed_metric_w_window_bigger_than_interval(self):
+        case = self.cases['long_100-200-300_x2']
+        time_series_a = TimeSeries(
+            feature='F0_MAX', interpausal_units=case['ipus'], method='knn', k=4
+        )
+
+        with self.assertRaises(ValueError):
+            calculate_windowed_metric(
+                "proximity", time_series_a, time_series_a, window=100.0
+            )
+
+    def test_predict_curve_is_calculated_once(self):
+        case = self.cases['long_100-200-300_x2']
+        time_series = TimeSeries(
+            feature='F0_MAX', interpausal_units=case['ipus'], method='knn', k=4
+        )
+        xs, ys = predict_curve(time_series, granularity=0.1, cache=True)
+
+        expected_xs = np.arange(2.0, 48.0 + 0.1, 0.1)
+        np.testing.assert_almost_equal(xs, expected_xs)
+        np.testing.assert_almost_equal(
+            ys, time_series.predict(np.minimum(expected_xs, 48.0))
+        )
+        self.assertIs(ys, predict_curve(time_series, 2.0, 48.0, 0.1)[1])
+        self.assertIsNot(ys, predict_curve(time_series, 2.0, 40.0, 0.1)[1])
+        # Cached curves are shared, so they can not be modified
+        self.assertFalse(xs.flags.writeable)
+        self.assertFalse(ys.flags.writeable)
+
+        clear_curves(time_series)
+        self.assertIsNot(ys, predict_curve(time_series, 2.0, 48.0, 0.1)[1])
+
+        # Curves are not kept by default
+        ys = predict_curve(time_series, 2.0, 40.0, 0.1)[1]
+        self.assertTrue(ys.flags.writeable)
+        self.assertIsNot(ys, predict_curve(time_series, 2.0, 40.0, 0.1)[1])
+
+    def test_save_time_series_plots(self):
+        case = self.cases['long_100-200-300_x2']
+        time_series_a = TimeSeries(
+            feature='F0_MAX', interpausal_units=case['ipus'], method='knn', k=4
+        )
+        time_series_b = TimeSeries(
+            feature='F0_MAX', interpausal_units=case['ipus'][1:], method='knn', k=4
+        )
+        path = Path(tempfile.mkdtemp())
+        try:
+            fnames = [path / f"session_{i}.png" for i in range(3)]
+            save_time_series_plots(
+                [(fname, [time_series_a, time_series_b]) for fname in fnames],
+                names=["A", "B"],
+                granularity=0.1,
+            )
+            for fname in fnames:
+                self.assertGreater(os.path.getsize(fname), 0)
+
+            # kwargs override the color of each TimeSeries
+            save_time_series_plots(
+                [(fnames[0], [time_series_a, time_series_b])],
+                names=["A", "B"],
+                granularity=0.1,
+                color="red",
+            )
+        finally:
+            shutil.rmtree(path)
+
+        code = (
+            "import sys\n"
+            "import tempfile\n"
+            "from entrainment_metrics import InterPausalUnit\n"
+            "from entrainment_metrics.continuous import TimeSeries, save_time_series_plots\n"
+            "ipus = [InterPausalUnit(i * 4.0, i * 4.0 + 2.0, {'F0_MAX': 100.0 + i}) for i in range(10)]\n"
+            "with tempfile.TemporaryDirectory() as path:\n"
+            "    save_time_series_plots([(path + '/plot.png', [TimeSeries('F0_MAX', ipus, 'knn')])])\n"
+            "print('matplotlib.pyplot' in sys.modules)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual("False", result.stdout.strip())
+
+    def test_time_series_backends(self):
+        case = self.cases['long_100-200-300_x2']
+        xs = np.arange(2.0, 48.0, 0.5)
+        middle_points = case['ipus_middle_points_in_time']
+        feature_values = case['ipus_feature_values']
+
+        time_series = TimeSeries('F0_MAX', case['ipus'], method='linear')
+        np.testing.assert_almost_equal(
+            np.interp(xs, middle_points, feature_values), time_series.predict(xs)
+        )
+
+        # A window with a single IPU predicts its value, as well as no IPU
+        time_series = TimeSeries(
+            'F0_MAX', case['ipus'], method='moving_average', window=4.0
+        )
+        np.testing.assert_almost_equal(
+            [100.003, 100.003, 200.002, 300.002],
+            time_series.predict(np.array([2.0, 5.0, 9.0, 20.0])),
+        )
+        time_series = TimeSeries(
+            'F0_MAX', case['ipus'], method='moving_average', window=20.0
+        )
+        np.testing.assert_almost_equal(
+            [np.mean(feature_values[:3])], time_series.predict([10.0])
+        )
+
+        # A narrow kernel predicts the value of the nearest IPU
+        time_series = TimeSeries('F0_MAX', case['ipus'], method='kernel', bandwidth=0.1)
+        np.testing.assert_almost_equal(
+            [100.003, 200.002, 300.002], time_series.predict([2.5, 9.0, 22.0])
+        )
+        time_series = TimeSeries('F0_MAX', case['ipus'], method='kernel')
+        predictions = time_series.predict(xs)
+        self.assertTrue(np.all(predictions >= 100.003))
+        self.assertTrue(np.all(predictions <= 300.002))
+
+        # Without smoothing, the spline interpolates the values
+        time_series = TimeSeries('F0_MAX', case['ipus'], method='spline', lam=0.0)
+        np.testing.assert_almost_equal(
+            feature_values, time_series.predict(np.array(middle_points)), decimal=3
+        )
+        time_series = TimeSeries('F0_MAX', case['ipus'], method='spline')
+        self.assertEqual(xs.shape, time_series.predict(xs).shape)
+
+        with self.assertRaises(ValueError):
+            TimeSeries('F0_MAX', case['ipus'], method='unknown')
+
+    def test_register_regression_backend(self):
+        case = self.cases['long_100-200-300_x2']
+        register_regression_backend(
+            'uniform_knn', lambda **kwargs: KNeighborsRegressor(n_neighbors=1, **kwargs)
+        )
+        time_series = TimeSeries('F0_MAX', case['ipus'], method='uniform_knn')
+        np.testing.assert_almost_equal(
+            [100.003, 300.002], time_series.predict([3.0, 21.0])
+        )
+
+    def test_calculate_metric_in_chunks_matches_calculate_metric(self):
+        time_series_a = TimeSeries(
+            'F0_MAX', self.cases['long_100-200-300_x2']['ipus'], method='knn', k=2
+        )
+        time_series_b = TimeSeries(
+            'F0_MAX', self.cases['long_300-200-100_x2']['ipus'], method='knn', k=2
+        )
+
+        predicted_sizes = []
+        predict = time_series_a.predict
+
+        def predict_and_record(X):
+            predicted_sizes.append(len(X))
+            return predict(X)
+
+        time_series_a.predict = predict_and_record
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for metric in ["proximity", "convergence", "synchrony"]:
+                for integration_method in ["montecarlo", "trapz"]:
+                    expected = calculate_metric(
+                        metric,
+                        time_series_a,
+                        time_series_b,
+                        synchrony_deltas=[-5.0, 0.0, 5.0],
+                        integration_method=integration_method,
+                    )
+                    for chunk_size in [50, 1000, 10000]:
+                        predicted_sizes.clear()
+                        np.testing.assert_almost_equal(
+                            expected,
+                            calculate_metric(
+                                metric,
+                                time_series_a,
+                                time_series_b,
+                                synchrony_deltas=[-5.0, 0.0, 5.0],
+                                integration_method=integration_method,
+                                chunk_size=chunk_size,
+                            ),
+                        )
+                        self.assertLessEqual(max(predicted_sizes), chunk_size)
+
+            expected_correlations, expected_delta = calculate_synchrony_profile(
+                time_series_a, time_series_b, synchrony_deltas=[-5.0, 0.0, 5.0]
+            )
+            correlations, delta = calculate_synchrony_profile(
+                time_series_a,
+                time_series_b,
+                synchrony_deltas=[-5.0, 0.0, 5.0],
+                chunk_size=100,
+            )
+        np.testing.assert_almost_equal(expected_correlations, correlations)
+        self.assertEqual(expected_delta, delta)
+
+        with self.assertRaises(ValueError):
+            calculate_metric("proximity", time_series_a, time_series_b, chunk_size=0)
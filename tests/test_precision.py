@@ -0,0 +1,116 @@
+import shutil
+import tempfile
+import warnings
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from entrainment_metrics import (InterPausalUnit, get_dtype,
+                                 interpausal_units_table,
+                                 load_interpausal_units_table, use_dtype)
+from entrainment_metrics.continuous import (MultiFeatureTimeSeries, TimeSeries,
+                                            calculate_metric,
+                                            calculate_metrics_batch)
+from entrainment_metrics.tama import calculate_sample_correlation
+
+
+class PrecisionTestCase(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.ipus_a = [
+            InterPausalUnit(i * 3.0, i * 3.0 + 2.0, {'F0_MAX': value})
+            for i, value in enumerate(rng.normal(200.0, 20.0, 100).tolist())
+        ]
+        self.ipus_b = [
+            InterPausalUnit(i * 3.0 + 1.3, i * 3.0 + 3.3, {'F0_MAX': value})
+            for i, value in enumerate(rng.normal(180.0, 30.0, 100).tolist())
+        ]
+        self.time_series_a = TimeSeries('F0_MAX', self.ipus_a, method='knn')
+        self.time_series_b = TimeSeries('F0_MAX', self.ipus_b, method='knn')
+
+    def test_default_dtype_and_invalid_dtype(self):
+        self.assertEqual(np.float64, get_dtype())
+        with use_dtype("float32"):
+            self.assertEqual(np.float32, get_dtype())
+        self.assertEqual(np.float64, get_dtype())
+
+        for dtype in ["float16", np.int32, "not a dtype"]:
+            with self.assertRaises(ValueError):
+                with use_dtype(dtype):
+                    pass
+
+    def test_float32_predictions_and_tables(self):
+        with use_dtype("float32"):
+            predictions = self.time_series_a.predict_interval(granularity=0.1)
+            multi_feature_predictions = MultiFeatureTimeSeries(
+                ['F0_MAX'], self.ipus_a, method='knn'
+            ).predict_interval(granularity=0.1)
+            table = interpausal_units_table(self.ipus_a)
+
+        self.assertEqual(np.float32, predictions.dtype)
+        self.assertEqual(np.float32, multi_feature_predictions.dtype)
+        np.testing.assert_allclose(
+            self.time_series_a.predict_interval(granularity=0.1),
+            predictions,
+            rtol=1e-6,
+        )
+
+        self.assertEqual(np.float32, table.values.dtype)
+        self.assertEqual(np.float64, table.starts.dtype)
+        path = Path(tempfile.mkdtemp())
+        try:
+            table.save(path)
+            loaded_table = load_interpausal_units_table(path)
+        finally:
+            shutil.rmtree(path)
+        np.testing.assert_array_equal(table.values, loaded_table.values)
+        self.assertEqual(np.float32, loaded_table.values.dtype)
+
+    def test_float32_metrics_close_to_float64(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for metric in ["proximity", "convergence", "synchrony"]:
+                for integration_method in ["montecarlo", "trapz"]:
+                    for chunk_size in [None, 1000]:
+                        expected = calculate_metric(
+                            metric,
+                            self.time_series_a,
+                            self.time_series_b,
+                            integration_method=integration_method,
+                            chunk_size=chunk_size,
+                        )
+                        with use_dtype("float32"):
+                            value = calculate_metric(
+                                metric,
+                                self.time_series_a,
+                                self.time_series_b,
+                                integration_method=integration_method,
+                                chunk_size=chunk_size,
+                            )
+                        # Proximity is in the scale of the feature values
+                        tolerance = 1e-4 if metric == "proximity" else 1e-5
+                        self.assertAlmostEqual(expected, value, delta=tolerance)
+
+            expected_results = calculate_metrics_batch(
+                [(self.time_series_a, self.time_series_b)] * 2
+            )
+            with use_dtype("float32"):
+                results = calculate_metrics_batch(
+                    [(self.time_series_a, self.time_series_b)] * 2
+                )
+        for metric, values in results.items():
+            self.assertEqual(np.float32, values.dtype)
+            np.testing.assert_allclose(expected_results[metric], values, atol=1e-4)
+
+    def test_float32_tama_sample_correlation_close_to_float64(self):
+        rng = np.random.default_rng(1)
+        time_series_a = rng.normal(200.0, 20.0, 50).tolist()
+        time_series_b = rng.normal(180.0, 30.0, 50).tolist()
+
+        expected = calculate_sample_correlation(time_series_a, time_series_b, 3)
+        with use_dtype("float32"):
+            correlations = calculate_sample_correlation(time_series_a, time_series_b, 3)
+
+        self.assertEqual(np.float32, correlations.dtype)
+        np.testing.assert_allclose(expected, correlations, atol=1e-5)
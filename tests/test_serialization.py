@@ -0,0 +1,88 @@
+import shutil
+import tempfile
+from math import nan
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from entrainment_metrics import (InterPausalUnit, interpausal_units_table,
+                                 load_interpausal_units_table)
+from entrainment_metrics.continuous import (TimeSeries, load_time_series,
+                                            save_time_series)
+
+
+class SerializationTestCase(TestCase):
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp())
+        self.ipus = [
+            InterPausalUnit(0.0, 4.0, {'F0_MAX': 100.003, 'ENG_MEAN': 60.1}),
+            InterPausalUnit(8.0, 12.0, {'F0_MAX': 200.002}),
+            InterPausalUnit(16.0, 24.0, {'F0_MAX': 300.002, 'ENG_MEAN': None}),
+            InterPausalUnit(28.0, 32.0, {'F0_MAX': 100.003, 'ENG_MEAN': 62.3}),
+            InterPausalUnit(36.0, 40.0, {'F0_MAX': 200.002, 'ENG_MEAN': 58.8}),
+            InterPausalUnit(44.0, 52.0, {'F0_MAX': 1000.0, 'ENG_MEAN': 65.2}),
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_interpausal_units_table_save_and_load(self):
+        table = interpausal_units_table(self.ipus)
+        table.save(self.path / "table")
+
+        loaded_table = load_interpausal_units_table(self.path / "table", mmap_mode="r")
+
+        self.assertEqual(['F0_MAX', 'ENG_MEAN'], loaded_table.features)
+        np.testing.assert_array_equal(
+            [100.003, 200.002, 300.002, 100.003, 200.002, 1000.0],
+            loaded_table.feature_values('F0_MAX'),
+        )
+        np.testing.assert_array_equal(
+            [60.1, nan, nan, 62.3, 58.8, 65.2],
+            loaded_table.feature_values('ENG_MEAN'),
+        )
+        loaded_ipus = loaded_table.interpausal_units(['F0_MAX'])
+        self.assertEqual(self.ipus, loaded_ipus)
+        self.assertEqual(
+            [ipu.feature_value('F0_MAX') for ipu in self.ipus],
+            [ipu.feature_value('F0_MAX') for ipu in loaded_ipus],
+        )
+
+    def test_load_interpausal_units_table_wo_schema_raises_exception(self):
+        self.assertRaises(ValueError, load_interpausal_units_table, self.path)
+
+    def test_time_series_save_and_load(self):
+        time_series = TimeSeries(
+            feature='F0_MAX',
+            interpausal_units=self.ipus,
+            method='knn',
+            k=2,
+            MAX_DEVIATIONS=2,
+        )
+        save_time_series(time_series, self.path / "time_series")
+
+        loaded_time_series = load_time_series(self.path / "time_series")
+
+        self.assertEqual(time_series.outlier_ipus(), loaded_time_series.outlier_ipus())
+        self.assertEqual(time_series.ipus, loaded_time_series.ipus)
+        np.testing.assert_array_equal(
+            time_series.predict_interval(), loaded_time_series.predict_interval()
+        )
+
+    def test_time_series_w_other_method_save_and_load(self):
+        time_series = TimeSeries(
+            feature='F0_MAX',
+            interpausal_units=self.ipus,
+            method='moving_average',
+            window=20.0,
+        )
+        save_time_series(time_series, self.path / "time_series")
+
+        loaded_time_series = load_time_series(self.path / "time_series")
+
+        self.assertEqual('moving_average', loaded_time_series.method)
+        self.assertEqual({'window': 20.0}, loaded_time_series.model.get_params())
+        np.testing.assert_array_equal(
+            time_series.predict_interval(), loaded_time_series.predict_interval()
+        )
@@ -0,0 +1,136 @@
+import base64
+import http.client
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import warnings
+from pathlib import Path
+from unittest import TestCase
+
+from entrainment_metrics import get_interpausal_units
+from entrainment_metrics.continuous import TimeSeries, calculate_metric
+from entrainment_metrics.server import create_server
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, unix_socket):
+        super().__init__("localhost")
+        self.unix_socket = unix_socket
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_socket)
+
+
+class ServerTestCase(TestCase):
+    def setUp(self):
+        self.path = Path(tempfile.mkdtemp())
+        self.files = {
+            "audio_a": Path("./data/100-200-300_long.wav"),
+            "words_a": Path("./data/100-200-300_long.words"),
+            "audio_b": Path("./data/200-300-100.wav"),
+            "words_b": Path("./data/200-300-100.words"),
+        }
+        self.request = {
+            "feature": "F0_MAX",
+            "extractor": "praat",
+            "k": 2,
+            "metric": "proximity",
+        }
+        self.request.update(
+            {
+                f"{name}_file": os.path.abspath(fname)
+                for name, fname in self.files.items()
+            }
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def start_server(self, **kwargs):
+        server = create_server(**kwargs)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def send_request(self, connection, method, path, request=None):
+        connection.request(
+            method, path, body=None if request is None else json.dumps(request)
+        )
+        response = connection.getresponse()
+        res = json.loads(response.read())
+        connection.close()
+        return response.status, res
+
+    def test_knn_scores(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            time_series = []
+            for speaker in ["a", "b"]:
+                ipus = get_interpausal_units(self.files[f"words_{speaker}"])
+                for ipu in ipus:
+                    ipu.calculate_features(
+                        self.files[f"audio_{speaker}"], extractor="praat"
+                    )
+                time_series.append(TimeSeries("F0_MAX", ipus, method="knn", k=2))
+            expected = calculate_metric("proximity", *time_series)
+
+            server = self.start_server(port=0)
+            connection = http.client.HTTPConnection(*server.server_address)
+            self.assertEqual(
+                (200, {"status": "ok"}), self.send_request(connection, "GET", "/health")
+            )
+
+            status, res = self.send_request(connection, "POST", "/knn", self.request)
+            self.assertEqual(200, status)
+            self.assertEqual(3, res["ipus_a"])
+            self.assertAlmostEqual(expected, res["proximity"])
+
+            # Uploaded files instead of paths
+            request = {
+                key: value for key, value in self.request.items() if "_file" not in key
+            }
+            for name, fname in self.files.items():
+                if name.startswith("audio"):
+                    request[name] = base64.b64encode(fname.read_bytes()).decode("ascii")
+                else:
+                    request[name] = fname.read_text(encoding="utf-8")
+            self.assertEqual(
+                (200, res), self.send_request(connection, "POST", "/knn", request)
+            )
+
+    def test_tama_scores_over_unix_socket(self):
+        unix_socket = os.fspath(self.path / "server.sock")
+        self.start_server(unix_socket=unix_socket)
+        request = dict(self.request, lags=1)
+        request["audio_b_file"] = request["audio_a_file"]
+        request["words_b_file"] = request["words_a_file"]
+
+        status, res = self.send_request(
+            UnixHTTPConnection(unix_socket), "POST", "/tama", request
+        )
+        self.assertEqual(200, status)
+        self.assertEqual(res["time_series_a"], res["time_series_b"])
+        self.assertEqual(2, len(res["sample_cross_correlations"]))
+
+    def test_invalid_requests(self):
+        server = self.start_server(port=0)
+        connection = http.client.HTTPConnection(*server.server_address)
+
+        status, res = self.send_request(
+            connection, "POST", "/knn", {"feature": "F0_MAX"}
+        )
+        self.assertEqual(400, status)
+        self.assertIn("error", res)
+
+        request = dict(self.request, audio_a_file=os.fspath(self.path / "missing.wav"))
+        status, _ = self.send_request(connection, "POST", "/knn", request)
+        self.assertEqual(400, status)
+
+        status, _ = self.send_request(connection, "POST", "/other", self.request)
+        self.assertEqual(404, status)
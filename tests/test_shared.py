@@ -0,0 +1,116 @@
+import pickle
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from unittest import TestCase
+
+import audiofile
+import numpy as np
+
+from entrainment_metrics import (InterPausalUnit, interpausal_units_table,
+                                 share_array, share_audio, share_table, tama)
+from entrainment_metrics.continuous import TimeSeries
+from entrainment_metrics.extraction import (calculate_llds,
+                                            calculate_praat_tracks)
+
+
+def sum_shared_array(shared_array):
+    res = float(np.sum(shared_array.array()))
+    shared_array.close()
+    return res
+
+
+class SharedTestCase(TestCase):
+    def setUp(self):
+        self.audio_fname = "./data/hola-camaron.wav"
+
+    def test_shared_array_is_not_pickled(self):
+        array = np.arange(100_000, dtype=np.float64).reshape(1000, 100)
+        for values in [array, np.asfortranarray(array)]:
+            with share_array(values) as shared_array:
+                self.assertLess(len(pickle.dumps(shared_array)), 1000)
+                np.testing.assert_array_equal(values, shared_array.array())
+
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    res = executor.submit(sum_shared_array, shared_array).result()
+                self.assertEqual(float(np.sum(values)), res)
+
+        with self.assertRaises(FileNotFoundError):
+            pickle.loads(pickle.dumps(shared_array)).array()
+
+    def test_shared_audio_read(self):
+        with share_audio(self.audio_fname) as shared_audio:
+            signal, sampling_rate = shared_audio.read()
+            expected_signal, expected_sampling_rate = audiofile.read(self.audio_fname)
+            self.assertEqual(expected_sampling_rate, sampling_rate)
+            np.testing.assert_array_equal(expected_signal, signal)
+
+            signal, _ = shared_audio.read(offset=0.1, duration=0.2)
+            expected_signal, _ = audiofile.read(
+                self.audio_fname, offset=0.1, duration=0.2
+            )
+            np.testing.assert_array_equal(expected_signal, signal)
+            del signal
+
+    def test_features_from_shared_audio(self):
+        interpausal_unit = InterPausalUnit(0.0, 0.342604)
+        with share_audio(self.audio_fname) as shared_audio:
+            for extractor in ["opensmile", "praat"]:
+                self.assertEqual(
+                    interpausal_unit.calculate_features(
+                        self.audio_fname, extractor=extractor, feature_set="eGeMAPSv02"
+                    ),
+                    interpausal_unit.calculate_features(
+                        shared_audio, extractor=extractor, feature_set="eGeMAPSv02"
+                    ),
+                )
+
+            expected_times, expected_llds, expected_names = calculate_llds(
+                self.audio_fname, "eGeMAPSv02"
+            )
+            times, llds, names = calculate_llds(shared_audio, "eGeMAPSv02")
+            # Some audinterface versions round the frame times of files and
+            # signals differently
+            np.testing.assert_allclose(expected_times, times, atol=1e-6)
+            np.testing.assert_array_equal(expected_llds, llds)
+            self.assertEqual(expected_names, names)
+
+            expected_tracks = calculate_praat_tracks(self.audio_fname, cache=False)
+            tracks = calculate_praat_tracks(shared_audio, cache=False)
+            self.assertEqual(list(expected_tracks), list(tracks))
+            for track, values in tracks.items():
+                np.testing.assert_allclose(expected_tracks[track], values)
+
+    def test_tama_frames_from_shared_audio(self):
+        with share_audio(self.audio_fname) as shared_audio:
+            frames = tama.get_frames(
+                shared_audio,
+                "./data/hola-camaron.words",
+                frame_length=0.2,
+                time_step=0.1,
+            )
+        expected_frames = tama.get_frames(
+            self.audio_fname,
+            "./data/hola-camaron.words",
+            frame_length=0.2,
+            time_step=0.1,
+        )
+        self.assertEqual(
+            [(frame.start, frame.end) for frame in expected_frames],
+            [(frame.start, frame.end) for frame in frames],
+        )
+
+    def test_time_series_from_shared_table(self):
+        interpausal_units = [
+            InterPausalUnit(float(start), float(start) + 2.0, {'F0_MAX': 100.0 + start})
+            for start in range(0, 80, 4)
+        ]
+        with share_table(interpausal_units_table(interpausal_units)) as shared_table:
+            self.assertEqual(len(interpausal_units), len(shared_table))
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                np.testing.assert_array_equal(
+                    TimeSeries(
+                        'F0_MAX', interpausal_units, method='knn'
+                    ).predict_interval(),
+                    TimeSeries('F0_MAX', shared_table, method='knn').predict_interval(),
+                )
@@ -1,11 +1,18 @@
+import shutil
+import tempfile
 import warnings
-from unittest import TestCase
+from pathlib import Path
+from unittest import TestCase, mock
 
 import numpy as np
 from scipy.io import wavfile
 
 from entrainment_metrics import InterPausalUnit, tama
-from entrainment_metrics.utils import get_interpausal_units
+from entrainment_metrics.extraction import (
+    calculate_features_from_llds, calculate_features_from_praat_tracks,
+    calculate_llds, calculate_praat_features, calculate_praat_tracks)
+from entrainment_metrics.utils import (get_interpausal_units,
+                                       get_interpausal_units_bounds)
 
 
 class TAMATestCase(TestCase):
@@ -236,6 +243,35 @@ class TAMATestCase(TestCase):
             self.cases['spoken']['expected_ipus'],
         )
 
+    def test_interpausal_units_separation_w_blank_lines(self):
+        self.assertEqual(
+            [InterPausalUnit(0.4, 1.2), InterPausalUnit(2.0, 2.4)],
+            get_interpausal_units("./data/blank_lines.words"),
+        )
+
+    def test_interpausal_units_bounds(self):
+        case = self.cases['spoken']
+        starts, ends = get_interpausal_units_bounds(case['words_fname'])
+        np.testing.assert_array_equal(
+            [ipu.start for ipu in case['expected_ipus']], starts
+        )
+        np.testing.assert_array_equal([ipu.end for ipu in case['expected_ipus']], ends)
+
+    def test_interpausal_units_bounds_non_latin_words(self):
+        tmp_path = Path(tempfile.mkdtemp())
+        try:
+            words_fname = tmp_path / "non_latin.words"
+            words_fname.write_text(
+                "0.0 0.4 日本語\n0.4 0.8 #\n0.8 1.2 ça\n1.2 1.6 Привет\n1.6 2.0 #\n",
+                encoding="utf-8",
+            )
+            self.assertEqual(
+                [InterPausalUnit(0.0, 0.4), InterPausalUnit(0.8, 1.6)],
+                get_interpausal_units(words_fname),
+            )
+        finally:
+            shutil.rmtree(tmp_path)
+
     def test_frame_separation_empty(self):
         case = self.cases['empty']
         self.assertEqual(
@@ -290,6 +326,48 @@ class TAMATestCase(TestCase):
             ),
         )
 
+    def test_frame_separation_long_w_frame_length_and_time_step(self):
+        case = self.cases['long_100-200-300']
+        self.assertEqual(
+            [
+                tama.Frame(0.0, 8.0, False, [InterPausalUnit(0.0, 4.0)]),
+                tama.Frame(8.0, 16.0, False, [InterPausalUnit(8.0, 12.0)]),
+                tama.Frame(16.0, 24.0, False, [InterPausalUnit(16.0, 24.0)]),
+            ],
+            tama.get_frames(
+                wav_fname=case['audio_fname'],
+                words_fname=case['words_fname'],
+                frame_length=8.0,
+                time_step=8.0,
+            ),
+        )
+
+    def test_frame_separation_sweep_matches_frame_separation(self):
+        case = self.cases['long_100-200-300_x2']
+        samplerate, data = case['audio']
+        ipus = get_interpausal_units(case['words_fname'])
+        configurations = [(None, None), (4.0, 2.0), (10.0, 5.0), (20.0, 20.0)]
+
+        frames_sweep = tama.utils.separate_frames_sweep(
+            ipus, data, samplerate, configurations
+        )
+
+        self.assertEqual(case['expected_frames'], frames_sweep[0])
+        for (frame_length, time_step), frames in zip(configurations, frames_sweep):
+            self.assertEqual(
+                tama.utils.separate_frames(
+                    ipus, data, samplerate, frame_length, time_step
+                ),
+                frames,
+            )
+            for frame in frames:
+                self.assertEqual(
+                    tama.utils.interpausal_units_inside_interval(
+                        ipus, frame.start, frame.end
+                    ),
+                    [] if frame.is_missing else frame.interpausal_units,
+                )
+
     def test_calculate_time_series_empty(self):
         case = self.cases['empty']
         self.assertEqual(
@@ -369,6 +447,185 @@ class TAMATestCase(TestCase):
             ),
         )
 
+    def test_calculate_opensmile_features_subset(self):
+        case = self.cases['spoken']
+        features = ["F0final_sma_de_maxPos", "pcm_RMSenergy_sma_amean"]
+        ipu = InterPausalUnit(0.0, 0.342604)
+        all_features_ipu = InterPausalUnit(0.0, 0.342604)
+
+        features_values = ipu.calculate_features(
+            audio_file=case['audio_fname'],
+            extractor="opensmile",
+            features=features,
+        )
+        all_features_values = all_features_ipu.calculate_features(
+            audio_file=case['audio_fname'], extractor="opensmile"
+        )
+
+        self.assertEqual(features, list(features_values))
+        self.assertEqual(6373, len(all_features_values))
+        for feature in features:
+            self.assertEqual(all_features_values[feature], features_values[feature])
+
+    def test_calculate_opensmile_features_w_feature_set(self):
+        case = self.cases['spoken']
+        ipu = InterPausalUnit(0.0, 0.342604)
+        features_values = ipu.calculate_features(
+            audio_file=case['audio_fname'],
+            extractor="opensmile",
+            feature_set="eGeMAPSv02",
+        )
+        self.assertEqual(88, len(features_values))
+
+        self.assertRaises(
+            ValueError,
+            ipu.calculate_features,
+            audio_file=case['audio_fname'],
+            extractor="opensmile",
+            features=["F0final_sma_de_maxPos"],
+            feature_set="eGeMAPSv02",
+        )
+
+    def test_calculate_features_from_llds_match_frames_slicing(self):
+        case = self.cases['spoken']
+        ipus = get_interpausal_units(case['words_fname']) + [
+            InterPausalUnit(100.0, 101.0)
+        ]
+        table = calculate_features_from_llds(
+            ipus,
+            audio_file=case['audio_fname'],
+            functionals=["mean", "std", "min", "max", "range"],
+            percentiles=[20, 50],
+        )
+        frames_times, llds, descriptors = calculate_llds(case['audio_fname'])
+
+        self.assertEqual(len(ipus), len(table))
+        self.assertEqual(7 * len(descriptors), len(table.features))
+        for ipu in ipus[:-1]:
+            ipu_llds = llds[(frames_times >= ipu.start) & (frames_times < ipu.end)]
+            expected_values = {
+                "mean": ipu_llds.mean(axis=0),
+                "std": ipu_llds.std(axis=0),
+                "min": ipu_llds.min(axis=0),
+                "max": ipu_llds.max(axis=0),
+                "range": ipu_llds.max(axis=0) - ipu_llds.min(axis=0),
+                "percentile20.0": np.percentile(ipu_llds, 20, axis=0),
+                "percentile50.0": np.percentile(ipu_llds, 50, axis=0),
+            }
+            for functional, values in expected_values.items():
+                np.testing.assert_allclose(
+                    [
+                        ipu.features_values[f"{descriptor}_{functional}"]
+                        for descriptor in descriptors
+                    ],
+                    values,
+                    rtol=1e-9,
+                    atol=1e-9,
+                )
+        self.assertTrue(np.isnan(table.values[-1]).all())
+
+        self.assertRaises(
+            ValueError,
+            calculate_features_from_llds,
+            ipus,
+            audio_file=case['audio_fname'],
+            functionals=["median"],
+        )
+
+    def test_calculate_praat_features_match_per_ipu_extraction(self):
+        case = self.cases['spoken']
+        ipus = get_interpausal_units(case['words_fname']) + [
+            InterPausalUnit(0.0, 0.05),
+            InterPausalUnit(0.1234567891234, 0.9876543219876),
+        ]
+        for pitch_gender in [None, "M", "F"]:
+            batch_ipus = [InterPausalUnit(ipu.start, ipu.end) for ipu in ipus]
+            table = calculate_praat_features(
+                batch_ipus, case['audio_fname'], pitch_gender
+            )
+            for ipu, batch_ipu in zip(ipus, batch_ipus):
+                self.assertEqual(
+                    InterPausalUnit(ipu.start, ipu.end).calculate_features(
+                        case['audio_fname'], pitch_gender, extractor="praat"
+                    ),
+                    batch_ipu.features_values,
+                )
+        self.assertEqual({"SECONDS": 0.05}, batch_ipus[-2].features_values)
+        self.assertTrue(np.isnan(table.feature_values("F0_MAX")[-2]))
+
+        table = calculate_praat_features(
+            ipus, case['audio_fname'], features=["F0_MAX", "ENG_MEAN"]
+        )
+        self.assertEqual(["F0_MAX", "ENG_MEAN"], table.features)
+        self.assertEqual(0, len(calculate_praat_features([], case['audio_fname'])))
+        self.assertRaises(
+            ValueError,
+            calculate_praat_features,
+            ipus,
+            case['audio_fname'],
+            features=["JITTER"],
+        )
+
+    def test_calculate_features_from_praat_tracks(self):
+        case = self.cases['spoken']
+        ipus = get_interpausal_units(case['words_fname']) + [InterPausalUnit(0.0, 0.05)]
+        tmp_path = Path(tempfile.mkdtemp())
+        try:
+            audio_fname = tmp_path / "hola-camaron.wav"
+            shutil.copy(case['audio_fname'], audio_fname)
+
+            table = calculate_features_from_praat_tracks(ipus, audio_fname, "F")
+            tracks_fname = tmp_path / "hola-camaron.praat_tracks.75-500.npz"
+            self.assertTrue(tracks_fname.exists())
+            cached_table = calculate_features_from_praat_tracks(ipus, audio_fname, "F")
+            np.testing.assert_array_equal(table.values, cached_table.values)
+
+            calculate_features_from_praat_tracks(ipus, audio_fname, "M", cache=False)
+            self.assertFalse(
+                (tmp_path / "hola-camaron.praat_tracks.50-300.npz").exists()
+            )
+        finally:
+            shutil.rmtree(tmp_path)
+
+        per_ipu_table = calculate_praat_features(ipus, case['audio_fname'], "F")
+        np.testing.assert_array_equal(
+            per_ipu_table.feature_values("SECONDS"), table.feature_values("SECONDS")
+        )
+        np.testing.assert_allclose(
+            per_ipu_table.feature_values("F0_MEAN")[:-1],
+            table.feature_values("F0_MEAN")[:-1],
+            atol=1.0,
+        )
+        self.assertEqual({"SECONDS": 0.05}, ipus[-1].features_values)
+
+    def test_calculate_praat_tracks_failed_write(self):
+        case = self.cases['spoken']
+        tmp_path = Path(tempfile.mkdtemp())
+        try:
+            audio_fname = tmp_path / "hola-camaron.wav"
+            shutil.copy(case['audio_fname'], audio_fname)
+            expected_tracks = calculate_praat_tracks(audio_fname, "F", cache=False)
+
+            def interrupted_savez(tracks_file, **_):
+                tracks_file.write(b"PK")
+                raise KeyboardInterrupt()
+
+            # An interrupted write leaves neither the tracks nor the temporary file
+            with mock.patch("numpy.savez", side_effect=interrupted_savez):
+                with self.assertRaises(KeyboardInterrupt):
+                    calculate_praat_tracks(audio_fname, "F")
+            self.assertEqual([audio_fname], list(tmp_path.iterdir()))
+
+            # The tracks are still returned when they can not be saved
+            with mock.patch("numpy.savez", side_effect=PermissionError()):
+                tracks = calculate_praat_tracks(audio_fname, "F")
+            self.assertEqual([audio_fname], list(tmp_path.iterdir()))
+            self.assertEqual(list(expected_tracks), list(tracks))
+            for track, values in tracks.items():
+                np.testing.assert_array_equal(expected_tracks[track], values)
+        finally:
+            shutil.rmtree(tmp_path)
+
     def test_calculate_sample_correlation_one_empty(self):
         case = self.cases['empty']
         self.assertRaises(
@@ -469,3 +726,71 @@ class TAMATestCase(TestCase):
                 extractor="speech-rate",
             )["speech_rate"],
         )
+
+    def test_online_frames_match_frame_separation(self):
+        for case_name in ['silence', 'small', 'long_100-200-300_x2']:
+            case = self.cases[case_name]
+            samplerate, data = case['audio']
+            ipus = get_interpausal_units(case['words_fname'])
+
+            online_frames = tama.OnlineFrames(samplerate)
+            frames = []
+            # Stream the audio in chunks of a second, after the IPUs starting in them
+            for chunk_start in range(0, data.shape[0], samplerate):
+                chunk = data[chunk_start : chunk_start + samplerate]
+                chunk_end_in_s = (chunk_start + chunk.shape[0]) / samplerate
+                while ipus and ipus[0].start < chunk_end_in_s:
+                    online_frames.append_interpausal_unit(ipus.pop(0))
+                frames += online_frames.append_audio(chunk)
+            frames += online_frames.finish()
+
+            self.assertEqual(case['expected_frames'], frames)
+
+    def test_online_frames_ipu_inside_closed_frame_raises_exception(self):
+        online_frames = tama.OnlineFrames(samplerate=100)
+        online_frames.append_audio(1600)
+        self.assertRaises(
+            ValueError,
+            online_frames.append_interpausal_unit,
+            InterPausalUnit(15.0, 17.0, {'F0_MAX': 100.003}),
+        )
+
+    def test_online_tama_matches_calculate_sample_correlation(self):
+        case = self.cases['long_100-200-300_x2']
+        samplerate, data = case['audio']
+        ipus_a = [
+            InterPausalUnit(ipu.start, ipu.end, {'F0_MAX': value})
+            for ipu, value in zip(
+                case['expected_ipus'], [100.003, 200.002, 300.002] * 2
+            )
+        ]
+        ipus_b = [
+            InterPausalUnit(ipu.start, ipu.end, {'F0_MAX': value})
+            for ipu, value in zip(
+                case['expected_ipus'],
+                [300.002, 100.003, 200.002, 200.002, 100.003, 300.002],
+            )
+        ]
+
+        online_tama = tama.OnlineTAMA(feature="F0_MAX", lags=4, samplerate=samplerate)
+        for speaker, ipus in [("A", ipus_a), ("B", ipus_b)]:
+            for ipu in ipus:
+                online_tama.append_interpausal_unit(speaker, ipu)
+        for chunk_start in range(0, data.shape[0], 3 * samplerate):
+            chunk = data[chunk_start : chunk_start + 3 * samplerate]
+            online_tama.append_audio("A", chunk)
+            online_tama.append_audio("B", chunk)
+        online_tama.finish("A")
+        online_tama.finish("B")
+
+        time_series_a = tama.calculate_time_series(
+            "F0_MAX", tama.utils.separate_frames(ipus_a, data, samplerate)
+        )
+        time_series_b = tama.calculate_time_series(
+            "F0_MAX", tama.utils.separate_frames(ipus_b, data, samplerate)
+        )
+        self.assertEqual([time_series_a, time_series_b], online_tama.time_series())
+        np.testing.assert_almost_equal(
+            tama.calculate_sample_correlation(time_series_a, time_series_b, 4),
+            online_tama.sample_correlation(),
+        )